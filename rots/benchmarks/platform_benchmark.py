@@ -0,0 +1,108 @@
+''' Benchmark of scenes with many moving platforms (kinematic bodies,
+    see physics_engine/kinematic.py): the time of update_physics, and
+    how many of the boxes riding the platforms are still on them at
+    the end. A box stays on a platform only if the contacts carry it.
+
+    Run from the rots directory:
+        python -m benchmarks.platform_benchmark '''
+
+import timeit
+from math import sqrt, ceil
+
+import ode
+
+from benchmarks.space_benchmark import Benchmark_scene, Physics_object
+from math_classes.vectors import Vector
+from physics_engine import physics
+from physics_engine.kinematic import Kinematic_body, Oscillation
+
+PLATFORM_SIZE = (2.0, 0.3, 2.0)
+RIDER_SIZE = 0.6
+
+# The distance between the platforms, larger than their move
+SPACING = 6.0
+
+class Benchmark_platform(Physics_object):
+    ''' A platform moving back and forth along x, like
+        moving_scene.Moving_platform but without graphics. '''
+
+    def __init__(self, world, space, pos, amplitude = 1.5, move_time = 2.0,
+                 time = 0.0):
+
+        geom = ode.GeomBox(space, PLATFORM_SIZE)
+        geom.setPosition(pos.value)
+        super(Benchmark_platform, self).__init__(geom, bounce = 0.0)
+
+        self._kinematic = Kinematic_body(world, geom)
+        self._body = self._kinematic.get_body()
+
+        offset = Vector((amplitude, 0.0, 0.0))
+        self._curve = Oscillation(pos - offset, pos + offset, move_time)
+        self._time = time
+
+    def update(self, dt):
+        self._kinematic.move_along(self._curve, self._time)
+        self._time += dt
+        if self._time >= self._curve.get_period():
+            self._time -= self._curve.get_period()
+
+class Platform_scene(Benchmark_scene):
+    ''' A Benchmark_scene with 'platforms' platforms in a grid
+        above the floor, each with a box on it. '''
+
+    def __init__(self, platforms, count = 25, seed = 0):
+
+        super(Platform_scene, self).__init__(count, {}, seed)
+
+        world = self.get_world()
+        side = max(int(ceil(sqrt(platforms))), 1)
+        self._platforms = []
+        self._riders = []
+        for i in range(platforms):
+            pos = Vector(((i % side - side / 2.0) * SPACING, 4.0,
+                          (i // side - side / 2.0) * SPACING))
+            platform = Benchmark_platform(world, self.get_moving_scene_space(), pos,
+                                          time = (i % 4) * 0.5)
+            self._platforms.append(platform)
+
+            body = ode.Body(world)
+            mass = ode.Mass()
+            mass.setBox(1, RIDER_SIZE, RIDER_SIZE, RIDER_SIZE)
+            body.setMass(mass)
+            body.setPosition((pos + Vector((0.0, (PLATFORM_SIZE[1] + RIDER_SIZE) * 0.5,
+                                            0.0))).value)
+            geom = ode.GeomBox(self.get_object_space(), (RIDER_SIZE,) * 3)
+            geom.setBody(body)
+            self._riders.append(Physics_object(geom, body))
+
+    def count_riding(self):
+        ''' The number of boxes that are still on their platforms. '''
+
+        riding = 0
+        for platform, rider in zip(self._platforms, self._riders):
+            px, py, pz = platform.get_geom().getPosition()
+            x, y, z = rider.get_body().getPosition()
+            if abs(x - px) < PLATFORM_SIZE[0] * 0.5 and \
+               abs(z - pz) < PLATFORM_SIZE[2] * 0.5 and y > py:
+                riding += 1
+        return riding
+
+def time_scene(platforms, ticks = 300):
+    ''' Returns the mean time of update_physics in milliseconds,
+        and the number of boxes still riding their platforms. '''
+
+    scene = Platform_scene(platforms)
+    seconds = timeit.timeit(lambda: physics.update_physics(scene), number = ticks)
+    return seconds / ticks * 1000.0, scene.count_riding()
+
+def run(platform_counts = (0, 25, 100, 400), ticks = 300):
+    ''' Times scenes with more and more platforms and prints a
+        table with the milliseconds per update. '''
+
+    print '%-10s%14s%10s' % ('platforms', 'update', 'riding')
+    for platforms in platform_counts:
+        time, riding = time_scene(platforms, ticks)
+        print '%-10d%11.3f ms%6d/%d' % (platforms, time, riding, platforms)
+
+if __name__ == '__main__':
+    run()
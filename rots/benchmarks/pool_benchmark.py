@@ -0,0 +1,43 @@
+''' Benchmark of physics_engine/world_pool.py: the throughput (world
+    ticks per second) of a batch of independent benchmark scenes with
+    more and more worker processes.
+
+    Run from the rots directory:
+        python -m benchmarks.pool_benchmark '''
+
+import multiprocessing
+import timeit
+
+from benchmarks.space_benchmark import Benchmark_scene
+from physics_engine.world_pool import Scene_description, World_pool
+
+def time_pool(worlds, processes, count = 100, ticks = 300):
+    ''' Returns the world ticks per second of 'worlds' scenes of
+        'count' objects in 'processes' processes. The time to
+        start the processes and build the scenes isn't counted. '''
+
+    descriptions = [Scene_description(Benchmark_scene, count, {}, seed = i)
+                    for i in range(worlds)]
+    with World_pool(descriptions, processes) as pool:
+        seconds = timeit.timeit(lambda: pool.run(ticks), number = 1)
+    return worlds * ticks / seconds
+
+def run(worlds = 16, count = 100, ticks = 300):
+    ''' Prints the throughput and speedup for 1, 2, 4... processes,
+        up to the number of cores. '''
+
+    cores = multiprocessing.cpu_count()
+    counts = [1]
+    while counts[-1] * 2 <= min(cores, worlds):
+        counts.append(counts[-1] * 2)
+
+    print '%d worlds of %d objects, %d ticks, %d cores' % (worlds, count, ticks, cores)
+    print '%-10s%18s%10s' % ('processes', 'world ticks/s', 'speedup')
+    single = None
+    for processes in counts:
+        throughput = time_pool(worlds, processes, count, ticks)
+        single = single or throughput
+        print '%-10d%18.1f%9.2fx' % (processes, throughput, throughput / single)
+
+if __name__ == '__main__':
+    run()
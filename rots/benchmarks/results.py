@@ -0,0 +1,90 @@
+''' Statistics and machine-readable results of the benchmarks, and the
+    comparison of two results that makes a benchmark a regression gate.
+
+    A result file is JSON: a dictionary with some information about the
+    run and 'scenes', a dictionary from scene name to the measurements
+    of the scene. A measurement with timings is a summary (see
+    summarize) in milliseconds. '''
+
+import json
+import sys
+
+# The summaries compared by default
+GATE_METRICS = ('p50', 'p90')
+
+def percentile(values, fraction):
+    ''' The value below which 'fraction' (0.0-1.0) of the values
+        lie, interpolated between the two closest values. '''
+
+    if not values:
+        raise ValueError('percentile of no values')
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def summarize(values):
+    ''' The mean, median, 90th and 99th percentile and maximum of
+        a list of values. '''
+
+    if not values:
+        return {'count': 0}
+
+    return {'count': len(values),
+            'mean': sum(values) / float(len(values)),
+            'p50': percentile(values, 0.5),
+            'p90': percentile(values, 0.9),
+            'p99': percentile(values, 0.99),
+            'max': max(values)}
+
+def write_results(results, file_name = None):
+    ''' Writes the results as JSON to 'file_name', or to
+        standard output if it is None or '-'. '''
+
+    if file_name in (None, '-'):
+        json.dump(results, sys.stdout, indent = 2, sort_keys = True)
+        sys.stdout.write('\n')
+    else:
+        with open(file_name, 'w') as json_file:
+            json.dump(results, json_file, indent = 2, sort_keys = True)
+
+def read_results(file_name):
+    with open(file_name) as json_file:
+        return json.load(json_file)
+
+def compare(baseline, results, tolerance = 0.1, timings = ('step_ms',),
+            metrics = GATE_METRICS):
+    ''' Compares results with a baseline, scene by scene.
+
+        Input:
+            * tolerance:
+                How much slower (as a fraction) a timing may
+                be than in the baseline.
+            * timings:
+                The summaries of the scenes to compare.
+            * metrics:
+                The values of the summaries to compare.
+
+        Output: A list of the regressions, as strings. Empty
+                if nothing got slower than the tolerance. '''
+
+    regressions = []
+    for scene, measurements in sorted(results['scenes'].items()):
+        old_measurements = baseline['scenes'].get(scene)
+        if old_measurements is None:
+            continue
+
+        for timing in timings:
+            new = measurements.get(timing, {})
+            old = old_measurements.get(timing, {})
+            for metric in metrics:
+                if metric not in new or not old.get(metric):
+                    continue
+                change = new[metric] / old[metric] - 1.0
+                if change > tolerance:
+                    regressions.append('%s %s %s: %.3f -> %.3f (+%.0f%%)' %
+                                       (scene, timing, metric, old[metric],
+                                        new[metric], change * 100.0))
+    return regressions
@@ -0,0 +1,208 @@
+''' Benchmark of physics.update_physics with the different
+    broadphase types of the collision spaces (see
+    physics_engine/spaces.py), on scenes of increasing size.
+
+    The scenes are made only of ODE bodies and geoms (no graphics):
+    a floor of static tiles with spheres and boxes dropped onto it.
+
+    Run from the rots directory:
+        python -m benchmarks.space_benchmark '''
+
+import random
+import timeit
+from math import sqrt
+
+import ode
+
+from physics_engine import physics, physics_materials
+from physics_engine.contacts import Contact_budget
+from physics_engine.profiler import Step_profiler
+from physics_engine.sleeping import Sleep_tracker
+from physics_engine.spaces import Space_config, create_spaces, create_root_space
+
+# The size of the floor tiles
+TILE_SIZE = 4.0
+
+class Physics_object(object):
+    ''' The parts of an object that the collision callbacks use. '''
+
+    def __init__(self, geom, body = None, friction = 1.0, bounce = 0.2):
+        self._geom = geom
+        self._body = body
+        self._physics_material = physics_materials.get_material(friction, bounce)
+        geom.object = self
+
+    def get_geom(self):
+        return self._geom
+
+    def get_body(self):
+        return self._body
+
+    def get_physics_material(self):
+        return self._physics_material
+
+    def sleep(self):
+        pass
+
+    def wake(self):
+        pass
+
+class Benchmark_player(object):
+    def __init__(self, shape):
+        self._shape = shape
+        self.colliding = False
+
+    def get_shape(self):
+        return self._shape
+
+class Benchmark_scene(object):
+    ''' A scene with 'count' dynamic objects (3/4 spheres and
+        1/4 boxes) above a square floor with about as many tiles.
+        Has the same getters as the Game object, as far as
+        update_physics needs them. '''
+
+    def __init__(self, count, space_configs, seed = 0):
+
+        rand = random.Random(seed)
+
+        self._world = ode.World()
+        self._world.setGravity((0, -9.81, 0))
+        self._world.setERP(0.8)
+        self._world.setCFM(1E-5)
+        self._world.setAutoDisableFlag(True)
+
+        self._spaces = create_spaces(space_configs)
+        self._root_space = create_root_space(self._spaces, physics.COLLISION_HANDLERS)
+        sphere_space, object_space, static_space = self._spaces[:3]
+
+        self._contact_group = ode.JointGroup()
+        self._interactive_contacts = set()
+        self._profiler = Step_profiler(enabled = False)
+        self._sleep_tracker = Sleep_tracker()
+        self._contact_budget = Contact_budget()
+        self._dt = 1 / 60.0
+        self._objects = []
+
+        # The floor
+        tiles = max(int(sqrt(count)), 1)
+        self._half_size = tiles * TILE_SIZE / 2.0
+        for i in range(tiles):
+            for j in range(tiles):
+                geom = ode.GeomBox(static_space, (TILE_SIZE, 0.2, TILE_SIZE))
+                geom.setPosition((-self._half_size + (i + 0.5) * TILE_SIZE, 0.0,
+                                  -self._half_size + (j + 0.5) * TILE_SIZE))
+                self._objects.append(Physics_object(geom))
+
+        # The dynamic objects
+        for i in range(count):
+            pos = (rand.uniform(-self._half_size, self._half_size),
+                   rand.uniform(0.5, 5.0),
+                   rand.uniform(-self._half_size, self._half_size))
+            body = ode.Body(self._world)
+            mass = ode.Mass()
+            if i % 4:
+                radius = rand.uniform(0.3, 1.0)
+                mass.setSphere(1, radius)
+                geom = ode.GeomSphere(sphere_space, radius)
+            else:
+                size = rand.uniform(0.5, 2.0)
+                mass.setBox(1, size, size, size)
+                geom = ode.GeomBox(object_space, (size, size, size))
+            body.setMass(mass)
+            body.setPosition(pos)
+            geom.setBody(body)
+            self._objects.append(Physics_object(geom, body))
+
+        # The first sphere is the player
+        self._player = Benchmark_player(self._objects[tiles * tiles + 1])
+
+    def get_half_size(self):
+        return self._half_size
+
+    def get_world(self):
+        return self._world
+
+    def get_root_space(self):
+        return self._root_space
+
+    def get_sphere_space(self):
+        return self._spaces[0]
+
+    def get_object_space(self):
+        return self._spaces[1]
+
+    def get_static_space(self):
+        return self._spaces[2]
+
+    def get_power_up_space(self):
+        return self._spaces[3]
+
+    def get_interactive_object_space(self):
+        return self._spaces[4]
+
+    def get_moving_scene_space(self):
+        return self._spaces[5]
+
+    def get_contact_group(self):
+        return self._contact_group
+
+    def get_dt(self):
+        return self._dt
+
+    def get_player(self):
+        return self._player
+
+    def get_profiler(self):
+        return self._profiler
+
+    def get_sleep_tracker(self):
+        return self._sleep_tracker
+
+    def get_contact_budget(self):
+        return self._contact_budget
+
+    def get_interactive_contacts(self):
+        return self._interactive_contacts
+
+    def set_interactive_contacts(self, contacts):
+        self._interactive_contacts = contacts
+
+def space_options(half_size):
+    ''' The broadphase configurations to compare, for a floor
+        reaching +-half_size along x and z. '''
+
+    quadtree = Space_config.quadtree((0.0, 0.0, 0.0),
+                                     (half_size * 2.0, 20.0, half_size * 2.0), 5)
+    return [('simple', Space_config.simple()),
+            ('hash', Space_config.hash()),
+            ('hash(-2, 3)', Space_config.hash(-2, 3)),
+            ('quadtree(5)', quadtree)]
+
+def time_scene(count, config, ticks = 60, warm_up = 30):
+    ''' Returns the mean time of update_physics in milliseconds, with
+        the sphere, object and static spaces using 'config'. '''
+
+    configs = {'sphere': config, 'object': config, 'static': config}
+    scene = Benchmark_scene(count, configs)
+
+    # Let the objects fall and settle a bit first
+    for i in range(warm_up):
+        physics.update_physics(scene)
+
+    seconds = timeit.timeit(lambda: physics.update_physics(scene), number = ticks)
+    return seconds / ticks * 1000.0
+
+def run(counts = (25, 50, 100, 200, 400), ticks = 60):
+    ''' Times all broadphase options on all scene sizes and
+        prints a table with the milliseconds per update. '''
+
+    names = [name for name, config in space_options(1.0)]
+    print '%-8s' % 'objects' + ''.join('%14s' % name for name in names)
+    for count in counts:
+        half_size = max(int(sqrt(count)), 1) * TILE_SIZE / 2.0
+        times = [time_scene(count, config, ticks)
+                    for name, config in space_options(half_size)]
+        print '%-8d' % count + ''.join('%11.3f ms' % t for t in times)
+
+if __name__ == '__main__':
+    run()
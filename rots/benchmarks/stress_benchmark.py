@@ -0,0 +1,299 @@
+''' Stress benchmark of whole scenes: procedurally generated scenes of
+    real game objects (spheres, boxes, surfaces, buttons and moving
+    platforms) in a Game object, stepped headless for a fixed number of
+    ticks. Records for each scene the time to build it, percentiles of
+    the time of update_physics and of the spatial index update (and of
+    render.render with --render), the net number of objects allocated
+    per tick and the dropped contacts, and writes them as JSON (see
+    results.py).
+
+    With --baseline the results are compared with an earlier run, and
+    the exit status is 1 if a scene got slower than the tolerance, so
+    the benchmark can be used as a regression gate:
+
+        python -m benchmarks.stress_benchmark --output baseline.json
+        (change something)
+        python -m benchmarks.stress_benchmark --baseline baseline.json
+
+    A broadphase can be tried without changing the code with --space,
+    which takes the same NAME=TYPE values as rots.py.
+
+    Run from the rots directory. '''
+
+import argparse
+import gc
+import platform
+import random
+import sys
+import timeit
+from math import sqrt, cos, sin, pi
+
+import pygame
+import ode
+
+import games
+import players
+import rots
+import scenes
+from benchmarks import results
+from graphics import cameras, init_graphics, render, views
+from math_classes.vectors import Vector
+from objects import shapes, interactive_objects, moving_scene
+from physics_engine import physics
+from physics_engine.spaces import create_spaces, SPACE_NAMES
+
+# The procedural scenes: the number of spheres, boxes, surfaces
+# (the floor included), buttons and moving platforms
+SCENES = {'small': {'spheres': 25, 'boxes': 10, 'surfaces': 4,
+                    'buttons': 2, 'platforms': 2},
+          'medium': {'spheres': 100, 'boxes': 50, 'surfaces': 16,
+                     'buttons': 8, 'platforms': 8},
+          'large': {'spheres': 400, 'boxes': 200, 'surfaces': 64,
+                    'buttons': 32, 'platforms': 32}}
+
+# The scene of the game, built with scenes.init_scene
+GAME_SCENE = 'scene_1'
+
+def build_scene(view, spheres = 0, boxes = 0, surfaces = 1, buttons = 0,
+                platforms = 0, seed = 0, space_configs = None):
+    ''' Builds a scene with the given number of objects at random
+        positions above a floor, with a sphere for the player, and
+        returns the Game object. The floor is the first surface, the
+        rest are slopes. '''
+
+    rand = random.Random(seed)
+
+    world = ode.World()
+    world.setGravity((0, -9.81, 0))
+    world.setERP(0.8)
+    world.setCFM(1E-5)
+    world.setAutoDisableFlag(True)
+
+    spaces = create_spaces(dict(scenes.SCENE_1_SPACES, **(space_configs or {})))
+    sphere_space, object_space, static_space, power_up_space, \
+            interactive_object_space, moving_scene_space = spaces
+
+    # Room for all objects, about four square units each
+    half_size = max(sqrt(spheres + boxes + platforms) * 2.0, 10.0)
+
+    def random_pos(low, high):
+        return Vector((rand.uniform(-half_size, half_size), rand.uniform(low, high),
+                       rand.uniform(-half_size, half_size)))
+
+    object_list = []
+
+    floor = shapes.Surface(world, static_space, pos = Vector((0.0, 0.0, 0.0)),
+                           normal = Vector((0.0, 1.0, 0.0)),
+                           forward = Vector((1.0, 0.0, 0.0)),
+                           length = half_size * 2, width = half_size * 2,
+                           subdivision_size = half_size)
+    object_list.append(floor)
+
+    for i in range(surfaces - 1):
+        angle = rand.uniform(0.1, 0.4) * pi
+        slope = shapes.Surface(world, static_space, pos = random_pos(0.5, 2.0),
+                               normal = Vector((0.0, cos(angle), sin(angle))),
+                               forward = Vector((1.0, 0.0, 0.0)),
+                               length = 4.0, width = 4.0, subdivision_size = 4)
+        object_list.append(slope)
+
+    shape = shapes.Sphere(world, sphere_space, pos = Vector((0.0, 2.0, 0.0)), radius = 1.0)
+    player = players.Player(shape)
+    object_list.append(shape)
+
+    for i in range(spheres):
+        object_list.append(shapes.Sphere(world, sphere_space, pos = random_pos(2.0, 10.0),
+                                         radius = rand.uniform(0.3, 1.0)))
+
+    for i in range(boxes):
+        object_list.append(shapes.Box(world, object_space, pos = random_pos(2.0, 10.0),
+                                      x_size = rand.uniform(0.5, 2.0),
+                                      y_size = rand.uniform(0.5, 2.0),
+                                      z_size = rand.uniform(0.5, 2.0)))
+
+    for i in range(buttons):
+        object_list.append(interactive_objects.Button(interactive_object_space,
+                                                      pos = random_pos(0.05, 0.05),
+                                                      normal = Vector((0.0, 1.0, 0.0)),
+                                                      forward = Vector((1.0, 0.0, 0.0))))
+
+    for i in range(platforms):
+        low = random_pos(1.0, 1.0)
+        high = low + Vector((0.0, rand.uniform(2.0, 8.0), 0.0))
+        object_list.append(moving_scene.Moving_platform(world, moving_scene_space,
+                                                        width = 3, length = 3,
+                                                        move_time = rand.uniform(2.0, 8.0),
+                                                        turning_points = (low, high)))
+
+    return games.Game(world, spaces, player, object_list, [], cameras.Camera(),
+                      pygame.time.Clock(), ode.JointGroup(), 60, view)
+
+def time_ticks(game, ticks, render_scene = False):
+    ''' Steps the scene 'ticks' times and returns the time of each
+        phase of each tick, in milliseconds (phase -> list). '''
+
+    timer = timeit.default_timer
+    times = {'step_ms': [], 'spatial_index_ms': []}
+    if render_scene:
+        times['render_ms'] = []
+
+    for i in range(ticks):
+        start = timer()
+        physics.update_physics(game)
+        stepped = timer()
+        game.update_spatial_index()
+        indexed = timer()
+        times['step_ms'].append((stepped - start) * 1000.0)
+        times['spatial_index_ms'].append((indexed - stepped) * 1000.0)
+
+        if render_scene:
+            render.render(game)
+            times['render_ms'].append((timer() - indexed) * 1000.0)
+
+    return times
+
+def count_allocations(game, ticks):
+    ''' Steps the scene 'ticks' times with the garbage collector
+        off and returns the net number of objects tracked by the
+        collector (containers: lists, instances, wrappers...) that
+        each tick allocated. '''
+
+    counts = []
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(ticks):
+            before = gc.get_count()[0]
+            physics.update_physics(game)
+            game.update_spatial_index()
+            counts.append(gc.get_count()[0] - before)
+    finally:
+        gc.enable()
+        gc.collect()
+    return counts
+
+def run_scene(config, view, ticks, warm_up = 60, allocation_ticks = 60,
+              seed = 0, space_configs = None, render_scene = False):
+    ''' Builds and runs a scene, 'config' is a dictionary of the
+        keyword arguments of build_scene, or None for the game's
+        own scene. Returns the measurements of the scene. '''
+
+    start = timeit.default_timer()
+    if config is None:
+        game = scenes.init_scene((view, 'stars-5.jpg'), space_configs)
+    else:
+        game = build_scene(view, seed = seed, space_configs = space_configs, **config)
+    build_ms = (timeit.default_timer() - start) * 1000.0
+
+    # Let the objects fall and settle a bit first
+    for i in range(warm_up):
+        physics.update_physics(game)
+        game.update_spatial_index()
+
+    dropped = game.get_contact_budget().get_total_dropped()
+    times = time_ticks(game, ticks, render_scene)
+    dropped = game.get_contact_budget().get_total_dropped() - dropped
+    allocations = count_allocations(game, allocation_ticks)
+    tracker = game.get_sleep_tracker()
+
+    measurements = dict((phase, results.summarize(values))
+                        for phase, values in times.items())
+    measurements.update({'config': config or {},
+                         'objects': len(game.get_object_list()),
+                         'build_ms': build_ms,
+                         'allocations_per_tick': results.summarize(allocations),
+                         'dropped_contacts': dropped,
+                         'awake': len(tracker.get_awake()),
+                         'sleeping': len(tracker.get_sleeping())})
+    return measurements
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description = 'Stress benchmark of whole scenes')
+    parser.add_argument('scenes', nargs = '*', default = ['small', 'medium', 'large'],
+                        help = 'the scenes to run: %s or %s (default: %%(default)s)'
+                               % (', '.join(sorted(SCENES)), GAME_SCENE))
+    parser.add_argument('--ticks', type = int, default = 300,
+                        help = 'the number of timed ticks (default: %(default)s)')
+    parser.add_argument('--warm-up', type = int, default = 60,
+                        help = 'the number of ticks before the timing '
+                               '(default: %(default)s)')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--spheres', type = int, help = 'override the number of spheres')
+    parser.add_argument('--boxes', type = int, help = 'override the number of boxes')
+    parser.add_argument('--surfaces', type = int, help = 'override the number of surfaces')
+    parser.add_argument('--buttons', type = int, help = 'override the number of buttons')
+    parser.add_argument('--platforms', type = int,
+                        help = 'override the number of moving platforms')
+    parser.add_argument('--space', action = 'append', default = [],
+                        metavar = 'NAME=TYPE',
+                        help = 'the broadphase of a collision space, as for '
+                               'rots.py, e.g. sphere=hash:-2:2 (spaces: %s)'
+                               % ', '.join(SPACE_NAMES))
+    parser.add_argument('--render', action = 'store_true',
+                        help = 'open a window and time render.render as well')
+    parser.add_argument('--output', metavar = 'FILE', default = '-',
+                        help = 'the JSON file to write (default: standard output)')
+    parser.add_argument('--baseline', metavar = 'FILE',
+                        help = 'compare with the results in FILE, exit with '
+                               'status 1 if a scene got slower')
+    parser.add_argument('--tolerance', type = float, default = 0.1,
+                        help = 'how much slower (as a fraction) the step time '
+                               'percentiles may get (default: %(default)s)')
+    options = parser.parse_args(argv)
+
+    try:
+        options.space_configs = rots.parse_space_configs(options.space)
+    except ValueError as message:
+        parser.error('--space: %s' % message)
+    return options
+
+def main(argv = None):
+    options = parse_arguments(argv)
+
+    overrides = dict((key, getattr(options, key))
+                     for key in ('spheres', 'boxes', 'surfaces', 'buttons', 'platforms')
+                        if getattr(options, key) is not None)
+
+    if options.render:
+        view = init_graphics.init_window('Stress benchmark', HAVE_FULLSCREEN = False)
+    else:
+        # The view is only used for its size, it is never set up
+        view = views.View(640, 480, 45.0)
+
+    scene_results = {}
+    for name in options.scenes:
+        if name == GAME_SCENE:
+            config = None
+        elif name in SCENES:
+            config = dict(SCENES[name], **overrides)
+        else:
+            raise ValueError("Unknown scene '%s', use one of %s or %s"
+                                % (name, ', '.join(sorted(SCENES)), GAME_SCENE))
+
+        scene_results[name] = run_scene(config, view, options.ticks, options.warm_up,
+                                        seed = options.seed,
+                                        space_configs = options.space_configs,
+                                        render_scene = options.render)
+        sys.stderr.write('%-8s step p50 %.3f ms, p90 %.3f ms\n' %
+                            (name, scene_results[name]['step_ms']['p50'],
+                             scene_results[name]['step_ms']['p90']))
+
+    output = {'python': platform.python_version(),
+              'ode': getattr(ode, '__version__', None),
+              'ticks': options.ticks,
+              'warm_up': options.warm_up,
+              'seed': options.seed,
+              'space': options.space,
+              'scenes': scene_results}
+    results.write_results(output, options.output)
+
+    if options.baseline:
+        regressions = results.compare(results.read_results(options.baseline),
+                                      output, options.tolerance)
+        for regression in regressions:
+            sys.stderr.write('Regression: %s\n' % regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+''' Microbenchmark comparing Vector and Vector3 on the operations
+    used in the physics and rendering code every frame.
+
+    Run from the rots directory:
+        python -m benchmarks.vector_benchmark '''
+
+import timeit
+
+SETUP = '''
+from math_classes.vectors import Vector, Vector3
+a = %(cls)s((1.0, 2.0, 3.0))
+b = %(cls)s((-0.5, 0.25, 4.0))
+'''
+
+# (name, statement) pairs, the statements are run on both classes
+CASES = [('add', 'a + b'),
+         ('sub', 'a - b'),
+         ('mul', 'a * 0.5'),
+         ('neg', '-a'),
+         ('dot', 'a.dot(b)'),
+         ('cross', 'a.cross(b)'),
+         ('norm', 'a.norm()'),
+         ('normalize', 'a.normalize()'),
+         ('create', '%(cls)s((1.0, 2.0, 3.0))'),
+         ('contact', 'n = %(cls)s((0.0, 1.0, 0.0)); '
+                     'd = a.cross(n).normalize(); '
+                     'b.dot(d); b.dot(n.cross(d))')]
+
+def run(number = 100000, repeat = 3):
+    ''' Times all cases for both classes and prints a table
+        with the time per call in microseconds. '''
+
+    print '%-12s %12s %12s %8s' % ('operation', 'Vector [us]',
+                                   'Vector3 [us]', 'speedup')
+    for name, statement in CASES:
+        times = []
+        for cls in ('Vector', 'Vector3'):
+            timer = timeit.Timer(statement % {'cls': cls},
+                                 SETUP % {'cls': cls})
+            times.append(min(timer.repeat(repeat, number)) / number * 1e6)
+        print '%-12s %12.3f %12.3f %7.1fx' % (name, times[0], times[1],
+                                              times[0] / times[1])
+
+if __name__ == '__main__':
+    run()
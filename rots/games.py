@@ -2,8 +2,11 @@ import pygame
 from pygame.locals import *
 
 import players
-from graphics import lights
-from math_classes.vectors import Vector
+from graphics import culling, lights, textures
+from math_classes import spatial
+from math_classes.vectors import Vector3
+from physics_engine import contacts, physics, profiler, sleeping, timestep
+from physics_engine.spaces import create_root_space
 from objects import shapes
 from objects.text import TextBox
 
@@ -14,7 +17,7 @@ class Game():
     ''' A class containing all the objects in the game '''
     def __init__(self, world, spaces, player, 
                 object_list, light_list, camera, clock, 
-                contact_group, fps, view, debug_state = 0):
+                contact_group, fps, view, debug_state = 0, tick_rate = None):
         
         sphere_space, object_space, static_space, power_up_space, \
                 interactive_object_space, moving_scene_space = spaces
@@ -26,6 +29,9 @@ class Game():
         self._power_up_space = power_up_space
         self._interactive_object_space = interactive_object_space
         self._moving_scene_space = moving_scene_space
+        # All the spaces are in a root space, which finds the
+        # contacts between them in one pass (see physics.py)
+        self._root_space = create_root_space(spaces, physics.COLLISION_HANDLERS)
         self._player = player
         self._object_list = object_list
         self._light_list = light_list
@@ -33,13 +39,23 @@ class Game():
         self._clock = clock
         self._contact_group = contact_group
         self._fps = fps
-        self._dt = 1/float(fps)
+        # The physics runs at its own, fixed rate (by default the
+        # same as the frame rate), see physics_engine/timestep.py
+        self._tick_rate = tick_rate or fps
+        self._dt = 1/float(self._tick_rate)
+        self._timestep = timestep.Fixed_timestep(self._dt)
+        self._interpolator = timestep.State_interpolator()
         self._view = view
         self._debug_state = debug_state
 
         self._keys_pressed = None
         self._keys_pressed_last_frame = None
 
+        # The player input of the frames in which no physics
+        # step was run, applied in the next step
+        self._pending_direction = Vector3()
+        self._pending_jump = False
+
         self._constants = {}
 
         # TODO: This should describe the game object in
@@ -58,6 +74,7 @@ class Game():
         # Performance
         self._debug_fps = TextBox('test.ttf', 14, 100, 150, [1,0,0], enabled = False)
         self._debug_time_used = TextBox('test.ttf', 14, 100, 100, [1,0,0], enabled = False)
+        self._debug_ticks = TextBox('test.ttf', 14, 100, 200, [1,0,0], enabled = False)
         
         # Player properties
         self._debug_player_pos = TextBox('test.ttf', 14, 100, 350, [1,0,0], enabled = False)
@@ -66,10 +83,41 @@ class Game():
 
         # Misc
         self._debug_object_count = TextBox('test.ttf', 14, 100, 450, [1,0,0], enabled = False)
+        self._debug_culling = TextBox('test.ttf', 14, 100, 500, [1,0,0], enabled = False)
+        self._debug_textures = TextBox('test.ttf', 14, 100, 400, [1,0,0], enabled = False)
+        self._debug_physics = TextBox('test.ttf', 14, 500, 500, [1,0,0], enabled = False)
+
+
+        self._debug_list = [self._debug_fps, self._debug_time_used, self._debug_ticks,
+                            self._debug_player_pos, self._debug_player_vel,
+                            self._debug_player_colliding, self._debug_object_count, self._debug_culling,
+                            self._debug_textures, self._debug_physics]
+
+        # The interactive objects touched by the player
+        # in the last physics step
+        self._interactive_contacts = set()
+
+        # The bodies that are awake, and the cached transforms
+        # of the sleeping ones
+        self._sleep_tracker = sleeping.Sleep_tracker()
+
+        # Caps the contact joints of each physics step
+        self._contact_budget = contacts.Contact_budget()
+
+        # Times the phases of the physics step, enabled together
+        # with the debug screen or for the whole game (--profile)
+        self._profiler = profiler.Step_profiler(enabled = bool(debug_state))
+        self._profiling = False
 
+        # Picks out the objects that the camera can see
+        self._culler = culling.Frustum_culler()
 
-        self._debug_list = [self._debug_fps, self._debug_time_used, self._debug_player_pos, self._debug_player_vel,
-                            self._debug_player_colliding, self._debug_object_count]
+        # Spatial index over the objects, the static ones are
+        # put in a BVH once and for all
+        self._spatial_index = spatial.Spatial_index()
+        self._spatial_index.build([static_space.getGeom(i).object
+                                   for i in range(static_space.getNumGeoms())])
+        self._spatial_index.update(self._object_list)
 
         self._object_list += self._debug_list
 
@@ -81,6 +129,7 @@ class Game():
             and 2 means 'both debug screen and drawn AABBs' '''
 
         self._debug_state = (self._debug_state + 1) % 3
+        self._profiler.set_enabled(bool(self._debug_state) or self._profiling)
         if self._debug_state == 0 or self._debug_state == 1:
             for item in self._debug_list:
                 item.toggle()
@@ -93,6 +142,8 @@ class Game():
         # Performance
         self._debug_fps.set_string("FPS: %0.2f" % self._clock.get_fps())
         self._debug_time_used.set_string("Time used last frame [ms]: %d" % self._clock.get_rawtime())
+        self._debug_ticks.set_string("Physics: %d ticks/s, dropped %0.2f s" % \
+                                        (self._tick_rate, self._timestep.get_dropped_time()))
         
         # Player properties
         self._debug_player_pos.set_string("Player pos: [%0.2f, %0.2f, %0.2f]" % self._player.get_pos().value)
@@ -100,8 +151,17 @@ class Game():
         self._debug_player_colliding.set_string("Player colliding: %s" % self._player.colliding)
 
         # Misc
-        self._debug_object_count.set_string("Number of objects: %d" % (len(self._object_list) - \
-                                                                    len(self._debug_list)))
+        self._debug_object_count.set_string("Number of objects: %d (awake: %d, sleeping: %d)" % \
+                                            (len(self._object_list) - len(self._debug_list),
+                                             len(self._sleep_tracker.get_awake()),
+                                             len(self._sleep_tracker.get_sleeping())))
+        self._debug_culling.set_string("Objects drawn: %d, culled: %d" % \
+                                        (self._culler.get_visible_count() - len(self._debug_list),
+                                         self._culler.get_culled_count()))
+        count, users, unused, resident = textures.get_statistics()
+        self._debug_textures.set_string("Textures: %d (unused: %d), resident: %0.1f MB" % \
+                                        (count, unused, resident / (1024.0 * 1024.0)))
+        self._debug_physics.set_string(self._profiler.format_histogram())
 
     def take_input(self):
         ''' Take input from the keyboard, mouse, etc., and translates
@@ -174,9 +234,9 @@ class Game():
         xDir = self.dir([(K_d, K_a), (K_RIGHT, K_LEFT)])
         zDir = self.dir([(K_w, K_s), (K_UP, K_DOWN)])
 
-        direction = Vector([xDir, 0.0, zDir]).normalize()
+        direction = Vector3((xDir, 0.0, zDir)).normalize()
         if not direction:
-            direction = Vector()
+            direction = Vector3()
 
         # Mouse movement
         mouse_movement = pygame.mouse.get_rel()
@@ -217,6 +277,9 @@ class Game():
     def get_world(self):
         return self._world
 
+    def get_root_space(self):
+        return self._root_space
+
     def get_sphere_space(self):
         return self._sphere_space
 
@@ -259,15 +322,83 @@ class Game():
     def get_fps(self):
         return self._fps
 
+    def get_tick_rate(self):
+        return self._tick_rate
+
     def get_dt(self):
         return self._dt
 
+    def get_timestep(self):
+        return self._timestep
+
+    def get_interpolator(self):
+        return self._interpolator
+
+    def add_input(self, direction, jump):
+        ''' Keeps the movement and jump of a frame until a physics
+            step is run. A jump is kept until then, the direction
+            is replaced by the next frame's if that one moves. '''
+
+        if direction.square_norm() > 0.0:
+            self._pending_direction = direction
+        self._pending_jump = self._pending_jump or jump
+
+    def pop_input(self):
+        ''' Returns the (direction, jump) to apply in a physics
+            step and clears them. '''
+
+        direction, jump = self._pending_direction, self._pending_jump
+        self._pending_direction = Vector3()
+        self._pending_jump = False
+        return direction, jump
+
     def get_view(self):
         return self._view
 
     def get_debug_state(self):
         return self._debug_state
 
+    def get_sleep_tracker(self):
+        return self._sleep_tracker
+
+    def get_contact_budget(self):
+        return self._contact_budget
+
+    def get_profiler(self):
+        return self._profiler
+
+    def set_profiling(self, profiling):
+        ''' Keeps the profiler on also when the debug screen is
+            closed, e.g. to write the timings when the game ends. '''
+        self._profiling = profiling
+        self._profiler.set_enabled(profiling or bool(self._debug_state))
+
+    def get_culler(self):
+        return self._culler
+
+    def get_spatial_index(self):
+        return self._spatial_index
+
+    def get_interactive_contacts(self):
+        return self._interactive_contacts
+
+    def save_physics_state(self):
+        ''' Saves the positions of the moving objects, call
+            it before each physics step. Used to draw them
+            between the last two steps. '''
+        self._interpolator.save(self._sleep_tracker.get_moving())
+
+    def get_draw_pos(self, item):
+        ''' Where the item is drawn: between its positions
+            of the last two physics steps. '''
+        return self._interpolator.get_pos(item, self._timestep.get_alpha())
+
+    def update_spatial_index(self):
+        ''' Moves the objects that may have moved since the last
+            update to their current positions in the spatial index
+            (sleeping objects stay where they are). '''
+        self._spatial_index.update(self._object_list, self._sleep_tracker.pop_moved())
+
     ### Setters
 
     def add_constant(self, key, value):
@@ -275,11 +406,19 @@ class Game():
 
     def set_fps(self, fps):
         self._fps = fps
-        self._dt = 1/float(fps)
+
+    def set_tick_rate(self, tick_rate):
+        ''' Sets the number of physics steps per second. '''
+        self._tick_rate = tick_rate
+        self._dt = 1/float(tick_rate)
+        self._timestep.set_dt(self._dt)
 
     def set_view(self, view):
         self._view = view
 
+    def set_interactive_contacts(self, contacts):
+        self._interactive_contacts = contacts
+
     def dir(self, key_pairs):
         ''' Outputs the direction when given pairs 
         of movement keys (pygame constants) of the form: 
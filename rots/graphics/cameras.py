@@ -3,8 +3,8 @@ from pygame.locals import *
 
 from OpenGL.GLU import *
 
-from math_classes.vectors import Vector
-from math import cos, sin, pi, copysign
+from math_classes.vectors import Vector3
+from math import cos, sin, pi, copysign, sqrt
 import players
 
 class Camera:
@@ -38,9 +38,12 @@ class Camera:
         self._y_angle = 0.0
 
         # The up vector for the camera
-        self._up = Vector([0.0, 1.0, 0.0])
+        self._up = Vector3((0.0, 1.0, 0.0))
         self._new_up = None
-        self._direction = None
+
+        # The direction from the camera to the player, projected
+        # on the xz-plane (the camera starts behind the player)
+        self._direction = Vector3((0.0, 0.0, -1.0))
 
         self._focus = (0.0, 0.0, 0.0)
 
@@ -67,7 +70,7 @@ class Camera:
                   focus[0], focus[1], focus[2],
                   up[0], up[1], up[2])
 
-    def _move(self, player, mouse_movement, camera_mode):
+    def _move(self, player, mouse_movement, camera_mode, pos):
         ''' Sets the position and orientation of
         the camera according to the position of
         the player and the movement of the mouse.
@@ -83,9 +86,10 @@ class Camera:
                 An integer describing the camera mode to
                 be used (how the camera should be set up)
                     0 = third person
-                    1 = first person '''
+                    1 = first person
+            * pos:
+                The position to follow, as a tuple '''
         
-        pos = player.get_pos().value
         mouse_x, mouse_y = mouse_movement
 
         if camera_mode == 0:
@@ -101,12 +105,11 @@ class Camera:
             y_dist = self._y_pos - pos[1]
             y_diff = self._y_dist - y_dist
 
-            direction = Vector((pos[0] - self._x_pos,
-                                pos[1] - self._y_pos,
-                                pos[2] - self._z_pos))
-            direction = direction.projected(Vector((1.0, 0.0, 0.0)),
-                                            Vector((0.0, 0.0, 1.0)))
-            z_dist = direction.norm()
+            # Horizontal distance to the player (the direction
+            # projected on the xz-plane)
+            dx = pos[0] - self._x_pos
+            dz = pos[2] - self._z_pos
+            z_dist = sqrt(dx * dx + dz * dz)
             z_diff = self._z_dist - z_dist
 
             if abs(y_diff) > 0.01 and not player.is_jumping():
@@ -145,7 +148,8 @@ class Camera:
             z_foc = pos[2] - cos(self._y_angle) * cos(self._x_angle)
             self._focus = (x_foc, y_foc, z_foc)
 
-    def update(self, player, mouse_movement, scroll_direction, camera_mode):
+    def update(self, player, mouse_movement, scroll_direction, camera_mode,
+               pos = None):
         ''' Updates the camera object: Calls self._move()
         to set the position and orientation of the camera,
         and then calculates a vector pointing from the
@@ -169,6 +173,11 @@ class Camera:
                 be used (how the camera should be set up)
                     0 = third person
                     1 = first person
+            * pos:
+                The position of the player to follow, as a
+                tuple. The current position of the player if
+                None; the game passes where the player is
+                drawn (between the last two physics steps).
 
         Output: 
             * direction: 
@@ -176,7 +185,8 @@ class Camera:
                 camera to the player, projected
                 on the xz-plane and normalized.'''
         
-        pos = player.get_pos().value
+        if pos is None:
+            pos = player.get_pos().value
 
         # Zoom
         self._y_dist += self._y_dist * scroll_direction * self._zoom_sensitivity
@@ -193,20 +203,18 @@ class Camera:
         elif abs(self._z_dist) >= self._z_dist_limits[1]:
             self._z_dist = self._z_dist_limits[1]
         
-        self._move(player, mouse_movement, camera_mode)
+        self._move(player, mouse_movement, camera_mode, pos)
 
-        self._direction = Vector([self._focus[0] - self._x_pos,
-                                    self._focus[1] - self._y_pos,
-                                    self._focus[2] - self._z_pos])
-        self._direction = self._direction.projected(Vector([1.0, 0.0, 0.0]),
-                                        Vector([0.0, 0.0, 1.0]))
+        # The direction projected on the xz-plane
+        self._direction = Vector3((self._focus[0] - self._x_pos,
+                                   0.0,
+                                   self._focus[2] - self._z_pos))
         self._direction = self._direction.normalize()
 
         if self._flipping:
 
             rot_vec = self._up.cross(self._flip_axis) * 0.1
-            self._up += rot_vec
-            self._up = self._up.normalize()
+            self._up = (self._up + rot_vec).normalize()
 
             if (self._up - self._new_up).norm() < 0.1:
                 self._up = self._new_up
@@ -235,3 +243,12 @@ class Camera:
 
     def get_up(self):
         return self._up
+
+    def get_direction(self):
+        return self._direction
+
+    def get_pos(self):
+        return Vector3((self._x_pos, self._y_pos, self._z_pos))
+
+    def get_focus(self):
+        return self._focus
@@ -0,0 +1,20 @@
+''' Keeps track of whether there is a renderer (an OpenGL context)
+    or not. Without one (headless mode, e.g. when running the
+    simulation on a machine without a display) the objects are
+    created without any render resources: no display lists, meshes
+    or textures. The resources are created when they are first
+    needed for drawing, which only happens once there is a renderer. '''
+
+_has_renderer = False
+
+def set_renderer(has_renderer):
+    ''' Called by init_graphics.init_window when the OpenGL
+        context has been created. '''
+
+    global _has_renderer
+    _has_renderer = has_renderer
+
+def has_renderer():
+    ''' True if there is an OpenGL context to create
+        render resources in. '''
+    return _has_renderer
@@ -0,0 +1,176 @@
+''' View-frustum culling. Before the scene is drawn, the AABB of
+    every object is tested against the six planes of the camera's
+    view frustum, and only the objects that can be seen are drawn.
+    The AABBs of all objects are tested at once, with NumPy. '''
+
+import numpy as np
+
+from math_classes import batches
+from math_classes.matrices import Matrix4
+
+class Frustum(object):
+    ''' The view frustum, described by six planes (left, right,
+        bottom, top, near, far) on the form (a, b, c, d) where
+        (a, b, c) is the unit normal pointing into the frustum.
+        A point p is inside a plane if a*x + b*y + c*z + d >= 0. '''
+
+    def __init__(self, planes):
+        self.planes = np.asarray(planes, dtype = np.float64).reshape(6, 4)
+        self._AABB = None
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        ''' Extracts the planes from a combined projection and
+            view matrix (a Matrix4, projection * view). '''
+
+        m = matrix.rows().astype(np.float64)
+        planes = np.array((m[3] + m[0], m[3] - m[0],
+                           m[3] + m[1], m[3] - m[1],
+                           m[3] + m[2], m[3] - m[2]))
+        planes /= np.sqrt((planes[:, :3] ** 2).sum(axis = 1))[:, np.newaxis]
+        return cls(planes)
+
+    @classmethod
+    def from_view(cls, view, camera):
+        ''' Creates the frustum seen by 'camera' (a cameras.Camera),
+            with the projection given by 'view' (a views.View). '''
+
+        projection = Matrix4.perspective(view.get_aspect_angle(),
+                                         view.get_ratio(),
+                                         view.get_near(), view.get_far())
+        look_at = Matrix4.look_at(camera.get_pos(), camera.get_focus(),
+                                  camera.get_up())
+        return cls.from_matrix(projection * look_at)
+
+    def contains_point(self, point):
+        ''' True if the point is inside the frustum. '''
+        distances = np.dot(self.planes[:, :3], point) + self.planes[:, 3]
+        return bool((distances >= 0.0).all())
+
+    def get_AABB(self):
+        ''' The AABB of the frustum on ODE form: the bounds of its
+            eight corners, where three of the planes meet. Infinite
+            if the planes don't make a closed frustum. '''
+
+        if self._AABB is None:
+            planes = self.planes
+            systems = np.array([planes[[x, y, z]] for x in (0, 1)
+                                                  for y in (2, 3)
+                                                  for z in (4, 5)])
+            try:
+                corners = np.linalg.solve(systems[:, :, :3],
+                                          -systems[:, :, 3:])[:, :, 0]
+            except np.linalg.LinAlgError:
+                inf = float('inf')
+                self._AABB = (-inf, inf, -inf, inf, -inf, inf)
+            else:
+                mins = corners.min(axis = 0)
+                maxs = corners.max(axis = 0)
+                self._AABB = (mins[0], maxs[0], mins[1], maxs[1], mins[2], maxs[2])
+        return self._AABB
+
+    def AABBs_visible(self, AABBs):
+        ''' Tests N AABBs on ODE form, an (N, 6) array of
+            (minx, maxx, miny, maxy, minz, maxz), against the
+            frustum. Returns an (N,) bool array, False for the
+            AABBs that are completely outside of one of the planes.
+
+            The test is conservative: some AABBs close to the
+            corners of the frustum are reported as visible
+            even though they are not. AABBs that aren't finite
+            (e.g. of infinite planes) are always visible. '''
+
+        AABBs = np.asarray(AABBs, dtype = np.float64).reshape(-1, 6)
+        finite = np.isfinite(AABBs).all(axis = 1)
+        AABBs = np.where(finite[:, np.newaxis], AABBs, 0.0)
+
+        mins = AABBs[:, 0::2]
+        maxs = AABBs[:, 1::2]
+        normals = self.planes[:, :3]
+
+        # For each plane, the corner of each AABB that is
+        # the furthest along the normal of the plane, (N, 6, 3)
+        corners = np.where(normals[np.newaxis, :, :] > 0.0,
+                           maxs[:, np.newaxis, :], mins[:, np.newaxis, :])
+        distances = np.einsum('npk,pk->np', corners, normals) + self.planes[:, 3]
+
+        return (distances >= 0.0).all(axis = 1) | ~finite
+
+    def AABB_visible(self, aabb):
+        ''' Tests a single AABB on ODE form. '''
+        return bool(self.AABBs_visible(aabb)[0])
+
+class Frustum_culler(object):
+    ''' Picks out the objects that are inside the view frustum.
+        Keeps a Body_batch of the objects so that their AABBs can
+        be read and tested in one pass. '''
+
+    def __init__(self):
+        self._batch = batches.Body_batch()
+        self._object_list = None
+        self._object_count = 0
+
+        self._enabled = True
+
+        # The result of the last call to cull()
+        self._visible_count = 0
+        self._culled_count = 0
+
+    def cull(self, object_list, frustum, spatial_index = None):
+        ''' Returns the objects in object_list that are inside the
+            frustum, in the same order. Objects without a geom
+            (e.g. textboxes) are always returned.
+
+            If a spatial index (spatial.Spatial_index) is given,
+            the objects are looked up in that instead of being
+            tested one by one. Objects that aren't in the index
+            are always returned. '''
+
+        if not self._enabled:
+            self._visible_count = len(object_list)
+            self._culled_count = 0
+            return object_list
+
+        if spatial_index is not None:
+            visible_ids = set(id(item) for item in
+                                spatial_index.query_frustum(frustum))
+            visible_objects = [item for item in object_list
+                                if id(item) in visible_ids or
+                                   item not in spatial_index]
+            self._culled_count = len(object_list) - len(visible_objects)
+            self._visible_count = len(visible_objects)
+            return visible_objects
+
+        # Objects are added to and removed from the list during
+        # the game (e.g. power ups), rebuild the batch when it changes
+        if object_list is not self._object_list or \
+                len(object_list) != self._object_count:
+            self._batch.set_objects(object_list)
+            self._object_list = object_list
+            self._object_count = len(object_list)
+
+        batch = self._batch
+        batch.gather()
+        visible = frustum.AABBs_visible(batch.AABBs)
+
+        visible_objects = []
+        for item in object_list:
+            index = batch.get_index(item)
+            if index is None or visible[index]:
+                visible_objects.append(item)
+
+        self._culled_count = len(object_list) - len(visible_objects)
+        self._visible_count = len(visible_objects)
+        return visible_objects
+
+    def get_visible_count(self):
+        return self._visible_count
+
+    def get_culled_count(self):
+        return self._culled_count
+
+    def is_enabled(self):
+        return self._enabled
+
+    def set_enabled(self, enabled):
+        self._enabled = enabled
@@ -8,9 +8,10 @@ import numbers
 import random
 from math import radians, tan, pi
 
+import materials
 import textures
 
-from math_classes.vectors import Vector
+from math_classes.vectors import Vector3
 
 BOX_QUAD_VERTS = ((0, 3, 2, 1), (3, 6, 7, 2), (6, 4, 5, 7),
                    (4, 0, 1, 5), (1, 2, 7, 5), (4, 6, 3, 0))
@@ -24,10 +25,11 @@ BOX_NORMALS = ([0.0, 0.0, -1.0], [-1.0, 0.0, 0.0],
 
 BOX_TEX_COORDS = ((0,0), (1,0), (1,1), (0,1))
 
-def box(box):
-    ''' Draws a box '''
+def box(x_size, y_size, z_size, subdivision_size):
+    ''' Draws the geometry of a box, centered in origo, with its
+        edges in black. The material and texture are not set here,
+        see material() and mesh(). '''
 
-    x_size, y_size, z_size = box.get_sides()
     x = x_size/2.0
     y = y_size/2.0
     z = z_size/2.0
@@ -37,41 +39,25 @@ def box(box):
                 (x, -y, z), (x, y, z),
                 (-x, -y, z), (-x, y, z))
 
-
-    ambient, diffuse, specular, shininess, emissive = box.get_material_properties()
-
-    glMaterialfv(GL_FRONT, GL_AMBIENT, ambient)
-    glMaterialfv(GL_FRONT, GL_DIFFUSE, diffuse)
-    glMaterialfv(GL_FRONT, GL_SPECULAR, specular)
-    glMateriali(GL_FRONT, GL_SHININESS, shininess)
-    glMaterialfv(GL_FRONT, GL_EMISSION, emissive)
-
-    if box.get_texture():
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, box.get_texture())
-
     #glEnable(GL_COLOR_MATERIAL)
 
     glBegin(GL_QUADS)
-    for face in BOX_QUAD_VERTS:
+    for face_index, face in enumerate(BOX_QUAD_VERTS):
 
         # Dimensions of the box's surface
-        down_left = points[face[0]]
-        down_right = points[face[1]]
-        up_right = points[face[2]]
-        up_left = points[face[3]]
-        up_left_vec = Vector(up_left)   # Will be used a lot, that's
-                                        # why it's created here
+        down_right = Vector3(points[face[1]])
+        up_right = Vector3(points[face[2]])
+        up_left = Vector3(points[face[3]])
 
-        length = (Vector(up_right) - Vector(down_right)).norm()
-        width = (Vector(up_right) - Vector(up_left)).norm()
+        length = (up_right - down_right).norm()
+        width = (up_right - up_left).norm()
 
         # The directions of the surface
-        down_vec = (Vector(down_right) - Vector(up_right)).normalize()
-        right_vec = (Vector(up_right) - Vector(up_left)).normalize()
+        down_vec = (down_right - up_right).normalize()
+        right_vec = (up_right - up_left).normalize()
 
         # The wanted subdivision size
-        goal_sub_size = box.get_subdivision_size()
+        goal_sub_size = subdivision_size
 
         # Number of subdivisions
         length_subs = int(length // goal_sub_size) + 1
@@ -85,6 +71,16 @@ def box(box):
         length_sub_frac = 1.0 / length_subs
         width_sub_frac = 1.0 / width_subs
 
+        # Calculate every grid point once, instead of once for
+        # each of the (up to four) quads that share it
+        right_step = right_vec * width_sub_size
+        down_step = down_vec * length_sub_size
+        grid = [[(up_left + right_step * w + down_step * l).value
+                    for w in range(width_subs + 1)]
+                        for l in range(length_subs + 1)]
+
+        glNormal3fv(BOX_NORMALS[face_index])
+
         # Draw the surface
         for l in range(length_subs):
             for w in range(width_subs):
@@ -94,23 +90,17 @@ def box(box):
                 #random_color = [random.random(), random.random(), random.random()]
                 #glColor3fv(random_color)
 
-                glNormal3fv(BOX_NORMALS[BOX_QUAD_VERTS.index(face)])
-
                 glTexCoord2f(w * width_sub_frac, 1 - l * length_sub_frac)
-                glVertex3fv((up_left_vec + right_vec * w * width_sub_size + \
-                            down_vec * l * length_sub_size).value)
+                glVertex3fv(grid[l][w])
 
                 glTexCoord2f(w * width_sub_frac, 1 - (l + 1) * length_sub_frac)
-                glVertex3fv((up_left_vec + right_vec * w * width_sub_size + \
-                            down_vec * (l + 1) * length_sub_size).value)
+                glVertex3fv(grid[l + 1][w])
 
                 glTexCoord2f((w + 1) * width_sub_frac, 1 - (l + 1) * length_sub_frac)
-                glVertex3fv((up_left_vec + right_vec * (w + 1) * width_sub_size + \
-                            down_vec * (l + 1) * length_sub_size).value)
+                glVertex3fv(grid[l + 1][w + 1])
 
                 glTexCoord2f((w + 1) * width_sub_frac, 1 - l * length_sub_frac)
-                glVertex3fv((up_left_vec + right_vec * (w + 1) * width_sub_size + \
-                            down_vec * l * length_sub_size).value)
+                glVertex3fv(grid[l][w + 1])
 
     glEnd()
 
@@ -125,39 +115,21 @@ def box(box):
             glVertex3fv(points[vert])
     glEnd()
 
-    glDisable(GL_TEXTURE_2D)
-
-def surface(surface):
-    ''' The drawing routine for a Surface object.
-        Calls OpenGL to draw the surface. '''
-
-    # TODO: Tesselate the surface for better lighting effects
-
-    ambient, diffuse, specular, \
-             shininess , emissive = surface.get_material_properties()
-
-    glMaterialfv(GL_FRONT, GL_AMBIENT, ambient)
-    glMaterialfv(GL_FRONT, GL_DIFFUSE, diffuse)
-    glMaterialfv(GL_FRONT, GL_SPECULAR, specular)
-    glMateriali(GL_FRONT, GL_SHININESS, shininess)
-    glMaterialfv(GL_FRONT, GL_EMISSION, emissive)
-
-    if surface.get_texture():
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, surface.get_texture())
+def surface(length, width, subdivision_size, normal):
+    ''' Draws the geometry of a surface: a width x length
+        rectangle in the xz-plane, centered in origo. The material
+        and texture are not set here, see material() and mesh(). '''
 
     # The dimensions of the surface
-    length = surface.get_length()
-    width = surface.get_width()
     half_length = length / 2.0
     half_width = width / 2.0
     
     # The wanted subdivision size
-    goal_sub_size = surface.get_subdivision_size()
+    goal_sub_size = subdivision_size
 
     # Number of subdivisions
-    length_subs = int(length // goal_sub_size)
-    width_subs = int(width // goal_sub_size)
+    length_subs = max(int(length // goal_sub_size), 1)
+    width_subs = max(int(width // goal_sub_size), 1)
 
     # Actual size of the subdivisions
     length_sub_size = length / float(length_subs)
@@ -180,7 +152,7 @@ def surface(surface):
             #random_color = [random.random(), random.random(), random.random()]
             #glColor3fv(random_color)
 
-            glNormal3fv(surface.get_normal().value)
+            glNormal3fv(normal)
             glTexCoord2f(w * width_sub_frac, 1 - l * length_sub_frac)
             glVertex3f(-half_width + w * width_sub_size, 
                         0.0,
@@ -201,30 +173,45 @@ def surface(surface):
 
     #glDisable(GL_COLOR_MATERIAL)
 
-    glDisable(GL_TEXTURE_2D)
+def sphere(quadric, radius, slices, stacks):
+    ''' Draws the geometry of a sphere, centered in origo, with
+        texture coordinates. The material and texture are not set
+        here, see material() and mesh(). '''
 
+    gluQuadricTexture(quadric, True)
+    gluSphere(quadric, radius, slices, stacks)
 
-def sphere(sphere):
-    ''' The drawing routine for a Sphere object.
-        Calls OpenGL to draw the sphere. '''
-    
-    ambient, diffuse, specular, \
-             shininess, emissive = sphere.get_material_properties()
+def material(item):
+    ''' Sets the material of the object as the current
+        OpenGL material (see materials.py). '''
 
-    glMaterialfv(GL_FRONT, GL_AMBIENT, ambient)
-    glMaterialfv(GL_FRONT, GL_DIFFUSE, diffuse)
-    glMaterialfv(GL_FRONT, GL_SPECULAR, specular)
-    glMateriali(GL_FRONT, GL_SHININESS, shininess)
-    glMaterialfv(GL_FRONT, GL_EMISSION, emissive)
+    item.get_material().apply()
 
-    if sphere.get_texture():
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, sphere.get_texture())
+def mesh(item):
+    ''' The drawing routine for all objects with a mesh (see
+        meshes.py). The mesh only holds the geometry and can be
+        shared between objects, so the material and texture of
+        the object are set here, before the mesh is drawn. '''
 
-    if sphere.get_texture():
-        gluQuadricTexture(sphere.get_quadric(), True)
+    material(item)
 
-    gluSphere(sphere.get_quadric(),sphere.get_radius(), 60, 60)
+    rect = textures.FULL_RECT
+    if item.get_texture():
+        glEnable(GL_TEXTURE_2D)
+        rect = textures.bind_texture(item.get_texture())
+
+    if rect != textures.FULL_RECT:
+        # A region of an atlas, map the texture coordinates of the
+        # mesh to it with the texture matrix
+        glMatrixMode(GL_TEXTURE)
+        glLoadIdentity()
+        glTranslatef(rect[0], rect[1], 0.0)
+        glScalef(rect[2] - rect[0], rect[3] - rect[1], 1.0)
+        item.get_mesh().draw()
+        glLoadIdentity()
+        glMatrixMode(GL_MODELVIEW)
+    else:
+        item.get_mesh().draw()
 
     glDisable(GL_TEXTURE_2D)
 
@@ -254,19 +241,22 @@ def progress_bar(p_bar):
     half_width = p_bar.get_width() * fraction * 0.5
     half_height = p_bar.get_height() * 0.5
 
+    # The part of the texture (or the atlas) that is shown
+    u0, v0, u1, v1 = textures.FULL_RECT
     if p_bar.get_texture():
         glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, p_bar.get_texture())
+        u0, v0, u1, v1 = textures.bind_texture(p_bar.get_texture())
+    u = u0 + (u1 - u0) * fraction
 
     glColor4fv(p_bar.get_color())
     glBegin(GL_QUADS)
-    glTexCoord2f(0,0)
+    glTexCoord2f(u0,v0)
     glVertex3f(-half_width, -half_height, 0)
-    glTexCoord2f(fraction,0)
+    glTexCoord2f(u,v0)
     glVertex3f(half_width, -half_height, 0)
-    glTexCoord2f(fraction,1)
+    glTexCoord2f(u,v1)
     glVertex3f(half_width, half_height, 0)
-    glTexCoord2f(0,1)
+    glTexCoord2f(u0,v1)
     glVertex3f(-half_width, half_height, 0)
     glEnd()
     glDisable(GL_TEXTURE_2D)
@@ -299,3 +289,6 @@ def AABB(aabb, color):
     glEnd()
 
     glDisable(GL_COLOR_MATERIAL)
+
+    # The color has changed the current material
+    materials.forget_current()
@@ -7,7 +7,7 @@ from OpenGL.GLUT import *
 import itertools
 from math import tan, pi, radians
 
-from graphics import textures, draw, views
+from graphics import context, textures, draw, views
 from objects.text import TextBox
 
 from shadows import glLibShadowInit
@@ -88,4 +88,7 @@ def init_window(window_name, HAVE_FULLSCREEN = True):
     shadowmap_size = 512
     glLibShadowInit([[shadowmap_size, 5]])
 
+    # From now on the objects can create their render resources
+    context.set_renderer(True)
+
     return view
@@ -1,6 +1,7 @@
 from OpenGL.GL import *
 from OpenGL.GLU import *
 
+from graphics import context
 from math_classes.vectors import Vector
 
 # TODO: Add other attributes to the light, such as color, direction,
@@ -29,9 +30,9 @@ class Light:
         self._diffuse = diffuse
         self._specular = specular
 
-        glEnable(self._light_index)
-
-        self._setup()
+        if context.has_renderer():
+            glEnable(self._light_index)
+            self._setup()
 
         # TODO: Add spotlight properties like cutoff etc.
 
@@ -6,7 +6,7 @@ from OpenGL.GLUT import *
 
 from math import tan, pi, radians
 
-from graphics import textures, draw
+from graphics import context, textures, draw
 from objects.text import TextBox
 
 class Loading_screen:
@@ -24,14 +24,17 @@ class Loading_screen:
         self._distance = tan(radians(90 - aspect_angle/2.0 ))
 
         # Create a display list for the start screen image
-        texture = textures.load_texture(image)
+        # (there is nothing to show it on in headless mode)
+        self._display_list_index = None
+        if context.has_renderer():
+            texture = textures.load_texture(image)
 
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.loading_screen(texture, self._ratio)
-        glEndList()
+            display_list_index = glGenLists(1)
+            glNewList(display_list_index, GL_COMPILE)
+            draw.loading_screen(texture, self._ratio)
+            glEndList()
 
-        self._display_list_index = display_list_index
+            self._display_list_index = display_list_index
 
         self._textboxes = []
         self._progress_bars = []
@@ -67,9 +70,6 @@ class Loading_screen:
     def update(self, counter_increase = 0):
         ''' Draws the loading screen, updates all textboxes and progress bars '''
 
-        ligthing_enabled = glGetBooleanv(GL_LIGHTING)
-        glDisable(GL_LIGHTING)
-
         # Update counters
         if counter_increase != 0:
             for textbox in self._textboxes:
@@ -81,6 +81,12 @@ class Loading_screen:
         for textbox in self._textboxes:
             textbox.update()
 
+        if not context.has_renderer():
+            return
+
+        ligthing_enabled = glGetBooleanv(GL_LIGHTING)
+        glDisable(GL_LIGHTING)
+
         # Draw the background image
         glPushMatrix()
         glLoadIdentity()
@@ -91,6 +97,8 @@ class Loading_screen:
         glClear(GL_COLOR_BUFFER_BIT|GL_DEPTH_BUFFER_BIT)
         
         glCallList(self._display_list_index)
+        # The display list has bound the background image
+        textures.forget_bound()
 
         # Draw textboxes and progress bars
         for progress_bar in self._progress_bars:
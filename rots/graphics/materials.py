@@ -0,0 +1,155 @@
+''' Materials, kept apart from the geometry of the objects.
+    A material is a state block (compiled into a display list the
+    first time it is used) that is applied before the (shared)
+    geometry of an object is drawn, see draw.mesh().
+
+    Materials are shared: get them with get_material(), which
+    returns the same Material for the same properties, and never
+    change them. To change the color of an object, give it another
+    material instead, e.g. material.with_ambient(color). This costs
+    nothing but a dictionary lookup. '''
+
+from OpenGL.GL import *
+
+DEFAULT_AMBIENT = (1.0, 1.0, 1.0, 1.0)
+DEFAULT_DIFFUSE = (1.0, 1.0, 1.0, 1.0)
+DEFAULT_SPECULAR = (1.0, 1.0, 1.0, 1.0)
+DEFAULT_EMISSIVE = (0.0, 0.0, 0.0, 1.0)
+
+# All materials: properties -> Material
+_cache = {}
+
+# The material that was applied last, it doesn't
+# have to be applied again for the next object
+_current = None
+
+class Material(object):
+    ''' The material properties of an object: ambient, diffuse,
+        specular and emissive colors (RGBA) and shininess. Use
+        get_material() to get one. '''
+
+    __slots__ = ('_ambient', '_diffuse', '_specular', '_shininess',
+                 '_emissive', '_display_list_index')
+
+    def __init__(self, ambient, diffuse, specular, shininess, emissive):
+
+        self._ambient = ambient
+        self._diffuse = diffuse
+        self._specular = specular
+        self._shininess = shininess
+        self._emissive = emissive
+
+        self._display_list_index = None
+
+    def get_properties(self):
+        return self._ambient, self._diffuse, self._specular,\
+               self._shininess, self._emissive
+
+    def get_ambient(self):
+        return self._ambient
+
+    def get_diffuse(self):
+        return self._diffuse
+
+    def get_specular(self):
+        return self._specular
+
+    def get_shininess(self):
+        return self._shininess
+
+    def get_emissive(self):
+        return self._emissive
+
+    def with_ambient(self, ambient):
+        return get_material(ambient, self._diffuse, self._specular,
+                            self._shininess, self._emissive)
+
+    def with_diffuse(self, diffuse):
+        return get_material(self._ambient, diffuse, self._specular,
+                            self._shininess, self._emissive)
+
+    def with_specular(self, specular):
+        return get_material(self._ambient, self._diffuse, specular,
+                            self._shininess, self._emissive)
+
+    def with_shininess(self, shininess):
+        return get_material(self._ambient, self._diffuse, self._specular,
+                            shininess, self._emissive)
+
+    def with_emissive(self, emissive):
+        return get_material(self._ambient, self._diffuse, self._specular,
+                            self._shininess, emissive)
+
+    def set_gl_state(self):
+        ''' Sets the material as the current OpenGL material. '''
+
+        glMaterialfv(GL_FRONT, GL_AMBIENT, self._ambient)
+        glMaterialfv(GL_FRONT, GL_DIFFUSE, self._diffuse)
+        glMaterialfv(GL_FRONT, GL_SPECULAR, self._specular)
+        glMateriali(GL_FRONT, GL_SHININESS, self._shininess)
+        glMaterialfv(GL_FRONT, GL_EMISSION, self._emissive)
+
+    def apply(self):
+        ''' Makes this the current material, unless it already is. '''
+
+        global _current
+
+        if self is _current:
+            return
+
+        if self._display_list_index is None:
+            self._display_list_index = glGenLists(1)
+            glNewList(self._display_list_index, GL_COMPILE)
+            self.set_gl_state()
+            glEndList()
+
+        glCallList(self._display_list_index)
+        _current = self
+
+    def delete(self):
+        ''' Frees the display list of the material. '''
+        if self._display_list_index is not None:
+            glDeleteLists(self._display_list_index, 1)
+            self._display_list_index = None
+
+    def __str__(self):
+        return 'Material(ambient=%s, diffuse=%s, specular=%s, ' \
+               'shininess=%s, emissive=%s)' % self.get_properties()
+
+def _color(color):
+    return tuple(float(c) for c in color)
+
+def get_material(ambient = DEFAULT_AMBIENT, diffuse = DEFAULT_DIFFUSE,
+                 specular = DEFAULT_SPECULAR, shininess = 0,
+                 emissive = DEFAULT_EMISSIVE):
+    ''' Returns the material with the given properties, shared
+        with all other objects with the same material. '''
+
+    key = (_color(ambient), _color(diffuse), _color(specular),
+           int(shininess), _color(emissive))
+
+    material = _cache.get(key)
+    if material is None:
+        material = Material(*key)
+        _cache[key] = material
+    return material
+
+def forget_current():
+    ''' Must be called when the OpenGL material has been changed
+        by something else than Material.apply(), e.g. by drawing
+        with GL_COLOR_MATERIAL enabled. '''
+
+    global _current
+    _current = None
+
+def clear():
+    ''' Deletes all materials. '''
+
+    for material in _cache.values():
+        material.delete()
+    _cache.clear()
+    forget_current()
+
+def get_statistics():
+    ''' Returns the number of different materials. '''
+    return len(_cache)
@@ -0,0 +1,448 @@
+''' The geometry of the objects. A mesh holds only the geometry
+    (no material or texture), either compiled into a display list
+    or stored in vertex buffer objects. For the latter, the shapes
+    are tessellated once into interleaved NumPy arrays (position,
+    normal and texture coordinates for every vertex) that are
+    uploaded to the graphics card together with an index buffer,
+    so that drawing an object is a single draw call.
+
+    The backend is chosen at startup with set_backend(), so that
+    the two can be compared.
+
+    Meshes are shared: objects get them with acquire_box(),
+    acquire_surface() and acquire_sphere() and give them back with
+    release(). Objects with the same shape and dimensions get the
+    same mesh, which is deleted when no object uses it anymore.
+    The objects do this through the Mesh_user base class. '''
+
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+import ctypes
+from math import pi
+
+import numpy as np
+
+import context
+import draw
+
+# The available geometry backends
+DISPLAY_LIST = 'display_list'
+VBO = 'vbo'
+BACKENDS = (DISPLAY_LIST, VBO)
+
+_backend = DISPLAY_LIST
+
+# Layout of the interleaved vertex data:
+# x, y, z, nx, ny, nz, s, t (all float32)
+VERTEX_SIZE = 8
+VERTEX_STRIDE = VERTEX_SIZE * 4
+NORMAL_OFFSET = ctypes.c_void_p(3 * 4)
+TEX_COORD_OFFSET = ctypes.c_void_p(6 * 4)
+
+# The faces of a box as indices into its corner points
+# (the same as in draw.py), and their normals
+BOX_QUAD_VERTS = ((0, 3, 2, 1), (3, 6, 7, 2), (6, 4, 5, 7),
+                   (4, 0, 1, 5), (1, 2, 7, 5), (4, 6, 3, 0))
+
+BOX_EDGES = ((0,1), (0,3), (0,4), (2,1), (2,3), (2,7),
+              (6,3), (6,4), (6,7), (5,1), (5,4), (5,7))
+
+BOX_NORMALS = ((0.0, 0.0, -1.0), (-1.0, 0.0, 0.0),
+                (0.0, 0.0, 1.0), (1.0, 0.0, 0.0),
+                (0.0, 1.0, 0.0), (0.0, -1.0, 0.0))
+
+def set_backend(backend):
+    ''' Sets the geometry backend used by all objects created
+        after the call. Must be either DISPLAY_LIST or VBO. '''
+
+    global _backend
+
+    if backend not in BACKENDS:
+        raise ValueError("Unknown geometry backend '%s', use one of %s"
+                            % (backend, ', '.join(BACKENDS)))
+    _backend = backend
+
+def get_backend():
+    return _backend
+
+def uses_vbo():
+    ''' True if the objects should put their geometry in VBOs. '''
+    return _backend == VBO
+
+def _grid_indices(rows, columns, offset = 0):
+    ''' Triangle indices for a grid of (rows + 1) x (columns + 1)
+        vertices stored row by row. Every cell (r, c) is the quad
+        (r, c), (r + 1, c), (r + 1, c + 1), (r, c + 1) split in
+        two triangles with the same winding as the quad. '''
+
+    r, c = np.mgrid[0:rows, 0:columns]
+    a = (r * (columns + 1) + c).ravel() + offset
+    b = a + columns + 1
+    cells = np.column_stack((a, b, b + 1, a, b + 1, a + 1))
+    return cells.ravel()
+
+def _grid(origin, right_step, down_step, rows, columns, normal):
+    ''' Vertices of a (rows + 1) x (columns + 1) grid starting in
+        origin (the upper left corner), with texture coordinates
+        going from (0, 1) in the upper left corner to (1, 0) in the
+        lower right corner. '''
+
+    l, w = np.mgrid[0:rows + 1, 0:columns + 1]
+    l = l.ravel()[:, np.newaxis]
+    w = w.ravel()[:, np.newaxis]
+
+    vertices = np.empty((len(l), VERTEX_SIZE), dtype = np.float32)
+    vertices[:, 0:3] = np.asarray(origin) + w * np.asarray(right_step) + \
+                        l * np.asarray(down_step)
+    vertices[:, 3:6] = normal
+    vertices[:, 6:7] = w / float(columns)
+    vertices[:, 7:8] = 1.0 - l / float(rows)
+    return vertices
+
+def box_arrays(x_size, y_size, z_size, subdivision_size):
+    ''' Tessellates a box the same way as draw.box does.
+
+    Output: 
+        * vertices: 
+            An (N, 8) float32 array of interleaved vertex data
+        * indices:
+            A uint32 array of triangle indices
+        * line_indices:
+            A uint32 array of line indices for the edges of the box '''
+
+    x = x_size / 2.0
+    y = y_size / 2.0
+    z = z_size / 2.0
+
+    points = np.array(((x, -y, -z), (x, y, -z), 
+                        (-x, y, -z), (-x, -y, -z), 
+                        (x, -y, z), (x, y, z),
+                        (-x, -y, z), (-x, y, z)))
+
+    vertex_parts = []
+    index_parts = []
+    count = 0
+
+    for face, normal in zip(BOX_QUAD_VERTS, BOX_NORMALS):
+        down_right = points[face[1]]
+        up_right = points[face[2]]
+        up_left = points[face[3]]
+
+        length = np.linalg.norm(up_right - down_right)
+        width = np.linalg.norm(up_right - up_left)
+
+        # Number of subdivisions
+        length_subs = int(length // subdivision_size) + 1
+        width_subs = int(width // subdivision_size) + 1
+
+        down_step = (down_right - up_right) / length_subs
+        right_step = (up_right - up_left) / width_subs
+
+        vertex_parts.append(_grid(up_left, right_step, down_step,
+                                  length_subs, width_subs, normal))
+        index_parts.append(_grid_indices(length_subs, width_subs, count))
+        count += len(vertex_parts[-1])
+
+    # The corners, used for drawing the edges
+    corners = np.zeros((8, VERTEX_SIZE), dtype = np.float32)
+    corners[:, 0:3] = points
+    vertex_parts.append(corners)
+    line_indices = np.array(BOX_EDGES).ravel() + count
+
+    return np.concatenate(vertex_parts), \
+           np.concatenate(index_parts).astype(np.uint32), \
+           line_indices.astype(np.uint32)
+
+def surface_arrays(length, width, subdivision_size, normal = (0.0, 1.0, 0.0)):
+    ''' Tessellates a surface the same way as draw.surface does:
+        a width x length grid in the xz-plane, centered in origo. '''
+
+    # Number of subdivisions
+    length_subs = max(int(length // subdivision_size), 1)
+    width_subs = max(int(width // subdivision_size), 1)
+
+    origin = (-width / 2.0, 0.0, -length / 2.0)
+    right_step = (width / float(width_subs), 0.0, 0.0)
+    down_step = (0.0, 0.0, length / float(length_subs))
+
+    vertices = _grid(origin, right_step, down_step,
+                     length_subs, width_subs, normal)
+    indices = _grid_indices(length_subs, width_subs)
+
+    return vertices, indices.astype(np.uint32), None
+
+def sphere_arrays(radius, slices = 60, stacks = 60):
+    ''' Tessellates a sphere like gluSphere does: the poles are
+        on the z-axis, s goes from 0 to 1 around the z-axis and
+        t from 1 at the positive pole to 0 at the negative. '''
+
+    i, j = np.mgrid[0:stacks + 1, 0:slices + 1]
+    i = i.ravel()
+    j = j.ravel()
+
+    rho = i * (pi / stacks)
+    theta = j * (2.0 * pi / slices)
+
+    normals = np.column_stack((-np.sin(theta) * np.sin(rho),
+                               np.cos(theta) * np.sin(rho),
+                               np.cos(rho)))
+
+    vertices = np.empty((len(i), VERTEX_SIZE), dtype = np.float32)
+    vertices[:, 0:3] = normals * radius
+    vertices[:, 3:6] = normals
+    vertices[:, 6] = j / float(slices)
+    vertices[:, 7] = 1.0 - i / float(stacks)
+
+    indices = _grid_indices(stacks, slices)
+
+    return vertices, indices.astype(np.uint32), None
+
+class Mesh(object):
+    ''' Geometry uploaded to the graphics card: one VBO with
+        interleaved vertex data and one with triangle indices
+        (and optionally line indices, drawn after the triangles). '''
+
+    def __init__(self, vertices, indices, line_indices = None):
+
+        vertices = np.ascontiguousarray(vertices, dtype = np.float32)
+        if line_indices is None:
+            line_indices = np.zeros(0, dtype = np.uint32)
+        all_indices = np.ascontiguousarray(np.concatenate((indices, line_indices)),
+                                           dtype = np.uint32)
+
+        self._triangle_count = len(indices)
+        self._line_count = len(line_indices)
+        # Byte offset of the line indices in the index buffer
+        self._line_offset = ctypes.c_void_p(len(indices) * 4)
+
+        self._vertex_buffer, self._index_buffer = glGenBuffers(2)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self._vertex_buffer)
+        glBufferData(GL_ARRAY_BUFFER, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._index_buffer)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, all_indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        self._size = vertices.nbytes + all_indices.nbytes
+
+    def get_size(self):
+        ''' The size of the buffers on the graphics card, in bytes. '''
+        return self._size
+
+    def bind(self):
+        ''' Binds the buffers and sets up the vertex arrays. '''
+
+        glBindBuffer(GL_ARRAY_BUFFER, self._vertex_buffer)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._index_buffer)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, None)
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, NORMAL_OFFSET)
+        glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, TEX_COORD_OFFSET)
+
+    def unbind(self):
+        ''' Restores the state changed by bind(). '''
+
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw_triangles(self):
+        ''' Draws the triangles, the mesh must be bound. '''
+        glDrawElements(GL_TRIANGLES, self._triangle_count,
+                       GL_UNSIGNED_INT, None)
+
+    def draw_lines(self):
+        ''' Draws the lines, if there are any. The mesh must be bound. '''
+        if self._line_count:
+            glDrawElements(GL_LINES, self._line_count,
+                           GL_UNSIGNED_INT, self._line_offset)
+
+    def draw(self):
+        ''' Draws the mesh, with the lines (if any) in black. '''
+
+        self.bind()
+        self.draw_triangles()
+
+        glDisable(GL_TEXTURE_2D)
+        glColor3f(0.0, 0.0, 0.0)
+        self.draw_lines()
+        self.unbind()
+
+    def delete(self):
+        ''' Frees the buffers on the graphics card. '''
+        if self._vertex_buffer is not None:
+            glDeleteBuffers(2, [self._vertex_buffer, self._index_buffer])
+            self._vertex_buffer = None
+            self._index_buffer = None
+
+class Display_list_mesh(object):
+    ''' Geometry compiled into a display list. The list is compiled
+        from one of the geometry routines in draw.py, called with
+        'args'. '''
+
+    def __init__(self, draw_function, *args):
+
+        self._quadric = None
+        if draw_function is draw.sphere:
+            # The quadric is owned by the mesh
+            self._quadric = gluNewQuadric()
+            args = (self._quadric,) + args
+
+        self._display_list_index = glGenLists(1)
+        glNewList(self._display_list_index, GL_COMPILE)
+        draw_function(*args)
+        glEndList()
+
+    def get_size(self):
+        ''' The size of the geometry on the graphics card is
+            not known for display lists. '''
+        return 0
+
+    def draw(self):
+        glCallList(self._display_list_index)
+
+    def delete(self):
+        ''' Frees the display list. '''
+        if self._display_list_index is not None:
+            glDeleteLists(self._display_list_index, 1)
+            self._display_list_index = None
+        if self._quadric is not None:
+            gluDeleteQuadric(self._quadric)
+            self._quadric = None
+
+def box_mesh(x_size, y_size, z_size, subdivision_size):
+    return Mesh(*box_arrays(x_size, y_size, z_size, subdivision_size))
+
+def surface_mesh(length, width, subdivision_size, normal = (0.0, 1.0, 0.0)):
+    return Mesh(*surface_arrays(length, width, subdivision_size, normal))
+
+def sphere_mesh(radius, slices = 60, stacks = 60):
+    return Mesh(*sphere_arrays(radius, slices, stacks))
+
+# The shared meshes: key -> [mesh, number of users]
+_cache = {}
+# mesh -> key
+_keys = {}
+
+def _acquire(key, create):
+    ''' Returns the mesh for 'key', and creates it with 'create'
+        if there is none. '''
+
+    entry = _cache.get(key)
+    if entry is None:
+        entry = [create(), 0]
+        _cache[key] = entry
+        _keys[entry[0]] = key
+    entry[1] += 1
+    return entry[0]
+
+def acquire_box(x_size, y_size, z_size, subdivision_size):
+    ''' Returns a box mesh, shared with all other boxes of the
+        same size. Give it back with release(). '''
+
+    key = ('box', _backend, float(x_size), float(y_size), float(z_size),
+           float(subdivision_size))
+    if _backend == VBO:
+        create = lambda: box_mesh(x_size, y_size, z_size, subdivision_size)
+    else:
+        create = lambda: Display_list_mesh(draw.box, x_size, y_size,
+                                           z_size, subdivision_size)
+    return _acquire(key, create)
+
+def acquire_surface(length, width, subdivision_size, normal = (0.0, 1.0, 0.0)):
+    ''' Returns a surface mesh, shared with all other surfaces of
+        the same size and normal. Give it back with release(). '''
+
+    normal = tuple(float(n) for n in normal)
+    key = ('surface', _backend, float(length), float(width),
+           float(subdivision_size), normal)
+    if _backend == VBO:
+        create = lambda: surface_mesh(length, width, subdivision_size, normal)
+    else:
+        create = lambda: Display_list_mesh(draw.surface, length, width,
+                                           subdivision_size, normal)
+    return _acquire(key, create)
+
+def acquire_sphere(radius, slices = 60, stacks = 60):
+    ''' Returns a sphere mesh, shared with all other spheres of
+        the same radius and tessellation. Give it back with release(). '''
+
+    key = ('sphere', _backend, float(radius), slices, stacks)
+    if _backend == VBO:
+        create = lambda: sphere_mesh(radius, slices, stacks)
+    else:
+        create = lambda: Display_list_mesh(draw.sphere, radius, slices, stacks)
+    return _acquire(key, create)
+
+def release(mesh):
+    ''' Gives back a mesh from one of the acquire functions. The
+        mesh is deleted when it is no longer used by any object. '''
+
+    key = _keys.get(mesh)
+    if key is None:
+        return
+
+    entry = _cache[key]
+    entry[1] -= 1
+    if entry[1] <= 0:
+        mesh.delete()
+        del _cache[key]
+        del _keys[mesh]
+
+def clear():
+    ''' Deletes all shared meshes, e.g. when the scene is unloaded. '''
+
+    for mesh, users in _cache.values():
+        mesh.delete()
+    _cache.clear()
+    _keys.clear()
+
+def get_statistics():
+    ''' Returns (number of meshes, number of users, bytes used by
+        the VBO meshes). '''
+
+    users = sum(entry[1] for entry in _cache.values())
+    size = sum(entry[0].get_size() for entry in _cache.values())
+    return len(_cache), users, size
+
+class Mesh_user(object):
+    ''' Base class of the objects that are drawn with a shared
+        mesh. The subclass sets self._mesh = None and implements
+        create_mesh() with one of the acquire functions. '''
+
+    def get_mesh(self):
+        return self._mesh
+
+    def create_geometry(self):
+        ''' Gets the mesh of the object. The mesh is shared with
+            all objects of the same shape and size, and doesn't
+            contain the material, so it only has to be created
+            once. Without a renderer (headless mode) this is done
+            when the object is first drawn instead. '''
+        if self._mesh is None and context.has_renderer():
+            self._mesh = self.create_mesh()
+
+    def create_mesh(self):
+        return None
+
+    def delete_geometry(self):
+        ''' Gives back the mesh of the object. '''
+        if self._mesh is not None:
+            release(self._mesh)
+            self._mesh = None
+
+    def draw_geometry(self):
+        ''' Draws the geometry, in local coordinates. '''
+        if self._mesh is None:
+            self.create_geometry()
+        draw.mesh(self)
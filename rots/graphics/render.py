@@ -9,6 +9,9 @@ from OpenGL.GL.ARB.shadow import *
 
 import lights
 import games
+import materials
+import textures
+from culling import Frustum
 
 from shadows import *
 from math import degrees, asin
@@ -48,6 +51,10 @@ def render(game):
 
     draw_scene(object_list, game)
 
+    # Stream in the mipmaps the objects need at their current
+    # size on the screen (with texture streaming on)
+    textures.update_streaming(object_list, camera, game.get_view())
+
     if game.get_debug_state() == 2:
         draw_debug_objects(object_list, light_list)
 
@@ -55,12 +62,29 @@ def render(game):
 
 
 def draw_scene(object_list, game):
-    ''' Draws the scene. '''
+    ''' Draws the scene. Only the objects inside the
+        view frustum of the camera are drawn. '''
 
     glClear(GL_COLOR_BUFFER_BIT|GL_DEPTH_BUFFER_BIT)
 
-    for item in object_list:
+    # Anything drawn before may have changed the material
+    # and the bound texture
+    materials.forget_current()
+    textures.forget_bound()
+
+    frustum = Frustum.from_view(game.get_view(), game.get_camera())
+    visible_objects = game.get_culler().cull(object_list, frustum,
+                                             game.get_spatial_index())
+
+    # Draw the moving objects between their last two physics states
+    interpolator = game.get_interpolator()
+    alpha = game.get_timestep().get_alpha()
+
+    for item in visible_objects:
         glPushMatrix()
+        offset = interpolator.get_offset(item, alpha)
+        if offset is not None:
+            glTranslatef(offset[0], offset[1], offset[2])
         item.draw()
         glPopMatrix()
 
@@ -0,0 +1,260 @@
+''' Texture atlases: many small images packed into one texture.
+
+    Every texture that is drawn has to be bound first, and switching
+    textures is one of the more expensive state changes. The small
+    images of the power ups and the loading screen are instead packed
+    into an atlas (one or more pages, each one texture), and drawn
+    with the texture coordinates mapped to their rectangle of it.
+
+    The images are packed on shelves: sorted by height, and each one
+    put on the first shelf with room for it, or on a new shelf or a
+    new page. The page width that gives the smallest pages (rounded
+    up to powers of two) is used. Around each image the edge pixels
+    are repeated 'padding' pixels out, so the linear filtering and the
+    first mipmaps don't mix in the neighbours. The mipmaps from level
+    log2(padding) + 1 on do, so only the levels up to get_max_level()
+    are used (see textures.acquire_region).
+
+    The atlas is built the first time it is needed and written to the
+    texture cache (see texture_cache.py): a mip chain file for each
+    page and a JSON file with the rectangles of the images. '''
+
+import hashlib
+import json
+import os
+from math import log
+
+import numpy as np
+
+from graphics import texture_cache
+
+# The largest width and height of a page
+MAX_SIZE = 2048
+# The pixels repeated around each image
+PADDING = 4
+
+def get_max_level(padding = PADDING):
+    ''' The last mipmap level of an atlas in which the images don't
+        mix with their neighbours: a texel of level n averages 2^n
+        pixels in each direction. '''
+    return int(log(max(padding, 1), 2) + 1E-9)
+
+def next_power_of_two(size):
+    power = 1
+    while power < size:
+        power *= 2
+    return power
+
+def pack(sizes, page_width, page_height, padding = PADDING):
+    ''' Packs rectangles on pages of the given size.
+
+        Input:
+            * sizes:
+                A list of (width, height).
+
+        Output: A list of (page, x, y), the positions of the
+                rectangles (inside the padding) in the same order
+                as the sizes, and a list of the (width, height)
+                used of each page. '''
+
+    order = sorted(range(len(sizes)), key = lambda i: (sizes[i][1], sizes[i][0]),
+                   reverse = True)
+    positions = [None] * len(sizes)
+
+    # The shelves of each page: [y, height, width used]
+    pages = []
+
+    for i in order:
+        width = sizes[i][0] + 2 * padding
+        height = sizes[i][1] + 2 * padding
+        if width > page_width or height > page_height:
+            raise ValueError("A %dx%d image doesn't fit in a %dx%d atlas page"
+                                % (sizes[i][0], sizes[i][1], page_width, page_height))
+
+        for page, shelves in enumerate(pages):
+            shelf = None
+            for candidate in shelves:
+                if height <= candidate[1] and candidate[2] + width <= page_width:
+                    shelf = candidate
+                    break
+            if shelf is None:
+                top = shelves[-1][0] + shelves[-1][1]
+                if top + height <= page_height:
+                    shelf = [top, height, 0]
+                    shelves.append(shelf)
+            if shelf is not None:
+                break
+        else:
+            page = len(pages)
+            shelf = [0, height, 0]
+            pages.append([shelf])
+
+        positions[i] = (page, shelf[2] + padding, shelf[0] + padding)
+        shelf[2] += width
+
+    used = [(max(shelf[2] for shelf in shelves), shelves[-1][0] + shelves[-1][1])
+            for shelves in pages]
+    return positions, used
+
+def _pack_smallest(sizes, max_size, padding):
+    ''' Packs with the page width that gives the smallest pages, with
+        their sizes rounded up to powers of two. '''
+
+    best = None
+    width = 1
+    while width <= max_size:
+        try:
+            positions, used = pack(sizes, width, max_size, padding)
+        except ValueError:
+            width *= 2
+            continue
+        page_sizes = [(next_power_of_two(w), next_power_of_two(h)) for w, h in used]
+        area = sum(w * h for w, h in page_sizes)
+        if best is None or (area, len(page_sizes)) < best[0]:
+            best = ((area, len(page_sizes)), positions, page_sizes)
+        width *= 2
+
+    if best is None:
+        # Raises the ValueError of the image that is too large
+        pack(sizes, max_size, max_size, padding)
+    return best[1], best[2]
+
+def build_atlas(images, max_size = MAX_SIZE, padding = PADDING):
+    ''' Packs images into atlas pages.
+
+        Input:
+            * images:
+                A list of (name, pixels), the pixels a height x
+                width x channels array of uint8, bottom row first
+                like OpenGL wants them.
+
+        Output: A list of the pages, (pixels, regions) where
+                regions is a dictionary from the name of an image
+                to its rectangle in texture coordinates, (u0, v0,
+                u1, v1). '''
+
+    if not images:
+        return []
+
+    sizes = [(pixels.shape[1], pixels.shape[0]) for name, pixels in images]
+    positions, page_sizes = _pack_smallest(sizes, max_size, padding)
+
+    channels = images[0][1].shape[2]
+    pages = [(np.zeros((height, width, channels), np.uint8), {})
+             for width, height in page_sizes]
+
+    for (name, pixels), (page, x, y) in zip(images, positions):
+        page_pixels, regions = pages[page]
+        height, width = pixels.shape[:2]
+        padded = np.pad(pixels, ((padding, padding), (padding, padding), (0, 0)), 'edge')
+        page_pixels[y - padding:y + height + padding, x - padding:x + width + padding] = padded
+
+        page_height, page_width = page_pixels.shape[:2]
+        regions[name] = (x / float(page_width), y / float(page_height),
+                         (x + width) / float(page_width), (y + height) / float(page_height))
+
+    return pages
+
+def _atlas_key(images, max_size, padding):
+    key = '%s|%d|%d|%s' % ([(name, os.path.normpath(path), os.path.getmtime(path))
+                            for name, path in images], max_size, padding,
+                           texture_cache.MAGIC)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def _read_atlas(index_path, cache_dir):
+    ''' The pages of a cached atlas, or None if some file is
+        missing or isn't a cache file of this version. '''
+
+    with open(index_path) as index_file:
+        index = json.load(index_file)
+
+    pages = []
+    for page in index['pages']:
+        path = os.path.join(cache_dir, page['file'])
+        if not os.path.exists(path):
+            return None
+        levels = texture_cache.read_mip_chain(path)
+        if levels is None:
+            return None
+        regions = dict((name, tuple(rect)) for name, rect in page['regions'].items())
+        pages.append((levels, regions))
+    return pages
+
+def _write_atlas(atlas_name, digest, pages, cache_dir):
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    index = {'pages': []}
+    for i, (levels, regions) in enumerate(pages):
+        file_name = '%s-%s-%d.mip' % (atlas_name, digest, i)
+        texture_cache.write_mip_chain(os.path.join(cache_dir, file_name), levels)
+        index['pages'].append({'file': file_name, 'regions': regions})
+
+    # The index last, the atlas is only found when it is complete
+    index_path = os.path.join(cache_dir, '%s-%s.json' % (atlas_name, digest))
+    with open(index_path + '.tmp', 'w') as index_file:
+        json.dump(index, index_file)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    os.rename(index_path + '.tmp', index_path)
+
+    # The files of older versions of the atlas
+    prefix = atlas_name + '-'
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and not name.startswith(prefix + digest) and \
+           (name.endswith('.mip') or name.endswith('.json')):
+            os.remove(os.path.join(cache_dir, name))
+
+def get_atlas(atlas_name, images, decode, max_size = MAX_SIZE, padding = PADDING,
+              cache_dir = None):
+    ''' The pages of an atlas, from the texture cache if none of
+        the images have changed, otherwise built and written to
+        the cache.
+
+        Input:
+            * atlas_name:
+                The name of the atlas, the start of the names of
+                its cache files.
+            * images:
+                A list of (name, path) of the image files.
+            * decode:
+                A function that takes a path and returns the pixels
+                (a string of RGB bytes) and the size.
+
+        Output: A list of the pages, (levels, regions), the levels
+                a mip chain (see texture_cache.get_mip_chain) and
+                the regions as in build_atlas. '''
+
+    cache_dir = cache_dir or texture_cache.CACHE_DIR
+    use_cache = texture_cache.is_enabled() and \
+                all(os.path.exists(path) for name, path in images)
+
+    if use_cache:
+        digest = _atlas_key(images, max_size, padding)
+        index_path = os.path.join(cache_dir, '%s-%s.json' % (atlas_name, digest))
+        if os.path.exists(index_path):
+            pages = _read_atlas(index_path, cache_dir)
+            if pages is not None:
+                return pages
+
+    decoded = []
+    for name, path in images:
+        image_str, (width, height) = decode(path)
+        pixels = np.frombuffer(image_str, np.uint8).reshape(height, width,
+                                                             texture_cache.CHANNELS)
+        decoded.append((name, pixels))
+
+    settings = dict(texture_cache.DEFAULT_SETTINGS, max_size = max_size)
+    pages = [(texture_cache.build_mip_chain(pixels.tobytes(),
+                                            (pixels.shape[1], pixels.shape[0]), settings),
+              regions)
+             for pixels, regions in build_atlas(decoded, max_size, padding)]
+
+    if use_cache:
+        # A cache that can't be written only makes the next start slower
+        try:
+            _write_atlas(atlas_name, digest, pages, cache_dir)
+        except (IOError, OSError) as message:
+            print 'Cannot write texture atlas: %s' % message
+
+    return pages
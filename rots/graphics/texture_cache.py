@@ -0,0 +1,267 @@
+''' An on-disk cache of the mipmaps of the textures.
+
+    Decoding a large JPEG/PNG and building its mipmaps (which
+    gluBuild2DMipmaps does on the CPU) takes most of the load time of
+    a scene. The cache does it once per version of an image: the whole
+    mip chain is written to graphics/texture_cache as raw RGB bytes,
+    and later runs map the file into memory and upload the levels as
+    they are, with one glTexImage2D per level.
+
+    A cache file is keyed by the path of the image, its modification
+    time and the settings of the mip chain (see DEFAULT_SETTINGS), so
+    a changed image or other settings give a new file. The old files
+    of an image are removed when a new one is written.
+
+    The file format: a header (MAGIC, the number of levels and of
+    channels), one entry per level (width, height and offset of the
+    pixels in the file) and the pixels of the levels, bottom row
+    first like OpenGL wants them. '''
+
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+CACHE_DIR = 'graphics/texture_cache'
+
+# Change when the format or the way the mipmaps are built changes
+MAGIC = b'ROTSMIP1'
+
+HEADER = struct.Struct('<8sII')
+LEVEL = struct.Struct('<III')
+
+# The settings that the mip chain depends on:
+#   * max_size: the largest width or height of the first level
+#   * filter: how the levels are made smaller ('box', 2x2 averages)
+DEFAULT_SETTINGS = {'max_size': 4096, 'filter': 'box'}
+
+CHANNELS = 3
+
+_enabled = True
+
+def set_enabled(enabled):
+    ''' Turns the cache on or off. When it is off, every call
+        of get_mip_chain decodes the image. '''
+    global _enabled
+    _enabled = enabled
+
+def is_enabled():
+    return _enabled
+
+def power_of_two(size, max_size):
+    ''' The power of two closest to 'size', at most 'max_size'
+        (like gluBuild2DMipmaps rounds the size of an image). '''
+
+    power = 1
+    while power * 2 <= size:
+        power *= 2
+    if size - power > power * 2 - size:
+        power *= 2
+    return min(power, max_size)
+
+def resize(pixels, width, height):
+    ''' Scales an image (a height x width x channels array of
+        uint8) bilinearly to width x height. '''
+
+    source_height, source_width = pixels.shape[:2]
+    if (source_width, source_height) == (width, height):
+        return pixels
+
+    def samples(source_size, size):
+        position = (np.arange(size) + 0.5) * source_size / float(size) - 0.5
+        position = np.clip(position, 0, source_size - 1)
+        low = position.astype(np.intp)
+        high = np.minimum(low + 1, source_size - 1)
+        return low, high, (position - low).astype(np.float32)
+
+    y_low, y_high, y_weight = samples(source_height, height)
+    x_low, x_high, x_weight = samples(source_width, width)
+
+    pixels = pixels.astype(np.float32)
+    y_weight = y_weight[:, None, None]
+    rows = pixels[y_low] * (1 - y_weight) + pixels[y_high] * y_weight
+    x_weight = x_weight[None, :, None]
+    result = rows[:, x_low] * (1 - x_weight) + rows[:, x_high] * x_weight
+    return np.round(result).astype(np.uint8)
+
+def half_size(pixels):
+    ''' The next level of a mip chain: the averages of 2x2
+        pixels (2x1 when one side is 1 pixel). '''
+
+    pixels = pixels.astype(np.uint16)
+    if pixels.shape[0] > 1:
+        pixels = pixels[0::2] + pixels[1::2]
+        divisor = 2
+    else:
+        divisor = 1
+    if pixels.shape[1] > 1:
+        pixels = pixels[:, 0::2] + pixels[:, 1::2]
+        divisor *= 2
+    return ((pixels + divisor // 2) // divisor).astype(np.uint8)
+
+def build_mip_chain(image_str, image_size, settings = DEFAULT_SETTINGS):
+    ''' Builds the mipmaps of an RGB image.
+
+        Input:
+            * image_str:
+                The pixels, as a string like pygame.image.tostring
+                returns it.
+            * image_size:
+                (width, height) of the image.
+
+        Output: A list of the levels, (width, height, pixels),
+                from the full size to 1x1. '''
+
+    if settings['filter'] != 'box':
+        raise ValueError("Unknown mipmap filter '%s'" % settings['filter'])
+
+    width, height = image_size
+    pixels = np.frombuffer(image_str, np.uint8).reshape(height, width, CHANNELS)
+    pixels = resize(pixels, power_of_two(width, settings['max_size']),
+                    power_of_two(height, settings['max_size']))
+
+    levels = [pixels]
+    while pixels.shape[0] > 1 or pixels.shape[1] > 1:
+        pixels = half_size(pixels)
+        levels.append(pixels)
+    return [(level.shape[1], level.shape[0], level) for level in levels]
+
+def write_mip_chain(path, levels):
+    ''' Writes the levels of a mip chain to a cache file. The
+        file is written under another name first, so a file with
+        the right name is always complete. '''
+
+    offset = HEADER.size + LEVEL.size * len(levels)
+    entries = []
+    for width, height, pixels in levels:
+        entries.append(LEVEL.pack(width, height, offset))
+        offset += width * height * CHANNELS
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as cache_file:
+        cache_file.write(HEADER.pack(MAGIC, len(levels), CHANNELS))
+        for entry in entries:
+            cache_file.write(entry)
+        for width, height, pixels in levels:
+            cache_file.write(np.ascontiguousarray(pixels).tobytes())
+
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temporary_path, path)
+
+def read_mip_chain(path):
+    ''' Maps a cache file into memory.
+
+        Output: The levels, (width, height, pixels) with the pixels
+                as flat arrays in the mapped file, or None if the
+                file isn't a cache file of this version. '''
+
+    data = np.memmap(path, dtype = np.uint8, mode = 'r')
+    if len(data) < HEADER.size:
+        return None
+
+    magic, count, channels = HEADER.unpack(data[:HEADER.size].tobytes())
+    if magic != MAGIC or channels != CHANNELS:
+        return None
+
+    levels = []
+    for i in range(count):
+        start = HEADER.size + LEVEL.size * i
+        width, height, offset = LEVEL.unpack(data[start:start + LEVEL.size].tobytes())
+        end = offset + width * height * channels
+        if end > len(data):
+            return None
+        levels.append((width, height, data[offset:end]))
+    return levels
+
+def get_cache_path(image_path, settings = DEFAULT_SETTINGS, cache_dir = None):
+    ''' The cache file of an image, for its current version
+        and the settings. '''
+
+    key = '%s|%r|%s' % (os.path.normpath(image_path), os.path.getmtime(image_path),
+                        sorted(settings.items()))
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir or CACHE_DIR, '%s-%s.mip' % (_base_name(image_path), digest))
+
+def _base_name(image_path):
+    return os.path.normpath(image_path).replace(os.sep, '_').replace('.', '_')
+
+def _remove_old_versions(cache_path, image_path, cache_dir):
+    ''' Removes the other cache files of the image (the name,
+        a dash, 16 digits of the key and '.mip'). '''
+
+    prefix = _base_name(image_path) + '-'
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and name.endswith('.mip') and \
+           len(name) == len(prefix) + 20 and path != cache_path:
+            os.remove(path)
+
+def get_mip_chain(image_path, decode, settings = DEFAULT_SETTINGS, cache_dir = None,
+                  fallback = None):
+    ''' The mip chain of an image, from the cache if it is
+        there, otherwise built and written to the cache.
+
+        Input:
+            * image_path:
+                The path of the image file.
+            * decode:
+                A function that takes the path and returns the
+                pixels (a string of RGB bytes) and the size,
+                called if the image isn't in the cache.
+            * fallback:
+                If given, called with the path and the error when
+                decode raises one, and returns pixels and a size
+                to use instead (e.g. of the missing texture). The
+                mip chain of those isn't cached, so the image is
+                decoded again the next time.
+
+        Output: The levels, (width, height, pixels). '''
+
+    if not _enabled or not os.path.exists(image_path):
+        image_str, image_size = _decode(image_path, decode, fallback)[:2]
+        return build_mip_chain(image_str, image_size, settings)
+
+    cache_dir = cache_dir or CACHE_DIR
+    cache_path = get_cache_path(image_path, settings, cache_dir)
+    if os.path.exists(cache_path):
+        levels = read_mip_chain(cache_path)
+        if levels is not None:
+            return levels
+
+    image_str, image_size, decoded = _decode(image_path, decode, fallback)
+    levels = build_mip_chain(image_str, image_size, settings)
+    if not decoded:
+        return levels
+
+    # A cache that can't be written only makes the next start slower
+    try:
+        if not os.path.isdir(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                # Another thread may have created it
+                if not os.path.isdir(cache_dir):
+                    raise
+        write_mip_chain(cache_path, levels)
+        _remove_old_versions(cache_path, image_path, cache_dir)
+    except (IOError, OSError) as message:
+        print 'Cannot write texture cache: %s' % message
+
+    return levels
+
+def _decode(image_path, decode, fallback):
+    ''' Returns the pixels, the size and whether they are of
+        the image (and not of the fallback). '''
+
+    if fallback is None:
+        image_str, image_size = decode(image_path)
+        return image_str, image_size, True
+
+    try:
+        image_str, image_size = decode(image_path)
+    except Exception as message:
+        image_str, image_size = fallback(image_path, message)
+        return image_str, image_size, False
+    return image_str, image_size, True
@@ -0,0 +1,139 @@
+''' Shared textures, with reference counting and a memory budget.
+
+    A texture is looked up by a key (the image file and the settings
+    of its mip chain) and created only if it isn't there, so objects
+    that use the same image share one texture object. Each user
+    acquires the texture and releases it when it is done with it.
+
+    A texture that nobody uses is kept, in case it is needed again
+    (a power up that respawns), until the resident textures take more
+    bytes than the budget. Then the unused textures are deleted, the
+    least recently used first. Textures that are in use are never
+    deleted, even if they alone are over the budget.
+
+    The registry only does the bookkeeping, the functions that create
+    and delete the textures are given to it (see textures.py). '''
+
+from collections import OrderedDict
+
+# The default budget, in bytes
+DEFAULT_BUDGET = 128 * 1024 * 1024
+
+class Texture_registry(object):
+
+    def __init__(self, delete, budget = DEFAULT_BUDGET):
+        ''' Input:
+                * delete:
+                    Called with a texture when it is evicted.
+                * budget:
+                    The number of bytes the resident textures
+                    may take before the unused ones are deleted. '''
+
+        self._delete = delete
+        self.set_budget(budget)
+
+        # key -> [texture, size in bytes, number of users]
+        self._entries = {}
+        # texture -> key
+        self._keys = {}
+        # The unused textures, the least recently used first (key -> None)
+        self._unused = OrderedDict()
+
+        self._resident = 0
+        self._evicted = 0
+
+    def get_budget(self):
+        return self._budget
+
+    def set_budget(self, budget):
+        if budget < 0:
+            raise ValueError('The texture budget can\'t be negative')
+        self._budget = budget
+        if hasattr(self, '_entries'):
+            self._evict()
+
+    def get_resident(self):
+        ''' The bytes taken by all textures, used or not. '''
+        return self._resident
+
+    def get_evicted(self):
+        ''' The number of textures deleted to stay in the budget. '''
+        return self._evicted
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def acquire(self, key, create):
+        ''' Returns the texture for 'key'. If there is none,
+            create() is called and returns a new texture and
+            its size in bytes. Give it back with release(). '''
+
+        entry = self._entries.get(key)
+        if entry is None:
+            texture, size = create()
+            entry = [texture, size, 0]
+            self._entries[key] = entry
+            self._keys[texture] = key
+            self._resident += size
+        elif entry[2] == 0:
+            del self._unused[key]
+
+        entry[2] += 1
+        self._evict()
+        return entry[0]
+
+    def release(self, texture):
+        ''' Gives back a texture from acquire(). The texture is
+            deleted when it isn't used and the budget is full. '''
+
+        key = self._keys.get(texture)
+        if key is None:
+            return
+
+        entry = self._entries[key]
+        entry[2] -= 1
+        if entry[2] <= 0:
+            entry[2] = 0
+            self._unused[key] = None
+            self._evict()
+
+    def resize(self, texture, change):
+        ''' Changes the size of a texture by 'change' bytes, e.g.
+            when mipmaps are streamed in or freed. '''
+
+        key = self._keys.get(texture)
+        if key is None:
+            return
+
+        self._entries[key][1] += change
+        self._resident += change
+        self._evict()
+
+    def _remove(self, key):
+        texture, size, users = self._entries.pop(key)
+        del self._keys[texture]
+        self._resident -= size
+        self._delete(texture)
+
+    def _evict(self):
+        ''' Deletes unused textures, the least recently used
+            first, until the resident ones fit in the budget. '''
+
+        while self._resident > self._budget and self._unused:
+            key, none = self._unused.popitem(last = False)
+            self._remove(key)
+            self._evicted += 1
+
+    def clear(self):
+        ''' Deletes all textures, e.g. when the scene is unloaded. '''
+
+        for key in list(self._entries):
+            self._remove(key)
+        self._unused.clear()
+
+    def get_statistics(self):
+        ''' Returns (number of textures, number of users,
+            number of unused textures, resident bytes). '''
+
+        users = sum(entry[2] for entry in self._entries.values())
+        return len(self._entries), users, len(self._unused), self._resident
@@ -0,0 +1,215 @@
+''' Streaming of the mipmaps of the large textures.
+
+    A sphere far from the camera only covers a few pixels and only
+    samples the smallest mipmaps of its texture, but all levels of the
+    mip chain are uploaded when the scene is loaded. With streaming,
+    only the levels up to PLACEHOLDER_SIZE are uploaded at first, and
+    the larger ones are uploaded when an object with the texture gets
+    large enough on the screen (see screen_size). The levels are read
+    from the texture cache (or from memory) in a background thread
+    and uploaded a few per frame. When the objects have been smaller
+    than a level for DROP_DELAY seconds, the level is freed again.
+
+    A texture has to be complete from its base level down to 1x1, so
+    the levels are uploaded one at a time from the base level up, and
+    the base level (GL_TEXTURE_BASE_LEVEL) is moved with them. The
+    streamer only does the bookkeeping, the functions that upload and
+    free the levels are given to it (see textures.py). '''
+
+from math import radians, sqrt, tan
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+# The largest level that is uploaded when a texture is loaded
+PLACEHOLDER_SIZE = 128
+# The texels of a level per pixel on the screen that the object has to
+# cover before the level is uploaded. A texture wrapped around a sphere
+# shows half of its width across the sphere.
+TEXELS_PER_PIXEL = 2.0
+# The seconds an object has to be far away before levels are freed
+DROP_DELAY = 5.0
+# The bytes of levels uploaded per frame (but always at least one level)
+UPLOAD_BUDGET = 4 * 1024 * 1024
+
+def placeholder_level(levels, placeholder_size = PLACEHOLDER_SIZE):
+    ''' The first level of a mip chain that is at most
+        placeholder_size wide and high. '''
+
+    for level, (width, height, pixels) in enumerate(levels):
+        if max(width, height) <= placeholder_size:
+            return level
+    return len(levels) - 1
+
+def wanted_level(levels, pixels):
+    ''' The smallest level of a mip chain with enough texels for
+        an object that is 'pixels' large on the screen. '''
+
+    texels = pixels * TEXELS_PER_PIXEL
+    for level in range(len(levels) - 1, -1, -1):
+        width, height = levels[level][:2]
+        if max(width, height) >= texels:
+            return level
+    return 0
+
+def screen_size(aabb, camera_pos, view):
+    ''' How many pixels high an object with the AABB (as ODE gives
+        it) is on the screen, seen from camera_pos with the
+        perspective of the view. '''
+
+    minx, maxx, miny, maxy, minz, maxz = aabb
+    size = max(maxx - minx, maxy - miny, maxz - minz)
+
+    dx = (minx + maxx) * 0.5 - camera_pos[0]
+    dy = (miny + maxy) * 0.5 - camera_pos[1]
+    dz = (minz + maxz) * 0.5 - camera_pos[2]
+    distance = max(sqrt(dx * dx + dy * dy + dz * dz) - size * 0.5, view.get_near())
+
+    return size * view.get_height() / \
+                (2.0 * distance * tan(radians(view.get_aspect_angle()) * 0.5))
+
+def get_screen_sizes(object_list, camera, view):
+    ''' The largest screen size (see screen_size) of the objects
+        with each texture, a dictionary from texture to pixels. '''
+
+    camera_pos = camera.get_pos().value
+    sizes = {}
+    for item in object_list:
+        if not (getattr(item, 'get_geom', None) and item.get_geom()) or \
+           not (getattr(item, 'get_texture', None) and item.get_texture()):
+            continue
+        texture = item.get_texture()
+        pixels = screen_size(item.get_geom().getAABB(), camera_pos, view)
+        if pixels > sizes.get(texture, 0.0):
+            sizes[texture] = pixels
+    return sizes
+
+def _read(pixels):
+    ''' Reads the pixels of a level (from the mapped cache file). '''
+    return np.ascontiguousarray(pixels)
+
+class _Streamed_texture(object):
+
+    def __init__(self, levels, base):
+        self.levels = levels
+        # The level that is never freed
+        self.placeholder = base
+        # The largest level that is uploaded
+        self.base = base
+        # The read of the next larger level
+        self.pending = None
+        # When the objects got smaller than the base level
+        self.far_since = None
+
+class Texture_streamer(object):
+
+    def __init__(self, upload, drop, upload_budget = UPLOAD_BUDGET,
+                 drop_delay = DROP_DELAY):
+        ''' Input:
+                * upload:
+                    Called with a texture, a level index, the width,
+                    height and pixels of the level. Uploads it and
+                    makes it the base level.
+                * drop:
+                    Called with a texture, the new base level and a
+                    list of the freed levels (index, width, height). '''
+
+        self._upload = upload
+        self._drop = drop
+        self._upload_budget = upload_budget
+        self._drop_delay = drop_delay
+
+        # texture -> _Streamed_texture
+        self._textures = {}
+        self._pool = None
+
+        self._uploaded = 0
+        self._dropped = 0
+
+    def __contains__(self, texture):
+        return texture in self._textures
+
+    def add(self, texture, levels, base):
+        ''' Streams a texture, whose levels from 'base' are uploaded. '''
+        self._textures[texture] = _Streamed_texture(levels, base)
+
+    def remove(self, texture):
+        self._textures.pop(texture, None)
+
+    def get_base_level(self, texture):
+        return self._textures[texture].base
+
+    def get_statistics(self):
+        ''' Returns (number of streamed textures, number of levels
+            uploaded, number of levels freed). '''
+        return len(self._textures), self._uploaded, self._dropped
+
+    def update(self, screen_sizes, now):
+        ''' Uploads and frees levels, call it once per frame.
+
+            Input:
+                * screen_sizes:
+                    A dictionary from texture to the largest size in
+                    pixels of its objects on the screen (see
+                    get_screen_sizes). Textures that aren't in it
+                    aren't seen.
+                * now:
+                    The time in seconds. '''
+
+        budget = self._upload_budget
+        uploaded = False
+
+        for texture, streamed in list(self._textures.items()):
+            levels = streamed.levels
+            wanted = min(wanted_level(levels, screen_sizes.get(texture, 0.0)),
+                         streamed.placeholder)
+
+            if wanted < streamed.base:
+                streamed.far_since = None
+                level = streamed.base - 1
+                if streamed.pending is None:
+                    streamed.pending = self._get_pool().apply_async(_read, (levels[level][2],))
+                elif streamed.pending.ready():
+                    width, height = levels[level][:2]
+                    size = width * height * 4
+                    if size > budget and uploaded:
+                        continue
+                    self._upload(texture, level, width, height, streamed.pending.get())
+                    streamed.pending = None
+                    streamed.base = level
+                    budget -= size
+                    uploaded = True
+                    self._uploaded += 1
+
+            elif wanted > streamed.base:
+                streamed.pending = None
+                if streamed.far_since is None:
+                    streamed.far_since = now
+                elif now - streamed.far_since >= self._drop_delay:
+                    dropped = [(level, levels[level][0], levels[level][1])
+                               for level in range(streamed.base, wanted)]
+                    self._drop(texture, wanted, dropped)
+                    streamed.base = wanted
+                    streamed.far_since = None
+                    self._dropped += len(dropped)
+
+            else:
+                streamed.far_since = None
+
+    def wait(self):
+        ''' Waits until the pending reads are done. '''
+
+        for streamed in self._textures.values():
+            if streamed.pending is not None:
+                streamed.pending.wait()
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPool(1)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -1,3 +1,8 @@
+import multiprocessing
+import os
+import timeit
+from multiprocessing.pool import ThreadPool
+
 import pygame
 from pygame.locals import *
 
@@ -7,6 +12,24 @@ from OpenGL.GL.EXT.texture_filter_anisotropic import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 
+import context
+import texture_atlas
+import texture_cache
+import texture_registry
+import texture_streaming
+
+TEXTURE_DIR = 'graphics/texture_data'
+
+# The small images that are packed into a texture atlas
+# (see texture_atlas.py) and drawn with acquire_region
+ATLAS_NAME = 'atlas'
+ATLAS_TEXTURES = ('arrows_1.png', 'arrows_3.png', 'number_bar.png',
+                  'striped_bar.png', 'missing_texture.png')
+MISSING_TEXTURE = 'missing_texture.png'
+
+# The texture coordinates of a whole texture
+FULL_RECT = (0.0, 0.0, 1.0, 1.0)
+
 def load_image(file_name):
     ''' Takes an image file and converts it into a string 
         that OpenGL can read. 
@@ -21,28 +44,44 @@ def load_image(file_name):
                     the image file in a format readable for 
                     OpenGL. '''
 
-    # Load the image
-    fullname = os.path.join('graphics/texture_data', file_name)
+    return decode_image(os.path.join(TEXTURE_DIR, file_name))
+
+def decode_image(path):
+    ''' Like load_image, but takes the path of the file. Returns
+        the missing texture if the file can't be loaded. '''
+
     try:
-        image = pygame.image.load(fullname)
-        image_size = image.get_size()
-        image_str = pygame.image.tostring(image, 'RGB', True)
+        return _decode(path)
     except pygame.error, message:
-        print 'Pygame error: ', message
-        print 'Cannot load texture:', file_name
-        try:
-            # Try to load default texture
-            missing_tex_path = os.path.join('graphics/texture_data',
-                                            'missing_texture.png')
-            missing_tex = pygame.image.load(missing_tex_path)
-            missing_tex_size = 512, 512
-            missing_tex_str = pygame.image.tostring(missing_tex,
-                                                        'RGB', True)
-            return missing_tex_str, missing_tex_size
-        except Exception, message:
-            raise SystemExit, message
-        
-    return image_str, image_size
+        return _decode_missing(path, message)
+
+def _decode(path):
+    image = pygame.image.load(path)
+    return pygame.image.tostring(image, 'RGB', True), image.get_size()
+
+def _decode_missing(path, message):
+    ''' The missing texture, to use for an image that can't
+        be loaded. '''
+
+    print 'Pygame error: ', message
+    print 'Cannot load texture:', path
+    try:
+        # Try to load default texture
+        return _decode(os.path.join(TEXTURE_DIR, MISSING_TEXTURE))
+    except Exception, message:
+        # Not SystemExit: this runs in the threads of load_textures,
+        # which only pass on Exceptions to the main thread
+        raise IOError('Cannot load the missing texture either: %s' % message)
+
+def load_mip_chain(image_file, settings = texture_cache.DEFAULT_SETTINGS):
+    ''' The mipmaps of an image in texture_data, from the texture
+        cache if the image hasn't changed since it was cached (see
+        texture_cache.py).
+
+        Output: A list of (width, height, pixels), one per level. '''
+
+    return texture_cache.get_mip_chain(os.path.join(TEXTURE_DIR, image_file),
+                                       _decode, settings, fallback = _decode_missing)
 
 def load_texture(image_file):
     ''' Creates a texture object from the image file and 
@@ -52,17 +91,297 @@ def load_texture(image_file):
     * image_file:   The name of the image file containing 
                     the image you want to load. It can be
                     of most of the normal formats (jpg etc).
-    * width:        The width of the image, in pixels.
-    * height:       The height of the image, in pixels.
 
     Output:
-    * tex:          The OpenGL index of the generated texture.
+    * tex:          The OpenGL index of the generated texture,
+                    None if there is no renderer (headless mode).
     '''
 
-    # Create image string
-    image_str, image_size = load_image(image_file)
+    if not context.has_renderer():
+        return None
+
+    return create_texture(load_mip_chain(image_file))
+
+def texture_key(image_file, settings = texture_cache.DEFAULT_SETTINGS):
+    ''' The key of a shared texture: the file and the settings
+        of its mip chain. '''
+    return image_file, tuple(sorted(settings.items()))
+
+def get_texture_size(levels, base_level = 0):
+    ''' The bytes a mip chain (from base_level) takes on the
+        graphics card, the levels are stored as RGBA. '''
+    return sum(width * height * 4 for width, height, pixels in levels[base_level:])
+
+def _create(levels, streamed = False):
+    ''' Creates a texture, with only the small levels if it is
+        streamed (see texture_streaming.py). '''
+
+    base_level = 0
+    if streamed:
+        base_level = texture_streaming.placeholder_level(levels)
+    texture = create_texture(levels, base_level)
+    if streamed:
+        _streamer.add(texture, levels, base_level)
+    return texture, get_texture_size(levels, base_level)
+
+def _create_atlas_page(levels):
+    ''' Creates the texture of an atlas page, with only the levels
+        in which the images don't mix (see texture_atlas.py). '''
+
+    levels = levels[:texture_atlas.get_max_level() + 1]
+    return create_texture(levels, max_level = len(levels) - 1), get_texture_size(levels)
+
+def _delete(texture):
+    _streamer.remove(texture)
+    glDeleteTextures(texture)
+    forget_bound()
+
+# The shared textures (see texture_registry.py)
+_registry = texture_registry.Texture_registry(_delete)
+
+def _upload_level(texture, level, width, height, pixels):
+    ''' Uploads a streamed level and makes it the base level. '''
+
+    bind_texture(texture)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glTexImage2D(GL_TEXTURE_2D, level, GL_RGBA, width, height, 0,
+                 GL_RGB, GL_UNSIGNED_BYTE, pixels)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, level)
+    _registry.resize(texture, width * height * 4)
+
+def _drop_levels(texture, base_level, dropped):
+    ''' Frees streamed levels, by making them empty. '''
+
+    bind_texture(texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, base_level)
+    for level, width, height in dropped:
+        glTexImage2D(GL_TEXTURE_2D, level, GL_RGBA, 0, 0, 0,
+                     GL_RGB, GL_UNSIGNED_BYTE, None)
+        _registry.resize(texture, -width * height * 4)
+
+# Uploads the large levels of the scene textures when they are needed
+_streamer = texture_streaming.Texture_streamer(_upload_level, _drop_levels)
+_streaming = False
+
+def set_streaming(streaming):
+    ''' Turns texture streaming on or off for the textures loaded
+        with load_textures after this (see texture_streaming.py). '''
+    global _streaming
+    _streaming = streaming
+
+def is_streaming():
+    return _streaming
+
+def update_streaming(object_list, camera, view):
+    ''' Uploads the levels of the streamed textures that the
+        objects need at their size on the screen, and frees the
+        ones they haven't needed for a while. Call it once per
+        frame. '''
+
+    if _streaming and context.has_renderer():
+        _streamer.update(texture_streaming.get_screen_sizes(object_list, camera, view),
+                         timeit.default_timer())
+
+def acquire_texture(image_file, settings = texture_cache.DEFAULT_SETTINGS):
+    ''' Like load_texture, but the texture is shared with everything
+        else that uses the same image with the same settings, and
+        is only loaded if it isn't already there. Give it back with
+        release_texture(). Returns None in headless mode. '''
+
+    if not context.has_renderer():
+        return None
+
+    return _registry.acquire(texture_key(image_file, settings),
+                             lambda: _create(load_mip_chain(image_file, settings)))
+
+def release_texture(texture):
+    ''' Gives back a texture from acquire_texture or load_textures,
+        or a Texture_region from acquire_region.
+        When nothing uses it any more it is kept until the textures
+        take more memory than the budget (see set_budget). '''
+
+    if isinstance(texture, Texture_region):
+        texture = texture.get_texture()
+    if texture is not None:
+        _registry.release(texture)
+
+def set_budget(budget):
+    ''' The number of bytes the shared textures may take before
+        the unused ones are deleted, the least recently used
+        first. 0 deletes a texture as soon as it is unused. '''
+    _registry.set_budget(budget)
+
+def get_budget():
+    return _registry.get_budget()
+
+def clear():
+    ''' Deletes all shared textures, e.g. when the scene is unloaded. '''
+    _registry.clear()
+
+def get_statistics():
+    ''' Returns (number of textures, number of users, number
+        of unused textures, resident bytes) of the shared
+        textures. '''
+    return _registry.get_statistics()
+
+class Texture_region(object):
+    ''' A rectangle of a texture, usually an image in an atlas. The
+        texture coordinates (0, 0)-(1, 1) of the image are mapped to
+        the rectangle (u0, v0, u1, v1) of the texture. '''
+
+    def __init__(self, texture, rect = FULL_RECT):
+        self._texture = texture
+        self._rect = rect
+
+    def get_texture(self):
+        return self._texture
+
+    def get_rect(self):
+        return self._rect
+
+    def map(self, u, v):
+        ''' The texture coordinates of the texture for the
+            coordinates (u, v) of the image. '''
+
+        u0, v0, u1, v1 = self._rect
+        return u0 + (u1 - u0) * u, v0 + (v1 - v0) * v
+
+# The pages of the atlas, (levels, regions), loaded when
+# the first region is acquired
+_atlas_pages = None
+
+def _get_atlas_pages():
+    global _atlas_pages
+    if _atlas_pages is None:
+        _atlas_pages = texture_atlas.get_atlas(ATLAS_NAME,
+                                               [(image_file, os.path.join(TEXTURE_DIR, image_file))
+                                                for image_file in ATLAS_TEXTURES],
+                                               decode_image)
+    return _atlas_pages
+
+def acquire_region(image_file):
+    ''' Returns a Texture_region with the image. The images in
+        ATLAS_TEXTURES are regions of a shared atlas texture, so
+        drawing them one after another doesn't bind a new texture.
+        Other images get a region that covers a texture of their
+        own (see acquire_texture), images that don't exist the
+        region of the missing texture. Give it back with
+        release_texture(). Returns None in headless mode. '''
+
+    if not context.has_renderer():
+        return None
+
+    if image_file not in ATLAS_TEXTURES:
+        if os.path.exists(os.path.join(TEXTURE_DIR, image_file)):
+            return Texture_region(acquire_texture(image_file))
+        image_file = MISSING_TEXTURE
+
+    for page, (levels, regions) in enumerate(_get_atlas_pages()):
+        if image_file in regions:
+            texture = _registry.acquire((ATLAS_NAME, page),
+                                        lambda: _create_atlas_page(levels))
+            return Texture_region(texture, regions[image_file])
+
+# The texture that was bound last, it doesn't
+# have to be bound again for the next object
+_bound = None
+
+def bind_texture(texture):
+    ''' Binds a texture (an index or a Texture_region), unless it
+        already is bound. Returns the rectangle of the bound texture
+        that the texture coordinates (0, 0)-(1, 1) are mapped to. '''
+
+    global _bound
+
+    if isinstance(texture, Texture_region):
+        texture, rect = texture.get_texture(), texture.get_rect()
+    else:
+        rect = FULL_RECT
+
+    if texture != _bound:
+        glBindTexture(GL_TEXTURE_2D, texture)
+        _bound = texture
+    return rect
+
+def forget_bound():
+    ''' Must be called when a texture has been bound by something
+        else than bind_texture(), e.g. by drawing text. '''
+
+    global _bound
+    _bound = None
+
+def _decode(image_file):
+    return image_file, load_mip_chain(image_file)
+
+def load_textures(image_files, on_loaded = None, workers = None):
+    ''' Loads many textures at once: the images are decoded (and
+        their mipmaps built, or read from the cache) in a pool of
+        threads, and each one is uploaded on this thread (the one
+        with the OpenGL context) as soon as it is done. Decoding
+        releases the GIL, so the load takes about as long as the
+        largest image.
+
+    Input:
+    * image_files:  The names of the image files.
+    * on_loaded:    Called with the name of the file and the
+                    texture index each time a texture has been
+                    uploaded, in the order they finish. Can
+                    e.g. move a progress bar.
+    * workers:      The number of threads, by default the
+                    number of cores.
+
+    With texture streaming on (see set_streaming), only the
+    small levels are uploaded, the larger ones when they are
+    needed (see update_streaming).
+
+    Output:
+    * textures:     A dictionary from file name to texture index
+                    (None if there is no renderer). The textures
+                    are shared (see acquire_texture), images that
+                    are already loaded aren't loaded again.
+    '''
+
+    image_files = list(set(image_files))
+    loaded = {}
+
+    if not context.has_renderer():
+        for image_file in image_files:
+            loaded[image_file] = None
+            if on_loaded is not None:
+                on_loaded(image_file, None)
+        return loaded
+
+    # The textures that are already loaded are shared
+    for image_file in image_files:
+        if texture_key(image_file) in _registry:
+            loaded[image_file] = acquire_texture(image_file)
+            if on_loaded is not None:
+                on_loaded(image_file, loaded[image_file])
+
+    missing = [image_file for image_file in image_files if image_file not in loaded]
+    if not missing:
+        return loaded
+
+    pool = ThreadPool(min(workers or multiprocessing.cpu_count(), len(missing)))
+    try:
+        for image_file, levels in pool.imap_unordered(_decode, missing):
+            loaded[image_file] = _registry.acquire(texture_key(image_file),
+                                                   lambda: _create(levels, _streaming))
+            if on_loaded is not None:
+                on_loaded(image_file, loaded[image_file])
+    finally:
+        pool.close()
+        pool.join()
+
+    return loaded
 
-    width, height = image_size
+def create_texture(levels, base_level = 0, max_level = None):
+    ''' Creates a texture object from a mip chain (a list of
+        (width, height, pixels)) and returns its index. Only the
+        levels from base_level are uploaded, and if max_level is
+        given the levels after it aren't used. Has to be called
+        on the thread with the OpenGL context. '''
 
     # Create a texture object
     tex = glGenTextures(1)
@@ -79,15 +398,26 @@ def load_texture(image_file):
     glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, 
                     GL_LINEAR)
 
-    gluBuild2DMipmaps( GL_TEXTURE_2D, GL_RGBA, width, height, 
-                     GL_RGB, GL_UNSIGNED_BYTE, image_str )
+    # Upload the levels as they are, the rows of the
+    # small ones aren't aligned to four bytes
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    for level, (width, height, pixels) in enumerate(levels):
+        if level >= base_level:
+            glTexImage2D(GL_TEXTURE_2D, level, GL_RGBA, width, height, 0,
+                         GL_RGB, GL_UNSIGNED_BYTE, pixels)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+    if base_level:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, base_level)
+    if max_level is not None:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, max_level)
 
     # get the largest anisotropy supported by the graphics card
     largest = glGetFloatv(GL_MAX_TEXTURE_MAX_ANISOTROPY_EXT)
     glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAX_ANISOTROPY_EXT, largest)
 
     # Cleanup
-    del image_str
+    del levels
+    forget_bound()
 
     # Return the texture index
     return tex
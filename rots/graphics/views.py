@@ -37,6 +37,9 @@ class View:
 	def get_far(self):
 		return self._far
 
+	def get_ratio(self):
+		return self._ratio
+
 	## Setters
 
 	def set_aspect_angle(self, aspect_angle):
@@ -0,0 +1,141 @@
+''' Batched vector math. Works on whole sets of vectors at once,
+    stored as contiguous NumPy arrays of shape (N, 3), instead of
+    one Vector object at a time. Use it where the same operation
+    is done on every object in the scene, so that the cost is one
+    NumPy call instead of N rounds through the interpreter. '''
+
+import numpy as np
+
+def as_array(vectors):
+    ''' Converts a sequence of vectors (Vector, Vector3 or
+        3-sequences) to an (N, 3) float array. Arrays are
+        returned as they are. '''
+
+    if isinstance(vectors, np.ndarray):
+        return vectors
+    return np.array([tuple(v) for v in vectors], dtype = np.float64).reshape(-1, 3)
+
+def dot(a, b):
+    ''' Row-wise dot products of a and b. Either of them can be a
+        single vector (shape (3,)), which is then used for all rows.
+
+        Output: An array of shape (N,). '''
+
+    return np.einsum('...i,...i->...', a, b)
+
+def cross(a, b):
+    ''' Row-wise cross products (a x b). Either of them can be
+        a single vector (shape (3,)). '''
+
+    return np.cross(a, b)
+
+def norms(vectors):
+    ''' The norm of every row in vectors, shape (N,). '''
+
+    return np.sqrt(dot(vectors, vectors))
+
+def normalize(vectors):
+    ''' Returns normalized copies of all rows in vectors.
+        NOTE: Unlike Vector.normalize(), zero vectors can't be
+        returned as None; they are returned as zero vectors. '''
+
+    n = norms(vectors)
+    n = np.where(n < 0.0000001, 1.0, n)   # To avoid division by zero
+    return vectors / n[..., np.newaxis]
+
+def projected(vectors, *base):
+    ''' Projects every row in vectors on the vector space defined
+        by the supplied base vectors. Assumes orthogonal and
+        linearly independant base vectors, just like
+        Vector.projected(). The base vectors can be single
+        vectors or one vector per row. '''
+
+    proj = np.zeros(np.shape(vectors))
+    for v in base:
+        v = np.asarray(v, dtype = np.float64)
+        proj += v * (dot(vectors, v) / dot(v, v))[..., np.newaxis]
+    return proj
+
+def transform(points, matrix):
+    ''' Transforms all points with a 4x4 matrix in OpenGL standard
+        (a list with all 16 elements in column major order), that
+        is, calculates (matrix * point) for every row. '''
+
+    m = np.asarray(matrix, dtype = np.float64).reshape(4, 4).T
+    return np.dot(points, m[:3, :3].T) + m[:3, 3]
+
+def rotate(vectors, rotations):
+    ''' Rotates every row in vectors with its own rotation matrix.
+
+    Input:  vectors: An (N, 3) array.
+            rotations: An (N, 9) or (N, 3, 3) array of rotation
+                matrices on ODE form (row major).
+
+    Output: An (N, 3) array of the rotated vectors. '''
+
+    r = np.asarray(rotations, dtype = np.float64).reshape(-1, 3, 3)
+    return np.einsum('nij,nj->ni', r, vectors)
+
+def ODE_to_OpenGL(rotations, positions = None):
+    ''' Batched version of matrices.ODE_to_OpenGL. Takes N
+        rotation matrices on ODE form (an (N, 9) array, row major)
+        and converts them to OpenGL form (an (N, 16) float32 array,
+        column major), ready to be passed to glMultMatrixf. If
+        positions are given they are put in the translation part. '''
+
+    r = np.asarray(rotations, dtype = np.float32).reshape(-1, 3, 3)
+    out = np.zeros((len(r), 4, 4), dtype = np.float32)
+    # Column major OpenGL is the transpose of row major ODE
+    out[:, :3, :3] = r.transpose(0, 2, 1)
+    out[:, 3, 3] = 1.0
+    if positions is not None:
+        out[:, 3, :3] = positions
+    return out.reshape(-1, 16)
+
+
+class Body_batch(object):
+    ''' Holds the AABBs of N objects in the scene as one (N, 6)
+        array on ODE form, so that they can be tested (e.g. against
+        the view frustum) with the functions above in one pass.
+        gather() reads them from ODE, one geom at a time since
+        PyODE has no call that reads them all at once.
+
+        Objects without a geom (e.g. textboxes) are skipped. '''
+
+    def __init__(self, objects = ()):
+        self.set_objects(objects)
+
+    def set_objects(self, objects):
+        ''' Sets the objects that the batch describes and
+            allocates the array. Call gather() to fill it. '''
+
+        self._objects = [obj for obj in objects
+                            if getattr(obj, 'get_geom', None) and obj.get_geom()]
+        self._index = dict((id(obj), i) for i, obj in enumerate(self._objects))
+
+        self.AABBs = np.zeros((len(self._objects), 6))
+
+    def gather(self):
+        ''' Reads the current AABBs of all objects from ODE. '''
+
+        if self._objects:
+            self.AABBs[:] = [obj.get_geom().getAABB() for obj in self._objects]
+
+    def get_objects(self):
+        return self._objects
+
+    def get_index(self, obj):
+        ''' Returns the row of obj in the array, None
+            if it isn't in the batch. '''
+        return self._index.get(id(obj))
+
+    def __len__(self):
+        return len(self._objects)
+
+    def AABB_sizes(self):
+        ''' The size of every AABB along x, y and z, shape (N, 3). '''
+        return self.AABBs[:, 1::2] - self.AABBs[:, 0::2]
+
+    def AABB_centers(self):
+        ''' The center of every AABB, shape (N, 3). '''
+        return (self.AABBs[:, 1::2] + self.AABBs[:, 0::2]) * 0.5
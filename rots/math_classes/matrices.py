@@ -1,11 +1,13 @@
-# TODO: Make a Matrix class? We have two different types of matrices
-# (OpenGL and list of lists), which makes it a little harder to have
-# one single matrix class...
+# NOTE: We have two different types of matrices (OpenGL and list of
+# lists). The functions below work on both kinds, the Matrix4 class
+# at the bottom is always stored in OpenGL standard.
 
 import numbers
-from math import cos, sin, pi
+from math import cos, sin, tan, pi, sqrt, radians
 
-from math_classes.vectors import Vector
+import numpy as np
+
+from math_classes.vectors import Vector, Vector3
 
 def OpenGL_to_matrix(matrix):
     ''' Takes a matrix in OpenGL standard (a single list of all elements
@@ -76,7 +78,7 @@ def generate_rotation_matrix(axis, angle):
                 (a list with all 16 elements in column major
                 order) describing the rotation. '''
 
-    assert isinstance(axis, Vector), \
+    assert isinstance(axis, (Vector, Vector3)), \
            'The axis must be a vector'
     assert isinstance(angle, numbers.Number), \
            'The angle must be a number'
@@ -89,17 +91,21 @@ def generate_rotation_matrix(axis, angle):
     else:
         v = v.value
     
-    rotation_matrix = [v[0] * v[0] * (1.0 - cos(angle)) + cos(angle),
-                       v[1] * v[0] * (1.0 - cos(angle)) + v[2] * sin(angle),
-                       v[0] * v[2] * (1.0 - cos(angle)) - v[1] * sin(angle),
+    c = cos(angle)
+    s = sin(angle)
+    t = 1.0 - c
+
+    rotation_matrix = [v[0] * v[0] * t + c,
+                       v[1] * v[0] * t + v[2] * s,
+                       v[0] * v[2] * t - v[1] * s,
                        0.0,
-                       v[0] * v[1] * (1.0 - cos(angle)) - v[2] * sin(angle),
-                       v[1] * v[1] * (1.0 - cos(angle)) + cos(angle),
-                       v[1] * v[2] * (1.0 - cos(angle)) + v[0] * sin(angle),
+                       v[0] * v[1] * t - v[2] * s,
+                       v[1] * v[1] * t + c,
+                       v[1] * v[2] * t + v[0] * s,
                        0.0,
-                       v[0] * v[2] * (1.0 - cos(angle)) + v[1] * sin(angle),
-                       v[1] * v[2] * (1.0 - cos(angle)) - v[0] * sin(angle),
-                       v[2] * v[2] * (1.0 - cos(angle)) + cos(angle),
+                       v[0] * v[2] * t + v[1] * s,
+                       v[1] * v[2] * t - v[0] * s,
+                       v[2] * v[2] * t + c,
                        0.0,
                        0.0,
                        0.0,
@@ -139,9 +145,7 @@ def OpenGL_to_ODE(matrix):
     ''' Takes a matrix on OpenGL form (16-list, column major)
         and converts it to ODE form (9-list, row major) '''
 
-    #TODO: Make prettier?
-
-    c = matrix[:]
+    c = matrix
     out = [c[0], c[4], c[8],
             c[1], c[5], c[9],
             c[2], c[6], c[10]]
@@ -151,11 +155,202 @@ def ODE_to_OpenGL(matrix):
     ''' Takes a matrix on ODE form (9-list, row major)
         and converts it to OpenGL form (16-list, column major) '''
 
-    #TODO: Make prettier?
-
-    c = matrix[:]
+    c = matrix
     out = [c[0], c[3], c[6], 0,
             c[1], c[4], c[7], 0,
             c[2], c[5], c[8], 0,
             0, 0, 0, 1]
-    return out
\ No newline at end of file
+    return out
+
+class Matrix4(object):
+    ''' A 4x4 matrix in OpenGL standard. The elements are stored
+    in column major order in a flat, contiguous float32 array
+    (self.value), which can be given to glMultMatrixf or
+    glLoadMatrixf as it is, without any conversion. '''
+
+    __slots__ = ('value',)
+
+    def __init__(self, value = None):
+        ''' Initializes the matrix from a sequence of 16 numbers
+        in OpenGL standard (column major). Creates an identity
+        matrix if no value is given. '''
+        if value is None:
+            value = identity()
+        self.value = np.array(value, dtype = np.float32).reshape(16)
+
+    @classmethod
+    def from_rows(cls, rows):
+        ''' Creates a matrix from a 4x4 array (or list of lists)
+        in row major order. '''
+        return cls(np.asarray(rows).T.reshape(16))
+
+    @classmethod
+    def from_ODE(cls, rotation, position = None):
+        ''' Creates a matrix from a rotation on ODE form
+        (9-list, row major) and an optional position (3-sequence). '''
+        c = rotation
+        m = cls((c[0], c[3], c[6], 0.0,
+                 c[1], c[4], c[7], 0.0,
+                 c[2], c[5], c[8], 0.0,
+                 0.0, 0.0, 0.0, 1.0))
+        if position is not None:
+            m.value[12:15] = tuple(position)
+        return m
+
+    @classmethod
+    def from_rotation(cls, axis, angle):
+        ''' Creates a rotation matrix with a rotation of angle
+        (in radians) around axis (a vector). '''
+        return cls(generate_rotation_matrix(axis, angle))
+
+    @classmethod
+    def from_translation(cls, v):
+        ''' Creates a matrix translating by the vector v. '''
+        m = cls()
+        m.value[12:15] = tuple(v)
+        return m
+
+    @classmethod
+    def from_quaternion(cls, q, position = None):
+        ''' Creates a rotation matrix from a unit quaternion given
+        on ODE form (w, x, y, z), and an optional position. '''
+        w, x, y, z = q
+        rotation = (1.0 - 2.0 * (y * y + z * z),
+                    2.0 * (x * y - w * z),
+                    2.0 * (x * z + w * y),
+                    2.0 * (x * y + w * z),
+                    1.0 - 2.0 * (x * x + z * z),
+                    2.0 * (y * z - w * x),
+                    2.0 * (x * z - w * y),
+                    2.0 * (y * z + w * x),
+                    1.0 - 2.0 * (x * x + y * y))
+        return cls.from_ODE(rotation, position)
+
+    @classmethod
+    def perspective(cls, fovy, ratio, near, far):
+        ''' Creates the same projection matrix as gluPerspective.
+        fovy is the field of view in the y-direction, in degrees. '''
+        f = 1.0 / tan(radians(fovy) / 2.0)
+        return cls.from_rows(((f / ratio, 0.0, 0.0, 0.0),
+                              (0.0, f, 0.0, 0.0),
+                              (0.0, 0.0, (far + near) / (near - far),
+                                         2.0 * far * near / (near - far)),
+                              (0.0, 0.0, -1.0, 0.0)))
+
+    @classmethod
+    def look_at(cls, eye, focus, up):
+        ''' Creates the same view matrix as gluLookAt. '''
+        eye = Vector3(tuple(eye))
+        forward = (Vector3(tuple(focus)) - eye).normalize()
+        side = forward.cross(Vector3(tuple(up))).normalize()
+        up = side.cross(forward)
+        return cls.from_rows(((side.x, side.y, side.z, -side.dot(eye)),
+                              (up.x, up.y, up.z, -up.dot(eye)),
+                              (-forward.x, -forward.y, -forward.z, forward.dot(eye)),
+                              (0.0, 0.0, 0.0, 1.0)))
+
+    def rows(self):
+        ''' Returns the matrix as a 4x4 array in row major order. '''
+        return self.value.reshape(4, 4).T
+
+    def to_list(self):
+        ''' Returns the matrix as a list in OpenGL standard
+        (all 16 elements in column major order). '''
+        return [float(e) for e in self.value]
+
+    def to_ODE(self):
+        ''' Returns the rotation part on ODE form (9-list, row major) '''
+        c = self.value
+        return [float(c[0]), float(c[4]), float(c[8]),
+                float(c[1]), float(c[5]), float(c[9]),
+                float(c[2]), float(c[6]), float(c[10])]
+
+    def to_quaternion(self):
+        ''' Returns the rotation part as a unit quaternion on ODE
+        form (w, x, y, z). Assumes that the rotation part is a pure
+        rotation (orthonormal). '''
+        m = self.rows().astype(np.float64)
+        trace = m[0, 0] + m[1, 1] + m[2, 2]
+
+        # Pick the numerically most stable way depending on
+        # which element on the diagonal is the largest
+        if trace > 0.0:
+            s = sqrt(trace + 1.0) * 2.0
+            q = (0.25 * s,
+                 (m[2, 1] - m[1, 2]) / s,
+                 (m[0, 2] - m[2, 0]) / s,
+                 (m[1, 0] - m[0, 1]) / s)
+        elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+            s = sqrt(1.0 + m[0, 0] - m[1, 1] - m[2, 2]) * 2.0
+            q = ((m[2, 1] - m[1, 2]) / s,
+                 0.25 * s,
+                 (m[0, 1] + m[1, 0]) / s,
+                 (m[0, 2] + m[2, 0]) / s)
+        elif m[1, 1] > m[2, 2]:
+            s = sqrt(1.0 + m[1, 1] - m[0, 0] - m[2, 2]) * 2.0
+            q = ((m[0, 2] - m[2, 0]) / s,
+                 (m[0, 1] + m[1, 0]) / s,
+                 0.25 * s,
+                 (m[1, 2] + m[2, 1]) / s)
+        else:
+            s = sqrt(1.0 + m[2, 2] - m[0, 0] - m[1, 1]) * 2.0
+            q = ((m[1, 0] - m[0, 1]) / s,
+                 (m[0, 2] + m[2, 0]) / s,
+                 (m[1, 2] + m[2, 1]) / s,
+                 0.25 * s)
+        return tuple(float(e) for e in q)
+
+    def __mul__(self, other):
+        ''' Overloads "*". Matrix4 * Matrix4 gives the matrix
+        product, Matrix4 * vector gives the vector (a point)
+        transformed by the matrix as a Vector3. '''
+        if isinstance(other, Matrix4):
+            return Matrix4.from_rows(np.dot(self.rows(), other.rows()))
+
+        x, y, z = other
+        c = self.value
+        return Vector3((c[0] * x + c[4] * y + c[8] * z + c[12],
+                        c[1] * x + c[5] * y + c[9] * z + c[13],
+                        c[2] * x + c[6] * y + c[10] * z + c[14]))
+
+    def compose(self, *others):
+        ''' Returns the product (self * others[0] * others[1] ...),
+        that is, the transformations applied from right to left. '''
+        rows = self.rows()
+        for other in others:
+            rows = np.dot(rows, other.rows())
+        return Matrix4.from_rows(rows)
+
+    def transposed(self):
+        ''' Returns the transpose of the matrix. '''
+        return Matrix4(self.rows().reshape(16))
+
+    def inverse(self):
+        ''' Returns the inverse of the matrix. Raises
+        numpy.linalg.LinAlgError if the matrix is singular. '''
+        return Matrix4.from_rows(np.linalg.inv(self.rows().astype(np.float64)))
+
+    def __str__(self):
+        ''' Returns the string representation of the matrix,
+        in row major order. '''
+        return self.rows().__str__()
+
+class Orientation_cache(object):
+    ''' Caches the OpenGL form of the ODE rotation of an object. The
+    conversion is only done again when the rotation has changed,
+    which for static and sleeping objects means never. '''
+
+    __slots__ = ('_rotation', '_matrix')
+
+    def __init__(self):
+        self._rotation = None
+        self._matrix = None
+
+    def get(self, rotation):
+        ''' Returns the rotation (9-tuple on ODE form, as given
+        by getRotation()) as a contiguous float32 array in OpenGL
+        standard, ready to be given to glMultMatrixf. '''
+        if rotation != self._rotation:
+            self._rotation = rotation
+            self._matrix = Matrix4.from_ODE(rotation).value
+        return self._matrix
@@ -0,0 +1,395 @@
+''' Spatial indices over the AABBs of the objects in the scene, to
+    answer questions like "what is near this point" or "what can be
+    seen from the camera" without going through every object.
+
+    The static geometry never moves, so it is put in a bounding
+    volume hierarchy (BVH) that is built once, when the scene is
+    loaded. Everything else is put in a loose grid which is updated
+    every frame; an object only changes cell when its center has
+    moved to another cell.
+
+    All AABBs are on ODE form:
+    (minx, maxx, miny, maxy, minz, maxz). '''
+
+from math import floor
+
+import numpy as np
+
+# The maximum number of objects in a leaf of the BVH
+BVH_LEAF_SIZE = 4
+
+def AABBs_overlap(a, b):
+    ''' True if the two AABBs overlap (or touch). '''
+    return a[0] <= b[1] and b[0] <= a[1] and \
+           a[2] <= b[3] and b[2] <= a[3] and \
+           a[4] <= b[5] and b[4] <= a[5]
+
+def sphere_AABB(center, radius):
+    ''' The AABB of a sphere. '''
+    x, y, z = center
+    return (x - radius, x + radius, y - radius, y + radius,
+            z - radius, z + radius)
+
+def _AABB_sphere_distance_ok(aabb, center, radius):
+    ''' True if the AABB is within 'radius' of 'center'. '''
+    square_distance = 0.0
+    for i, c in enumerate(center):
+        if c < aabb[2 * i]:
+            square_distance += (aabb[2 * i] - c) ** 2
+        elif c > aabb[2 * i + 1]:
+            square_distance += (c - aabb[2 * i + 1]) ** 2
+    return square_distance <= radius * radius
+
+def _finite(aabb):
+    ''' Replaces infinite bounds (e.g. of planes) with large
+        numbers, so that they can be used in the arithmetic. '''
+    return tuple(min(max(e, -1e30), 1e30) for e in aabb)
+
+class BVH(object):
+    ''' A bounding volume hierarchy over a fixed set of items and
+        their AABBs. The tree is built top-down, splitting the
+        items at the median of their centers along the longest
+        axis, and stored in flat arrays:
+
+        * bounds: The AABB of every node, (M, 6).
+        * children: The two children of every node, (M, 2),
+          -1 for leaves.
+        * ranges: The first item and number of items of every
+          leaf, (M, 2), as indices into the reordered items. '''
+
+    def __init__(self, items, AABBs):
+
+        self._items = list(items)
+        AABBs = np.array([_finite(aabb) for aabb in AABBs],
+                         dtype = np.float64).reshape(-1, 6)
+
+        bounds = []
+        children = []
+        ranges = []
+        order = []
+
+        if len(self._items):
+            centers = (AABBs[:, 0::2] + AABBs[:, 1::2]) * 0.5
+            self._build(np.arange(len(self._items)), AABBs, centers,
+                        bounds, children, ranges, order)
+
+        self._item_order = order
+        self._item_AABBs = AABBs[order] if order else np.zeros((0, 6))
+        self.bounds = np.array(bounds, dtype = np.float64).reshape(-1, 6)
+        self.children = np.array(children, dtype = np.int64).reshape(-1, 2)
+        self.ranges = np.array(ranges, dtype = np.int64).reshape(-1, 2)
+
+        # The same as plain lists, which are faster to
+        # index one element at a time when walking the tree
+        self._bounds = [tuple(b) for b in self.bounds.tolist()]
+        self._children = children
+        self._ranges = ranges
+        self._item_AABB_list = [tuple(b) for b in self._item_AABBs.tolist()]
+
+    def _build(self, indices, AABBs, centers, bounds, children, ranges, order):
+        ''' Adds the node for 'indices' and its subtree, returns
+            the index of the node. '''
+
+        node = len(bounds)
+        node_AABBs = AABBs[indices]
+        bounds.append((node_AABBs[:, 0].min(), node_AABBs[:, 1].max(),
+                       node_AABBs[:, 2].min(), node_AABBs[:, 3].max(),
+                       node_AABBs[:, 4].min(), node_AABBs[:, 5].max()))
+        children.append((-1, -1))
+        ranges.append((len(order), 0))
+
+        if len(indices) <= BVH_LEAF_SIZE:
+            ranges[node] = (len(order), len(indices))
+            order.extend(int(i) for i in indices)
+            return node
+
+        # Split at the median along the axis where the centers
+        # are the most spread out
+        node_centers = centers[indices]
+        axis = int(np.argmax(node_centers.max(axis = 0) - node_centers.min(axis = 0)))
+        sorted_indices = indices[np.argsort(node_centers[:, axis], kind = 'mergesort')]
+        half = len(sorted_indices) // 2
+
+        left = self._build(sorted_indices[:half], AABBs, centers,
+                           bounds, children, ranges, order)
+        right = self._build(sorted_indices[half:], AABBs, centers,
+                            bounds, children, ranges, order)
+        children[node] = (left, right)
+        return node
+
+    def __len__(self):
+        return len(self._items)
+
+    def _query(self, node_test, item_test):
+        ''' Walks the tree, into the nodes for which node_test(node)
+            is true, and returns the items in the leaves for which
+            item_test(position in the reordered items) is true. '''
+
+        out = []
+        if not len(self._items):
+            return out
+
+        items = self._items
+        order = self._item_order
+        children = self._children
+        ranges = self._ranges
+
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if not node_test(node):
+                continue
+            left, right = children[node]
+            if left < 0:
+                first, count = ranges[node]
+                for i in range(first, first + count):
+                    if item_test(i):
+                        out.append(items[order[i]])
+            else:
+                stack.append(right)
+                stack.append(left)
+        return out
+
+    def query_AABB(self, aabb):
+        ''' Returns the items whose AABB overlaps 'aabb'. '''
+        bounds = self._bounds
+        item_AABBs = self._item_AABB_list
+        return self._query(lambda node: AABBs_overlap(bounds[node], aabb),
+                           lambda i: AABBs_overlap(item_AABBs[i], aabb))
+
+    def query_point(self, point):
+        ''' Returns the items whose AABB contains 'point'. '''
+        return self.query_AABB(sphere_AABB(point, 0.0))
+
+    def query_sphere(self, center, radius):
+        ''' Returns the items whose AABB is within 'radius'
+            of 'center'. '''
+        bounds = self._bounds
+        item_AABBs = self._item_AABB_list
+        return self._query(
+                lambda node: _AABB_sphere_distance_ok(bounds[node], center, radius),
+                lambda i: _AABB_sphere_distance_ok(item_AABBs[i], center, radius))
+
+    def query_frustum(self, frustum):
+        ''' Returns the items whose AABB is (at least partly) inside
+            'frustum' (a culling.Frustum, or anything else with an
+            AABBs_visible method). All nodes and items are tested
+            with one call each. '''
+        if not len(self._items):
+            return []
+        visible_nodes = frustum.AABBs_visible(self.bounds)
+        visible_items = frustum.AABBs_visible(self._item_AABBs)
+        return self._query(lambda node: visible_nodes[node],
+                           lambda i: visible_items[i])
+
+class Loose_grid(object):
+    ''' A uniform grid for moving objects. Every item is put in the
+        cell that contains the center of its AABB, and the cells are
+        treated as "loose": a query also looks in the neighbouring
+        cells, as far as the largest item can stick out of its cell.
+        This way an item only has to be moved when its center
+        changes cell, not every time it touches a new cell. '''
+
+    def __init__(self, cell_size = 4.0):
+        self._cell_size = float(cell_size)
+
+        # cell -> {id(item): item}
+        self._cells = {}
+        # id(item) -> (cell, AABB)
+        self._entries = {}
+
+        # Half the size of the largest item seen, how far
+        # the items can stick out of their cells
+        self._looseness = 0.0
+
+    def _cell(self, x, y, z):
+        size = self._cell_size
+        return (int(floor(x / size)), int(floor(y / size)), int(floor(z / size)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return id(item) in self._entries
+
+    def get_cell_size(self):
+        return self._cell_size
+
+    def update(self, item, aabb):
+        ''' Inserts the item, or updates its AABB if
+            it already is in the grid. '''
+
+        aabb = _finite(aabb)
+        half_size = max(aabb[1] - aabb[0], aabb[3] - aabb[2],
+                        aabb[5] - aabb[4]) * 0.5
+        if half_size > self._looseness:
+            self._looseness = half_size
+
+        cell = self._cell((aabb[0] + aabb[1]) * 0.5,
+                          (aabb[2] + aabb[3]) * 0.5,
+                          (aabb[4] + aabb[5]) * 0.5)
+
+        key = id(item)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] != cell:
+            self._remove_from_cell(entry[0], key)
+            entry = None
+        if entry is None:
+            self._cells.setdefault(cell, {})[key] = item
+        self._entries[key] = (cell, aabb)
+
+    def remove(self, item):
+        ''' Removes the item from the grid, if it is there. '''
+        key = id(item)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._remove_from_cell(entry[0], key)
+
+    def _remove_from_cell(self, cell, key):
+        items = self._cells[cell]
+        del items[key]
+        if not items:
+            del self._cells[cell]
+
+    def items(self):
+        ''' Returns all items in the grid. '''
+        return [item for cell in self._cells.values()
+                        for item in cell.values()]
+
+    def _cells_near(self, aabb):
+        ''' Returns the occupied cells that may hold items
+            overlapping 'aabb'. '''
+
+        loose = self._looseness
+        low = self._cell(aabb[0] - loose, aabb[2] - loose, aabb[4] - loose)
+        high = self._cell(aabb[1] + loose, aabb[3] + loose, aabb[5] + loose)
+
+        cell_count = (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * \
+                     (high[2] - low[2] + 1)
+        if cell_count > len(self._cells):
+            # Cheaper to look at every occupied cell
+            return [items for cell, items in self._cells.items()
+                        if low[0] <= cell[0] <= high[0] and
+                           low[1] <= cell[1] <= high[1] and
+                           low[2] <= cell[2] <= high[2]]
+
+        cells = self._cells
+        out = []
+        for x in range(low[0], high[0] + 1):
+            for y in range(low[1], high[1] + 1):
+                for z in range(low[2], high[2] + 1):
+                    items = cells.get((x, y, z))
+                    if items:
+                        out.append(items)
+        return out
+
+    def query_AABB(self, aabb):
+        ''' Returns the items whose AABB overlaps 'aabb'. '''
+        aabb = _finite(aabb)
+        entries = self._entries
+        return [item for items in self._cells_near(aabb)
+                    for key, item in items.items()
+                        if AABBs_overlap(entries[key][1], aabb)]
+
+    def query_point(self, point):
+        ''' Returns the items whose AABB contains 'point'. '''
+        return self.query_AABB(sphere_AABB(point, 0.0))
+
+    def query_sphere(self, center, radius):
+        ''' Returns the items whose AABB is within 'radius'
+            of 'center'. '''
+        entries = self._entries
+        return [item for items in self._cells_near(sphere_AABB(center, radius))
+                    for key, item in items.items()
+                        if _AABB_sphere_distance_ok(entries[key][1], center, radius)]
+
+    def query_frustum(self, frustum):
+        ''' Returns the items whose AABB is (at least partly) inside
+            'frustum' (a culling.Frustum). Only the items in the
+            cells near the AABB of the frustum are tested, with
+            one call. '''
+        candidates = [(key, item) for items in self._cells_near(_finite(frustum.get_AABB()))
+                                      for key, item in items.items()]
+        if not candidates:
+            return []
+        entries = self._entries
+        visible = frustum.AABBs_visible([entries[key][1] for key, item in candidates])
+        return [item for (key, item), v in zip(candidates, visible) if v]
+
+class Spatial_index(object):
+    ''' The spatial index of a scene: a BVH over the static
+        objects, built once, and a loose grid over all other
+        objects, updated with update(). The queries return
+        the objects from both. '''
+
+    def __init__(self, cell_size = 4.0):
+        self._static = BVH((), ())
+        self._static_ids = set()
+        self._moving = Loose_grid(cell_size)
+        self._moving_objects = {}
+
+    def build(self, static_objects):
+        ''' Builds the BVH over 'static_objects' (objects with a
+            geom that never moves). '''
+
+        static_objects = [obj for obj in static_objects if obj.get_geom()]
+        self._static = BVH(static_objects,
+                           [obj.get_geom().getAABB() for obj in static_objects])
+        self._static_ids = set(id(obj) for obj in static_objects)
+
+        for obj in static_objects:
+            self._moving.remove(obj)
+
+    def update(self, object_list, moved = None):
+        ''' Puts all objects in 'object_list' that aren't static
+            (and have a geom) in the grid, with their current
+            AABBs, and removes the objects that are no longer in
+            the list. 'moved' is the set of objects that may have
+            moved since the last update, if given only those (and
+            the objects that are new) get their AABBs updated. '''
+
+        grid = self._moving
+        static_ids = self._static_ids
+        previous = self._moving_objects
+        current = {}
+        for obj in object_list:
+            key = id(obj)
+            if key in static_ids:
+                continue
+            if moved is not None and key in previous and obj not in moved:
+                current[key] = obj
+                continue
+            get_geom = getattr(obj, 'get_geom', None)
+            geom = get_geom() if get_geom else None
+            if not geom:
+                continue
+            grid.update(obj, geom.getAABB())
+            current[key] = obj
+
+        for key, obj in previous.items():
+            if key not in current:
+                grid.remove(obj)
+        self._moving_objects = current
+
+    def __contains__(self, obj):
+        return id(obj) in self._static_ids or obj in self._moving
+
+    def get_static(self):
+        return self._static
+
+    def get_moving(self):
+        return self._moving
+
+    def query_AABB(self, aabb):
+        return self._static.query_AABB(aabb) + self._moving.query_AABB(aabb)
+
+    def query_point(self, point):
+        return self._static.query_point(point) + self._moving.query_point(point)
+
+    def query_sphere(self, center, radius):
+        return self._static.query_sphere(center, radius) + \
+               self._moving.query_sphere(center, radius)
+
+    def query_frustum(self, frustum):
+        return self._static.query_frustum(frustum) + \
+               self._moving.query_frustum(frustum)
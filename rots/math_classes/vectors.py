@@ -13,6 +13,11 @@ class Vector:
 
         self.value = value
 
+    def __iter__(self):
+        ''' Iterates over the components, makes it possible to
+        unpack the vector as x, y, z = vector. '''
+        return iter(self.value)
+
     def dim(self):
         ''' Returns the dimension of the vector. '''
         return len(self.value)
@@ -30,7 +35,7 @@ class Vector:
     def dot(self, v2):
         ''' Calculates the dot product of the vector and v2 '''
         
-        assert isinstance(v2, Vector), 'Input must be a vector'
+        assert isinstance(v2, (Vector, Vector3)), 'Input must be a vector'
         assert self.dim() ==  v2.dim(), \
                 'Vectors must be of the same dimension'
 
@@ -44,7 +49,7 @@ class Vector:
         Note that it is calculated as (self x V2), since the cross product
         isn't commutative '''
         
-        assert isinstance(v, Vector), 'Input must be a vector'
+        assert isinstance(v, (Vector, Vector3)), 'Input must be a vector'
         assert self.dim() == 3 and v.dim() == 3, \
                 'Cross product is only defined in 3 dimensions.'
 
@@ -85,7 +90,7 @@ class Vector:
         #assert isinstance(v2, Vector), 'Input must be a vector'
         # NOTE: We must be able to compare vectors with other
         # objects, such as None.
-        if isinstance(v2, Vector):
+        if isinstance(v2, (Vector, Vector3)):
             return self.value == v2.value
         else:
             return False
@@ -96,7 +101,7 @@ class Vector:
         #assert isinstance(v2, Vector), 'Input must be a vector'
         # NOTE: We must be able to compare vectors with other
         # objects, such as None.
-        if isinstance(v2, Vector):
+        if isinstance(v2, (Vector, Vector3)):
             return self.value != v2.value
         else:
             return True
@@ -120,7 +125,7 @@ class Vector:
     def __add__(self, v2):
         ''' Returns the vector added with the given other vector.
         Overloads "+". '''
-        assert isinstance(v2, Vector), 'Input must be a vector.'
+        assert isinstance(v2, (Vector, Vector3)), 'Input must be a vector.'
         assert self.dim() == v2.dim(), \
                 'Vectors must be of the same dimension'
 
@@ -132,7 +137,7 @@ class Vector:
     def __sub__(self, v2):
         ''' Returns the difference between the vector and the
         given other vector. Overloads "-". '''
-        assert isinstance(v2, Vector), 'Input must be a vector.'
+        assert isinstance(v2, (Vector, Vector3)), 'Input must be a vector.'
         assert self.dim() == v2.dim(), \
                 'Vectors must be of the same dimension'
 
@@ -144,7 +149,7 @@ class Vector:
         independant base vectors.'''
         if __debug__:
             for v in base:
-                assert isinstance(v, Vector), 'Input must be a vector.'
+                assert isinstance(v, (Vector, Vector3)), 'Input must be a vector.'
                 assert self.dim() == v.dim(), 'Vectors must be of the same dimension'
                 assert v.is_not_zero(), "Input can't be the the zero vector"
 
@@ -192,3 +197,195 @@ class Vector:
     def __str__(self):
         ''' Returns the string representation of the vector.'''
         return self.value.__str__()
+
+
+class Vector3(object):
+    ''' A fixed size 3D vector with the same interface as Vector.
+    The components are stored in slots instead of a tuple and
+    no type checks are done, which makes it a lot cheaper to use
+    in the physics and rendering code that runs every frame.
+
+    NOTE: Unlike Vector, a Vector3 is mutable through the in-place
+    operators (+=, -=, *=). Only use those on vectors that
+    no one else holds a reference to. '''
+
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, value = (0.0, 0.0, 0.0)):
+        ''' Initializes the vector, sets its value. The value can be
+        any sequence of three numbers, or another vector. '''
+        self.x, self.y, self.z = value
+
+    def _get_value(self):
+        return (self.x, self.y, self.z)
+
+    def _set_value(self, value):
+        self.x, self.y, self.z = value
+
+    # Gives the same access to the components as Vector
+    value = property(_get_value, _set_value)
+
+    def __iter__(self):
+        ''' Iterates over the components, makes it possible to
+        unpack the vector as x, y, z = vector. '''
+        yield self.x
+        yield self.y
+        yield self.z
+
+    def copy(self):
+        ''' Returns a new vector with the same value. '''
+        return Vector3((self.x, self.y, self.z))
+
+    def dim(self):
+        ''' Returns the dimension of the vector, always 3. '''
+        return 3
+
+    def is_zero(self):
+        ''' Checks whether or not the vector is the zero vector:
+        Returns True if it is, False if it isn't. '''
+        return self.x == 0 and self.y == 0 and self.z == 0
+
+    def is_not_zero(self):
+        ''' Checks whether or not the vector is the zero vector:
+        Returns False if it is, True if it isn't. '''
+        return self.x != 0 or self.y != 0 or self.z != 0
+
+    def dot(self, v):
+        ''' Calculates the dot product of the vector and v '''
+        if type(v) is not Vector3:
+            v = Vector3(v.value)
+        return self.x * v.x + self.y * v.y + self.z * v.z
+
+    def cross(self, v):
+        ''' Calculates the cross product of the vector and another vector v.
+        Note that it is calculated as (self x v), since the cross product
+        isn't commutative '''
+        if type(v) is not Vector3:
+            v = Vector3(v.value)
+        return Vector3((self.y * v.z - self.z * v.y,
+                        self.z * v.x - self.x * v.z,
+                        self.x * v.y - self.y * v.x))
+
+    def norm(self):
+        ''' Calculates the norm of the vector '''
+        return sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def square_norm(self):
+        ''' Calculates the squared norm of the vector.
+        Cheaper than using self.norm() since the expensive
+        sqrt() isn't needed. '''
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
+    def normalize(self):
+        ''' Returns a normalized version of the the vector.
+        Returns None if the vector is the zero vector
+        (just like Vector.normalize()). '''
+        n = sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+        if n < 0.0000001:
+            return None     # To avoid float division by zero
+        return Vector3((self.x / n, self.y / n, self.z / n))
+
+    def __eq__(self, v):
+        ''' Checks if two vectors have the same value, overloads "==".
+        Can be compared with other objects, such as None. '''
+        if isinstance(v, (Vector, Vector3)):
+            return self.value == tuple(v.value)
+        else:
+            return False
+
+    def __ne__(self, v):
+        ''' Checks if two vectors do not have the same value.
+        Overloads "!=". '''
+        return not self.__eq__(v)
+
+    def __mul__(self, scalar):
+        ''' Returns the vector multiplied with the given scalar.
+        Overloads "*". '''
+        return Vector3((self.x * scalar, self.y * scalar, self.z * scalar))
+
+    __rmul__ = __mul__
+
+    def __imul__(self, scalar):
+        ''' Multiplies the vector with the given scalar in place.
+        Overloads "*=". '''
+        self.x *= scalar
+        self.y *= scalar
+        self.z *= scalar
+        return self
+
+    def __neg__(self):
+        '''Returns the vector in negative direction.
+        Overloads "-". '''
+        return Vector3((-self.x, -self.y, -self.z))
+
+    def __add__(self, v):
+        ''' Returns the vector added with the given other vector.
+        Overloads "+". '''
+        if type(v) is not Vector3:
+            v = Vector3(v.value)
+        return Vector3((self.x + v.x, self.y + v.y, self.z + v.z))
+
+    def __iadd__(self, v):
+        ''' Adds the given other vector to the vector in place.
+        Overloads "+=". '''
+        if type(v) is not Vector3:
+            v = Vector3(v.value)
+        self.x += v.x
+        self.y += v.y
+        self.z += v.z
+        return self
+
+    def __sub__(self, v):
+        ''' Returns the difference between the vector and the
+        given other vector. Overloads "-". '''
+        if type(v) is not Vector3:
+            v = Vector3(v.value)
+        return Vector3((self.x - v.x, self.y - v.y, self.z - v.z))
+
+    def __isub__(self, v):
+        ''' Subtracts the given other vector from the vector in place.
+        Overloads "-=". '''
+        if type(v) is not Vector3:
+            v = Vector3(v.value)
+        self.x -= v.x
+        self.y -= v.y
+        self.z -= v.z
+        return self
+
+    def projected(self, *base):
+        ''' Returns the projection of the vector on the vector space
+        defined by the supplied vectors. Assumes orthogonal and linearly
+        independant base vectors.'''
+        proj = Vector3()
+        for v in base:
+            proj += v * (float(self.dot(v)) / v.dot(v))
+        return proj
+
+    def triple_product_1(self, v2, v3):
+        ''' Calculates the triple product self x (v2 x v3)
+        in a faster and simpler way.'''
+        return v2 * self.dot(v3) - v3 * self.dot(v2)
+
+    def triple_product_2(self, v2, v3):
+        ''' Calculates the triple product (self x v2) x v3
+        in a faster and simpler way.'''
+        return v2 * self.dot(v3) - self * v2.dot(v3)
+
+    def left_matrix_mult(self, matrix):
+        ''' Calculates the vector multiplied with the matrix
+        to the left. (matrix * vector)
+
+        Input:  self: The vector
+                matrix: A 3x3 matrix represented as a list of lists.
+
+        Output: A vector defined by (matrix * vector).
+                (The vector transformed by the matrix)'''
+        r0, r1, r2 = matrix[0], matrix[1], matrix[2]
+        x, y, z = self.x, self.y, self.z
+        return Vector3((r0[0] * x + r0[1] * y + r0[2] * z,
+                        r1[0] * x + r1[1] * y + r1[2] * z,
+                        r2[0] * x + r2[1] * y + r2[2] * z))
+
+    def __str__(self):
+        ''' Returns the string representation of the vector.'''
+        return (self.x, self.y, self.z).__str__()
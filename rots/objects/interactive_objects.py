@@ -7,13 +7,13 @@ import math
 
 from math_classes import matrices
 from math_classes.vectors import Vector
-from graphics import draw, textures
+from graphics import draw, materials, meshes, textures
 from sound import sound_effects
 
 def do_nothing():
     pass
 
-class Interactive_object(object):
+class Interactive_object(meshes.Mesh_user):
     ''' A base class for all interactive objects in the game,
         such as buttons, levers etc. '''
 
@@ -23,18 +23,21 @@ class Interactive_object(object):
 
         self._geom = None
 
-        self._ambient = None
-        self._diffuse = None
-        self._specular = None
-        self._shininess = None
-        self._emissive = None
+        self._material = None
 
         self._texture = None
 
-        self._display_list_index = None
+        self._mesh = None
+
+        # The rotation in OpenGL form, only recalculated when it changes
+        self._orientation_cache = matrices.Orientation_cache()
 
         self._AABB_color = (1.0, 1.0, 0.0, 1.0)
-        self._AABB_display_list_index = self.create_AABB_display_list_index()
+        # Render resources, created when they are first drawn
+        self._AABB_display_list_index = None
+
+    def get_geom(self):
+        return self._geom
 
     def get_texture(self):
         return self._texture
@@ -43,12 +46,13 @@ class Interactive_object(object):
         return Vector(self._geom.getPosition())
 
     def get_orientation(self):
-        orientation = matrices.ODE_to_OpenGL(self._geom.getRotation())
-        return orientation
+        return self._orientation_cache.get(self._geom.getRotation())
+
+    def get_material(self):
+        return self._material
 
     def get_material_properties(self):
-        return self._ambient, self._diffuse, self._specular,\
-               self._shininess, self._emissive
+        return self._material.get_properties()
 
     def get_AABB_color(self):
         return self._AABB_color
@@ -68,7 +72,7 @@ class Interactive_object(object):
         glTranslatef(pos[0], pos[1], pos[2])
         rotMatrix = self.get_orientation()
         glMultMatrixf(rotMatrix)
-        glCallList(self._display_list_index)
+        self.draw_geometry()
 
     def set_data(self, name, value):
         ''' Sets an attribute of the interactive object's geom,
@@ -85,6 +89,8 @@ class Interactive_object(object):
         glTranslatef(pos[0], pos[1], pos[2])
         glScale(x_size, y_size, z_size)
 
+        if self._AABB_display_list_index is None:
+            self._AABB_display_list_index = self.create_AABB_display_list_index()
         glCallList(self._AABB_display_list_index)
 
     def collide_func(self):
@@ -121,7 +127,6 @@ class Button(Interactive_object):
         self._subdivision_size = subdivision_size
 
         self._pressed = False
-        self._pressed_last_frame = False
 
         self._action = action
         self._args = args
@@ -149,20 +154,13 @@ class Button(Interactive_object):
         self._geom.setPosition(self._pos.value)
         self._geom.setRotation(rotation)
 
-        self._ambient = [1.0, 1.0, 1.0, 1.0]
-        self._diffuse = [1.0, 1.0, 1.0, 1.0]
-        self._specular = [1.0, 1.0, 1.0, 1.0]
-        self._shininess = 0
-        self._emissive = [0.0, 0.0, 0.0, 1.0]
-
-        self._display_list_index = self.create_displaylist_index()
+        self._material = materials.get_material(ambient = [1.0, 1.0, 1.0, 1.0],
+                                                diffuse = [1.0, 1.0, 1.0, 1.0],
+                                                specular = [1.0, 1.0, 1.0, 1.0],
+                                                shininess = 0,
+                                                emissive = [0.0, 0.0, 0.0, 1.0])
 
-    def create_displaylist_index(self):
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.box(self)
-        glEndList()
-        return display_list_index
+        self.create_geometry()
 
     def get_sides(self):
         return self._x_size, self._y_size, self._z_size
@@ -170,18 +168,16 @@ class Button(Interactive_object):
     def get_subdivision_size(self):
         return self._subdivision_size
 
+    def create_mesh(self):
+        x_size, y_size, z_size = self.get_sides()
+        return meshes.acquire_box(x_size, y_size, z_size, self._subdivision_size)
+
     def set_pressed(self, pressed):
         self._pressed = pressed
 
-    def set_pressed_last_frame(self, pressed):
-        self._pressed_last_frame = pressed
-
     def get_pressed(self):
         return self._pressed
 
-    def get_pressed_last_frame(self):
-        return self._pressed_last_frame
-
     def collide_func(self):
         ''' The function that is called when the button is pressed '''
 
@@ -204,4 +200,4 @@ class Button(Interactive_object):
         glTranslatef(pos[0], pos[1], pos[2])
         rotMatrix = self.get_orientation()
         glMultMatrixf(rotMatrix)
-        glCallList(self._display_list_index)
+        self.draw_geometry()
@@ -3,17 +3,15 @@ from OpenGL.GLU import *
 from OpenGL.GLUT import *
 import ode
 
-from math import sin, cos, pi, asin, acos
+from math import asin, acos
 
 from math_classes import matrices
 from math_classes.vectors import Vector
-from graphics import draw, textures
+from graphics import draw, materials, meshes, textures
+from physics_engine import kinematic, physics_materials
 from sound import sound_effects
 
-# TODO: Make the 'moving time' be a number in seconds
-# instead of frames, for example by using the current fps.
-
-class Moving_scene(object):
+class Moving_scene(meshes.Mesh_user):
     ''' Base class for all objects in the 
         'static' scene that are supposed
         to be able to move, such as doors,
@@ -25,24 +23,34 @@ class Moving_scene(object):
 
         self._geom = None
 
-        self._ambient = None
-        self._diffuse = None
-        self._specular = None
-        self._shininess = None
-        self._emissive = None
+        # Moves the geom along a curve, see kinematic.py
+        self._kinematic = None
+        self._body = None
+
+        self._material = None
 
         self._texture = None
 
-        self._display_list_index = None
+        self._mesh = None
+
+        # The rotation in OpenGL form, only recalculated when it changes
+        self._orientation_cache = matrices.Orientation_cache()
 
         self._AABB_color = (0.0, 0.0, 1.0, 1.0)
-        self._AABB_display_list_index = self.create_AABB_display_list_index()
+        # Render resources, created when they are first drawn
+        self._AABB_display_list_index = None
 
-        self._friction = 1
-        self._bounce = 0.2
+        # Friction, bounce etc., see physics_materials.py
+        self._physics_material = physics_materials.get_material()
 
         self._velocity = Vector()
 
+    def get_geom(self):
+        return self._geom
+
+    def get_body(self):
+        return self._body
+
     def get_texture(self):
         return self._texture
 
@@ -50,18 +58,22 @@ class Moving_scene(object):
         return Vector(self._geom.getPosition())
 
     def get_orientation(self):
-        orientation = matrices.ODE_to_OpenGL(self._geom.getRotation())
-        return orientation
+        return self._orientation_cache.get(self._geom.getRotation())
+
+    def get_material(self):
+        return self._material
 
     def get_material_properties(self):
-        return self._ambient, self._diffuse, self._specular,\
-               self._shininess, self._emissive
+        return self._material.get_properties()
+
+    def get_physics_material(self):
+        return self._physics_material
 
     def get_friction(self):
-        return self._friction
+        return self._physics_material.get_friction()
 
     def get_bounce(self):
-        return self._bounce
+        return self._physics_material.get_bounce()
 
     def get_velocity(self):
         return self._velocity
@@ -72,11 +84,14 @@ class Moving_scene(object):
     def set_AABB_color(self, color):
         self._AABB_color = color
 
+    def set_physics_material(self, physics_material):
+        self._physics_material = physics_material
+
     def set_friction(self, friction):
-        self._friction = friction
+        self._physics_material = self._physics_material.with_friction(friction)
 
     def set_bounce(self, bounce):
-        self._bounce = bounce
+        self._physics_material = self._physics_material.with_bounce(bounce)
 
     def create_AABB_display_list_index(self):
         AABB_display_list_index = glGenLists(1)
@@ -86,12 +101,11 @@ class Moving_scene(object):
         return AABB_display_list_index
 
     def draw(self):
-        self.update()
         pos = self.get_pos().value
         glTranslatef(pos[0], pos[1], pos[2])
         rotMatrix = self.get_orientation()
         glMultMatrixf(rotMatrix)
-        glCallList(self._display_list_index)
+        self.draw_geometry()
 
     def set_data(self, name, value):
         ''' Sets an attribute of the object's geom,
@@ -108,18 +122,21 @@ class Moving_scene(object):
         glTranslatef(pos[0], pos[1], pos[2])
         glScale(x_size, y_size, z_size)
 
+        if self._AABB_display_list_index is None:
+            self._AABB_display_list_index = self.create_AABB_display_list_index()
         glCallList(self._AABB_display_list_index)
 
-    def update(self):
+    def update(self, dt):
+        ''' Moves the object dt seconds forward in time. '''
         pass
 
 class Sliding_door(Moving_scene):
     ''' A class for sliding doors. '''
 
-    def __init__(self, space, pos = Vector(), normal = Vector((0.0, 1.0, 0.0)), 
+    def __init__(self, world, space, pos = Vector(), normal = Vector((0.0, 1.0, 0.0)), 
                 slide_dir = Vector((1.0, 0.0, 0.0)), slide_size = 5,
                 ort_size = 5, thickness = 0.5, texture = None,
-                opening_time = 30, subdivision_size = 1):
+                opening_time = 0.5, subdivision_size = 1):
 
         super(Sliding_door, self).__init__()
         
@@ -134,15 +151,13 @@ class Sliding_door(Moving_scene):
         self._open = False
         self._toggling = False  # Opening or closing
 
-        self._opening_time = opening_time   # Time, in frames, to open/close the door
-        self._opening_counter = 0
+        self._opening_time = opening_time   # Time, in seconds, to open/close the door
+        self._opening_timer = 0.0
 
         # Set ODE properties
         self._space = space
         self._geom = ode.GeomBox(self._space, (self._ort_size, 
                                 self._thickness, self._slide_size))
-        self._body = None
-        self._geom.setBody(self._body)
         self._subdivision_size = subdivision_size
 
         self.set_data('object', self)
@@ -167,62 +182,47 @@ class Sliding_door(Moving_scene):
         self._pos = self._pos + self._normal * self._thickness * 0.5 # To prevent it from being inside the wall
         self._closed_pos = self._pos
 
+        # The moves between the closed and the open position
+        open_pos = self._closed_pos + self._slide_dir * self._slide_size
+        self._opening = kinematic.Ease(self._closed_pos, open_pos, self._opening_time)
+        self._closing = kinematic.Ease(open_pos, self._closed_pos, self._opening_time)
+
         self._geom.setPosition(self._pos.value)
         self._geom.setRotation(rotation)
+        self._kinematic = kinematic.Kinematic_body(world, self._geom)
+        self._body = self._kinematic.get_body()
 
-        self._ambient = [1.0, 0.5, 0.5, 1.0]
-        self._diffuse = [1.0, 0.5, 0.5, 1.0]
-        self._specular = [1.0, 1.0, 1.0, 1.0]
-        self._shininess = 10
-        self._emissive = [0.0, 0.0, 0.0, 1.0]
+        self._material = materials.get_material(ambient = [1.0, 0.5, 0.5, 1.0],
+                                                diffuse = [1.0, 0.5, 0.5, 1.0],
+                                                specular = [1.0, 1.0, 1.0, 1.0],
+                                                shininess = 10,
+                                                emissive = [0.0, 0.0, 0.0, 1.0])
 
-        self._display_list_index = self.create_displaylist_index()
+        self.create_geometry()
 
-    def update(self):
+    def update(self, dt):
         ''' Checks if the door should be opening or closing,
-            if so do that, otherwise pass. '''
+            if so move it dt seconds further, otherwise pass. '''
 
         # Check if it should be toggling
         if self._toggling:
-            # Check in which state it is
-            if self._open:
-                # It is open, close it
-                self._opening_counter += 1
-                self._pos = self._closed_pos + self._slide_dir * \
-                            (1 + cos(pi * (float(self._opening_counter)/self._opening_time))) \
-                            * self._slide_size * 0.5
-
-                self._velocity = self._slide_dir * \
-                        -sin(pi * (float(self._opening_counter)/self._opening_time)) * \
-                                self._slide_size * 0.5
-
-                # Check if it is closed
-                if self._opening_counter == self._opening_time:
-                    self._opening_counter = 0
-                    self._toggling = False
-                    self._open = False
-
-            else:
-                # It is closed, open it
-                self._opening_counter += 1
-                self._pos = self._closed_pos + self._slide_dir * \
-                            (1 + sin(pi * (((float(self._opening_counter)/self._opening_time)) - 0.5))) \
-                            * self._slide_size * 0.5
-
-                self._velocity = self._slide_dir * \
-                    cos(pi * (((float(self._opening_counter)/self._opening_time)) - 0.5)) * \
-                        self._slide_size * 0.5
-
-                # Check if it is open
-                if self._opening_counter == self._opening_time:
-                    self._opening_counter = 0
-                    self._toggling = False
-                    self._open = True
+            # Check in which state it is: if it is open, close it
+            curve = self._closing if self._open else self._opening
+            time = self._opening_timer
+            self._opening_timer = min(time + dt, self._opening_time)
+
+            # Check if it has reached the other position
+            if time >= self._opening_time:
+                self._opening_timer = 0.0
+                self._toggling = False
+                self._open = not self._open
         else:
-            # Isn't toggling, therefore not moving
-            self._velocity = Vector()
+            # Isn't toggling, it stands still at the end of the last move
+            curve = self._opening if self._open else self._closing
+            time = self._opening_time
 
-        self._geom.setPosition(self._pos.value)
+        self._velocity = curve.get_velocity(time)
+        self._kinematic.move_along(curve, time)
 
     def toggle(self):
         ''' Toggles the door: Opens it if it is closed and vice versa.
@@ -250,22 +250,16 @@ class Sliding_door(Moving_scene):
     def get_subdivision_size(self):
         return self._subdivision_size
 
-    def create_displaylist_index(self):
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.box(self)
-        glEndList()
-        return display_list_index
+    def create_mesh(self):
+        x_size, y_size, z_size = self.get_sides()
+        return meshes.acquire_box(x_size, y_size, z_size, self._subdivision_size)
 
 class Moving_platform(Moving_scene):
 
-    # TODO: There are some odd effects when using the platform:
-    # the player starts bouncing and sliding. Fix this.
-
-    def __init__(self, space, normal = Vector((0.0, 1.0, 0.0)), 
+    def __init__(self, world, space, normal = Vector((0.0, 1.0, 0.0)), 
                 forward = Vector((1.0, 0.0, 0.0)),
                 width = 5, length = 5, thickness = 0.5, texture = None,
-                move_time = 480, turning_points = (Vector((0.0, 2.0, 0.0)), Vector((0.0, 10.0, 0.0))),
+                move_time = 8.0, turning_points = (Vector((0.0, 2.0, 0.0)), Vector((0.0, 10.0, 0.0))),
                 subdivision_size = 1):
 
         super(Moving_platform, self).__init__()
@@ -273,8 +267,6 @@ class Moving_platform(Moving_scene):
         # Set ODE properties
         self._space = space
         self._geom = ode.GeomBox(self._space, (width, thickness, length))
-        self._body = None
-        self._geom.setBody(self._body)
 
         self._normal = normal
         self._forward = forward
@@ -282,16 +274,14 @@ class Moving_platform(Moving_scene):
         self._thickness = thickness
         self._length = length
         self._texture = texture
-        self._move_time = move_time
-        self._counter = 0
+        self._move_time = move_time     # Time, in seconds, to move between the turning points
+        self._time = 0.0
         self._turning_points = turning_points
-        self._move_dist = (turning_points[1] - turning_points[0]).norm() / 2.0
-        self._move_dir = (turning_points[1] - turning_points[0]).normalize()
+        self._curve = kinematic.Oscillation(turning_points[0], turning_points[1], move_time)
         self._middle_point = (turning_points[1] + turning_points[0]) * 0.5
-        self._pos = self._middle_point
         self._subdivision_size = subdivision_size
 
-        self._bounce = 0.0
+        self.set_bounce(0.0)
 
         # Calculate the rotation matrix in the first direction needed to align the 
         # bounding box with the object
@@ -311,14 +301,16 @@ class Moving_platform(Moving_scene):
 
         self._geom.setPosition(self._middle_point.value)
         self._geom.setRotation(rotation)
+        self._kinematic = kinematic.Kinematic_body(world, self._geom)
+        self._body = self._kinematic.get_body()
 
-        self._ambient = [0.0, 1.0, 0.2, 1.0]
-        self._diffuse = [0.0, 1.0, 0.2, 1.0]
-        self._specular = [1.0, 1.0, 1.0, 1.0]
-        self._shininess = 10
-        self._emissive = [0.0, 0.0, 0.0, 1.0]
+        self._material = materials.get_material(ambient = [0.0, 1.0, 0.2, 1.0],
+                                                diffuse = [0.0, 1.0, 0.2, 1.0],
+                                                specular = [1.0, 1.0, 1.0, 1.0],
+                                                shininess = 10,
+                                                emissive = [0.0, 0.0, 0.0, 1.0])
 
-        self._display_list_index = self.create_displaylist_index()
+        self.create_geometry()
 
         self.set_data('object', self)
 
@@ -328,45 +320,16 @@ class Moving_platform(Moving_scene):
     def get_subdivision_size(self):
         return self._subdivision_size
 
-    def create_displaylist_index(self):
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.box(self)
-        glEndList()
-        return display_list_index
-
-    def update(self):
-
-        old_pos = self._pos
-
-        self._pos = self._middle_point + self._move_dir * \
-                    sin(pi * self._counter / self._move_time) * \
-                    self._move_dist * -1.0
+    def create_mesh(self):
+        x_size, y_size, z_size = self.get_sides()
+        return meshes.acquire_box(x_size, y_size, z_size, self._subdivision_size)
 
-        # NOTE: Something wrong here...
-        #self._velocity =  self._move_dir * \
-        #        cos(pi * self._counter / self._move_time) * \
-        #                    self._move_dist * -1.0
-
-        #curr_vel = (self._pos - old_pos) * 60
-
-        self._velocity = (self._pos - old_pos) * 60
-
-        # try:
-        #     error_factor = self._velocity.norm()/curr_vel.norm()
-        # except ZeroDivisionError:
-        #     print 'Division by zero'
-        #     error_factor = None
-
-        # print 'Pos: ', self._pos
-        # print 'Vel: ', self._velocity
-        # print 'Vel (should be): ', curr_vel
-        # print 'Error factor: ', error_factor
-        # print
-
-        self._geom.setPosition(self._pos.value)
+    def update(self, dt):
+        ''' Moves the platform dt seconds further. '''
 
-        self._counter += 1
+        self._velocity = self._curve.get_velocity(self._time)
+        self._kinematic.move_along(self._curve, self._time)
 
-        if self._counter >= self._move_time * 2:
-            self._counter = 0
+        self._time += dt
+        if self._time >= self._curve.get_period():
+            self._time -= self._curve.get_period()
@@ -8,11 +8,11 @@ from random import randrange
 
 from math_classes import matrices
 from math_classes.vectors import Vector
-from graphics import draw, textures
+from graphics import draw, materials, meshes, textures
 from sound import sound_effects
 import shapes
 
-class Power_up(object):
+class Power_up(meshes.Mesh_user):
     ''' Base class for all power ups '''
 
     def __init__(self):
@@ -21,21 +21,24 @@ class Power_up(object):
 
         self._geom = None
 
-        self._ambient = None
-        self._diffuse = None
-        self._specular = None
-        self._shininess = None
-        self._emissive = None
+        self._material = None
 
         self._texture = None
 
-        self._display_list_index = None
+        self._mesh = None
+
+        # The rotation in OpenGL form, only recalculated when it changes
+        self._orientation_cache = matrices.Orientation_cache()
 
         self._collided = False
         self._activation_sound = None
 
         self._AABB_color = (0.0, 1.0, 0.0, 1.0)
-        self._AABB_display_list_index = self.create_AABB_display_list_index()
+        # Render resources, created when they are first drawn
+        self._AABB_display_list_index = None
+
+    def get_geom(self):
+        return self._geom
 
     def get_texture(self):
         return self._texture
@@ -44,12 +47,13 @@ class Power_up(object):
         return Vector(self._geom.getPosition())
 
     def get_orientation(self):
-        orientation = matrices.ODE_to_OpenGL(self._geom.getRotation())
-        return orientation
+        return self._orientation_cache.get(self._geom.getRotation())
+
+    def get_material(self):
+        return self._material
 
     def get_material_properties(self):
-        return self._ambient, self._diffuse, self._specular,\
-               self._shininess, self._emissive
+        return self._material.get_properties()
 
     def get_collided(self):
         return self._collided
@@ -75,7 +79,7 @@ class Power_up(object):
         glTranslatef(pos[0], pos[1], pos[2])
         rotMatrix = self.get_orientation()
         glMultMatrixf(rotMatrix)
-        glCallList(self._display_list_index)
+        self.draw_geometry()
 
     def collide_func(self, game):
         ''' The function that is called whe the player
@@ -86,6 +90,9 @@ class Power_up(object):
         object_list = game.get_object_list()
         object_list.remove(self)
         self._space.remove(self._geom)
+        self.delete_geometry()
+        textures.release_texture(self._texture)
+        self._texture = None
         del self
 
     def set_data(self, name, value):
@@ -103,6 +110,8 @@ class Power_up(object):
         glTranslatef(pos[0], pos[1], pos[2])
         glScale(x_size, y_size, z_size)
 
+        if self._AABB_display_list_index is None:
+            self._AABB_display_list_index = self.create_AABB_display_list_index()
         glCallList(self._AABB_display_list_index)
 
 class Gravity_flipper(Power_up):
@@ -119,41 +128,33 @@ class Gravity_flipper(Power_up):
         self._geom.setBody(None)
         self._geom.setPosition(pos.value)
 
-        self._texture = textures.load_texture('arrows_3.png')
-        self._quadric = gluNewQuadric()
+        # A region of the atlas shared with the other power ups
+        self._texture = textures.acquire_region('arrows_3.png')
 
         self._draw_pos = self.get_pos()
         # To compensate for the texture being drawn 'sideways'
-        self._draw_orientation = matrices.\
-                generate_rotation_matrix(Vector([-1.0, 0.0, 0.0]),
-                                                pi/2.0)
+        self._draw_orientation = matrices.Matrix4.\
+                from_rotation(Vector([-1.0, 0.0, 0.0]), pi/2.0).value
         self._oscillation_angle = 0
         self._oscillation_amplitude = self._radius
 
-        self._ambient = [1.0, 1.0, 1.0, 1.0]
-        self._diffuse = [1.0, 1.0, 1.0, 1.0]
-        self._specular = [1.0, 1.0, 1.0, 1.0]
-        self._shininess = 0
-        self._emissive = [1.0, 1.0, 1.0, 1.0]
+        self._material = materials.get_material(ambient = [1.0, 1.0, 1.0, 1.0],
+                                                diffuse = [1.0, 1.0, 1.0, 1.0],
+                                                specular = [1.0, 1.0, 1.0, 1.0],
+                                                shininess = 0,
+                                                emissive = [1.0, 1.0, 1.0, 1.0])
 
         self._activation_sound = sound_effects.load_sound('fall_2.wav')
 
-        self._display_list_index = self.create_displaylist_index()
+        self.create_geometry()
 
         self.set_data('object', self)
 
     def get_radius(self):
         return self._radius
 
-    def get_quadric(self):
-        return self._quadric
-
-    def create_displaylist_index(self):
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.sphere(self)
-        glEndList()
-        return display_list_index
+    def create_mesh(self):
+        return meshes.acquire_sphere(self._radius)
 
     def draw(self):
         pos = (self.get_pos() + Vector([0.0, 1.0, 0.0]) * \
@@ -162,7 +163,7 @@ class Gravity_flipper(Power_up):
         rotMatrix = self.get_orientation()
         glMultMatrixf(self._draw_orientation)
         glMultMatrixf(rotMatrix)
-        glCallList(self._display_list_index)
+        self.draw_geometry()
 
         self._oscillation_angle += pi * 0.02
         if self._oscillation_angle <= 2 * pi:
@@ -206,7 +207,6 @@ class Gravity_flipper(Power_up):
 
         self.kill(game)
 
-
 class World_flipper(Gravity_flipper):
     ''' A class of power ups that flip the entire world
         upside down '''
@@ -220,9 +220,10 @@ class World_flipper(Gravity_flipper):
 
         super(World_flipper, self).__init__(space, pos)
 
-        self._texture = textures.load_texture('arrows_1.png')
+        textures.release_texture(self._texture)
+        self._texture = textures.acquire_region('arrows_1.png')
         self._activation_sound = sound_effects.load_sound('brown_2.wav')
-        self._display_list_index = self.create_displaylist_index()
+        self.create_geometry()
 
     def collide_func(self, game):
         ''' The function that is called whe the player
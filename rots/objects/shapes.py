@@ -7,16 +7,12 @@ import numbers #Needed?
 import math
 
 from math_classes import matrices
-from math_classes.vectors import Vector
-from graphics import draw
+from math_classes.vectors import Vector, Vector3
+from graphics import draw, materials, meshes
+from physics_engine import physics_materials
 
 
-# TODO: Right now there is some redundance in the code since the
-# create_displaylist_index() functions are almost identical in all
-# shapes. However, I find it somewhat ugly to solve this like in
-# fluffy, are there any better ways?
-
-class Shape(object):
+class Shape(meshes.Mesh_user):
 
     def __init__(self, world):
 
@@ -25,25 +21,29 @@ class Shape(object):
         self._mass = ode.Mass()
         self._geom = None
 
-        self._friction = 1
-        self._bounce = 0.2
+        # Friction, bounce etc., see physics_materials.py
+        self._physics_material = physics_materials.get_material()
 
         self.colliding = False
 
         # Material properties
-        self._ambient = None
-        self._diffuse = None
-        self._specular = None
-        self._shininess = None
-        self._emissive = None
+        self._material = None
 
-        self._display_list_index = None
+        self._mesh = None
         self._texture = None
 
+        # The rotation in OpenGL form, only recalculated when it changes
+        self._orientation_cache = matrices.Orientation_cache()
+
+        # The position, orientation and full transform (OpenGL form)
+        # of the body while it sleeps, None when it's awake
+        self._sleeping_transform = None
+
         self._AABB_color = (1.0, 0.0, 0.0, 1.0)
         self._sleeping_AABB_color = (0.8, 0.8, 0.8, 1.0)
-        self._AABB_display_list_index = self.create_AABB_display_list_index()
-        self._sleeping_AABB_DLI = self.create_sleeping_AABB_DLI()
+        # Render resources, created when they are first drawn
+        self._AABB_display_list_index = None
+        self._sleeping_AABB_DLI = None
 
         # Explanations of the material properties:
         #   * Ambient and diffuse "define the color" of the material,
@@ -70,27 +70,35 @@ class Shape(object):
         return self._geom
 
     def get_vel(self):
-        return Vector(self._body.getLinearVel())
+        return Vector3(self._body.getLinearVel())
 
     def get_pos(self):
-        return Vector(self._body.getPosition())
+        if self._sleeping_transform is not None:
+            return self._sleeping_transform[0]
+        return Vector3(self._body.getPosition())
 
     def get_orientation(self):
-        orientation = matrices.ODE_to_OpenGL(self._body.getRotation())
-        return orientation
+        if self._sleeping_transform is not None:
+            return self._sleeping_transform[1]
+        return self._orientation_cache.get(self._body.getRotation())
+
+    def get_material(self):
+        return self._material
 
     def get_material_properties(self):
-        return self._ambient, self._diffuse, self._specular,\
-               self._shininess, self._emissive
+        return self._material.get_properties()
 
     def get_texture(self):
         return self._texture
 
+    def get_physics_material(self):
+        return self._physics_material
+
     def get_friction(self):
-        return self._friction
+        return self._physics_material.get_friction()
 
     def get_bounce(self):
-        return self._bounce
+        return self._physics_material.get_bounce()
 
     def get_AABB_color(self):
         return self._AABB_color
@@ -98,30 +106,51 @@ class Shape(object):
     def set_AABB_color(self, color):
         self._AABB_color = color
 
+    def set_physics_material(self, physics_material):
+        self._physics_material = physics_material
+
     def set_friction(self, friction):
-        self._friction = friction
+        self._physics_material = self._physics_material.with_friction(friction)
 
     def set_bounce(self, bounce):
-        self._bounce = bounce
+        self._physics_material = self._physics_material.with_bounce(bounce)
 
     def set_ambient(self, ambient):
-        self._ambient = ambient
-        self._display_list_index = self.create_displaylist_index()
+        self._material = self._material.with_ambient(ambient)
 
     def set_diffuse(self, diffuse):
-        self._diffuse = diffuse
-        self._display_list_index = self.create_displaylist_index()
+        self._material = self._material.with_diffuse(diffuse)
 
     def set_specular(self, specular):
-        self._specular = specular
-        self._display_list_index = self.create_displaylist_index()
+        self._material = self._material.with_specular(specular)
 
     def set_emissive(self, emissive):
-        self._emissive = emissive
-        self._display_list_index = self.create_displaylist_index()
+        self._material = self._material.with_emissive(emissive)
+
+    def set_material(self, material):
+        self._material = material
 
     def set_orientation(self, orientation):
         self._body.setRotation(orientation)
+        self.wake()
+
+    def sleep(self):
+        ''' Called when ODE has disabled the body (see
+            physics_engine/sleeping.py). Caches the transform,
+            which doesn't change until the body wakes up. '''
+
+        pos = self._body.getPosition()
+        rotation = self._body.getRotation()
+        self._sleeping_transform = (Vector3(pos),
+                                    self._orientation_cache.get(rotation),
+                                    matrices.Matrix4.from_ODE(rotation, pos).value)
+
+    def wake(self):
+        ''' Forgets the cached transform. '''
+        self._sleeping_transform = None
+
+    def is_sleeping(self):
+        return self._sleeping_transform is not None
 
     def set_data(self, name, value):
         ''' Sets an attribute of the shape's geom,
@@ -142,9 +171,6 @@ class Shape(object):
             # It's disabled
             return False
 
-    def create_displaylist_index(self):
-        return None
-
     def create_AABB_display_list_index(self):
         AABB_display_list_index = glGenLists(1)
         glNewList(AABB_display_list_index, GL_COMPILE)
@@ -160,11 +186,14 @@ class Shape(object):
         return AABB_display_list_index
 
     def draw(self):
-        pos = self.get_pos().value
-        glTranslatef(pos[0], pos[1], pos[2])
-        rotMatrix = self.get_orientation()
-        glMultMatrixf(rotMatrix)
-        glCallList(self._display_list_index)
+        if self._sleeping_transform is not None:
+            glMultMatrixf(self._sleeping_transform[2])
+        else:
+            pos = self.get_pos().value
+            glTranslatef(pos[0], pos[1], pos[2])
+            rotMatrix = self.get_orientation()
+            glMultMatrixf(rotMatrix)
+        self.draw_geometry()
 
     def draw_AABB(self):
 
@@ -177,6 +206,10 @@ class Shape(object):
         glTranslatef(pos[0], pos[1], pos[2])
         glScale(x_size, y_size, z_size)
 
+        if self._AABB_display_list_index is None:
+            self._AABB_display_list_index = self.create_AABB_display_list_index()
+            self._sleeping_AABB_DLI = self.create_sleeping_AABB_DLI()
+
         if self.is_enabled():
             glCallList(self._AABB_display_list_index)
         else:
@@ -196,14 +229,11 @@ class Sphere(Shape):
         self._geom = ode.GeomSphere(space, radius)
         self._geom.setBody(self._body)
 
-        self._rolling_friction = 0.5
-
         self.set_data('object', self)
 
         self._radius = radius
 
         self._texture = texture
-        self._quadric = gluNewQuadric()
 
         # Set 'right' side up (to compensate for textures being drawn 'sideways')
         rotation = matrices.OpenGL_to_ODE(matrices.\
@@ -212,32 +242,26 @@ class Sphere(Shape):
         self.set_orientation(rotation)
 
         # Material properties
-        self._ambient = [1.0, 1.0, 1.0, 1.0]
-        self._diffuse = [1.0, 1.0, 1.0, 1.0]
-        self._specular = [1.0, 1.0, 1.0, 1.0]
-        self._shininess = 64
-        self._emissive = [0.0, 0.0, 0.0, 1.0]
+        self._material = materials.get_material(ambient = [1.0, 1.0, 1.0, 1.0],
+                                                diffuse = [1.0, 1.0, 1.0, 1.0],
+                                                specular = [1.0, 1.0, 1.0, 1.0],
+                                                shininess = 64,
+                                                emissive = [0.0, 0.0, 0.0, 1.0])
         
-        self._display_list_index = self.create_displaylist_index()
+        self.create_geometry()
 
-    def create_displaylist_index(self):
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.sphere(self)
-        glEndList()
-        return display_list_index
+    def create_mesh(self):
+        return meshes.acquire_sphere(self._radius)
 
     def get_radius(self):
         return self._radius
 
-    def get_quadric(self):
-        return self._quadric
-
     def get_rolling_friction(self):
-        return self._rolling_friction
+        return self._physics_material.get_rolling_friction()
 
     def set_rolling_friction(self, rolling_friction):
-        self._rolling_friction = rolling_friction
+        self._physics_material = \
+                self._physics_material.with_rolling_friction(rolling_friction)
 
 class Box(Shape):
 
@@ -264,27 +288,24 @@ class Box(Shape):
         self._subdivision_size = subdivision_size
         
         # Material properties
-        self._ambient = [1.0, 1.0, 1.0, 1.0]
-        self._diffuse = [1.0, 1.0, 1.0, 1.0]
-        self._specular = [1.0, 1.0, 1.0, 1.0]
-        self._shininess = 42
-        self._emissive = [0.0, 0.0, 0.0, 1.0]
+        self._material = materials.get_material(ambient = [1.0, 1.0, 1.0, 1.0],
+                                                diffuse = [1.0, 1.0, 1.0, 1.0],
+                                                specular = [1.0, 1.0, 1.0, 1.0],
+                                                shininess = 42,
+                                                emissive = [0.0, 0.0, 0.0, 1.0])
         
-        self._display_list_index = self.create_displaylist_index()
+        self.create_geometry()
 
     def get_sides(self):
         return self._x_size, self._y_size, self._z_size
 
+    def create_mesh(self):
+        return meshes.acquire_box(self._x_size, self._y_size, self._z_size,
+                                  self._subdivision_size)
+
     def get_subdivision_size(self):
         return self._subdivision_size
 
-    def create_displaylist_index(self):
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.box(self)
-        glEndList()
-        return display_list_index
-
 class Surface(Shape):
 
     def __init__(self, world, space, pos = Vector(),
@@ -336,32 +357,33 @@ class Surface(Shape):
 
         self._geom.setPosition(pos.value)
         self._geom.setRotation(rotation)
+
+        # The geom is placed half its thickness below the surface
+        self._pos_offset = Vector3(self._normal * self._thickness * 0.5)
                 
         # Material properties
-        self._ambient = [1.0, 1.0, 1.0, 1.0]
-        self._diffuse = [1.0, 1.0, 1.0, 1.0]
-        self._specular = [1.0, 1.0, 1.0, 1.0]
-        self._shininess = 20
-        self._emissive = [0.0, 0.0, 0.0, 1.0]
-
-        self._display_list_index = self.create_displaylist_index()
-
-    def create_displaylist_index(self):
-        display_list_index = glGenLists(1)
-        glNewList(display_list_index, GL_COMPILE)
-        draw.surface(self)
-        glEndList()
-        return display_list_index
+        self._material = materials.get_material(ambient = [1.0, 1.0, 1.0, 1.0],
+                                                diffuse = [1.0, 1.0, 1.0, 1.0],
+                                                specular = [1.0, 1.0, 1.0, 1.0],
+                                                shininess = 20,
+                                                emissive = [0.0, 0.0, 0.0, 1.0])
+
+        self.create_geometry()
+
+    def create_mesh(self):
+        # NOTE: draw.surface uses the normal in world coordinates,
+        # do the same here so that the backends look the same.
+        return meshes.acquire_surface(self._length, self._width,
+                                      self._subdivision_size, self._normal.value)
 
     def get_normal(self, point = Vector()):
         return self._normal
 
     def get_pos(self):
-        return Vector(list(self._geom.getPosition())) + self._normal * self._thickness * 0.5
+        return Vector3(self._geom.getPosition()) + self._pos_offset
 
     def get_orientation(self):
-        orientation = matrices.ODE_to_OpenGL(self._geom.getRotation())
-        return orientation
+        return self._orientation_cache.get(self._geom.getRotation())
 
     def get_length(self):
         return self._length
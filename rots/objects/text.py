@@ -4,6 +4,7 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 
 from PIL import ImageFont
+from graphics import textures
 from math_classes import matrices
 from math_classes.vectors import Vector
 from math import pi
@@ -24,10 +25,20 @@ class TextBox(object):
         # Try to obtain the FreeType font
         fullname = os.path.join('graphics/texture_data/fonts', font_name)
         try:
-            ft = ImageFont.truetype (fullname, pixel_height)
+            self._ft = ImageFont.truetype (fullname, pixel_height)
         except:
             raise ValueError, "Unable to locate true type font '%s'" % (font_name)
 
+        self._list_base = None
+        self.textures = [None] * 128
+
+        return
+
+    def _allocate(self):
+        ''' Creates the glyph textures and display lists, the
+            first time the textbox is drawn (so that textboxes
+            can be created without a renderer). '''
+
         # Here we ask opengl to allocate resources for
         # all the textures and displays lists which we
         # are about to create.  
@@ -39,11 +50,12 @@ class TextBox(object):
 
         # This is where we actually create each of the fonts display lists.
         for i in xrange (128):
-            make_dlist (ft, i, self._list_base, self.textures);
+            make_dlist (self._ft, i, self._list_base, self.textures);
 
-        self._allocated = True
+        # make_dlist has bound the glyph textures
+        textures.forget_bound()
 
-        return
+        self._allocated = True
 
     def get_string(self):
         return self._string
@@ -89,6 +101,9 @@ class TextBox(object):
         if not self._enabled:
             return
 
+        if not self._allocated:
+            self._allocate()
+
         glLoadIdentity()
         rotMatrix = self.get_orientation()
         glMultMatrixf(rotMatrix)
@@ -145,6 +160,9 @@ class TextBox(object):
         # leave coordinate matrix
         pop_projection_matrix()
 
+        # The display lists of the glyphs have bound their textures
+        textures.forget_bound()
+
     def release(self):
         """ Release the gl resources for this Face."""
         if (self._allocated):
@@ -0,0 +1,90 @@
+''' A budget for the contact joints of a physics step.
+
+    Every contact becomes a contact joint, and the joints are thrown
+    away after each sub-step. When many objects pile up the number of
+    joints (and the time of the step) can grow without bound. The
+    budget caps the joints created for each pair of geoms and in each
+    sub-step, and counts the contacts it drops.
+
+    PyODE creates a new ode.Contact for each contact and can't reuse
+    joints, so the budget only limits how many are created. '''
+
+# The default limits
+MAX_CONTACTS_PER_PAIR = 4
+MAX_CONTACTS = 1000
+
+def contact_depth(contact):
+    ''' The penetration depth of an ode.Contact. '''
+    return contact.getContactGeomParams()[2]
+
+class Contact_budget(object):
+
+    def __init__(self, max_contacts = MAX_CONTACTS,
+                 max_per_pair = MAX_CONTACTS_PER_PAIR):
+        ''' Input:
+                * max_contacts:
+                    The number of contact joints that can be
+                    created in a sub-step.
+                * max_per_pair:
+                    The number of contact joints that can be
+                    created between two geoms. '''
+
+        self.set_max_contacts(max_contacts)
+        self.set_max_per_pair(max_per_pair)
+
+        self._remaining = max_contacts
+
+        # The contacts dropped in this step, and in all steps
+        self._dropped = 0
+        self._total_dropped = 0
+
+    def get_max_contacts(self):
+        return self._max_contacts
+
+    def set_max_contacts(self, max_contacts):
+        if max_contacts < 1:
+            raise ValueError('max_contacts must be at least 1')
+        self._max_contacts = max_contacts
+
+    def get_max_per_pair(self):
+        return self._max_per_pair
+
+    def set_max_per_pair(self, max_per_pair):
+        if max_per_pair < 1:
+            raise ValueError('max_per_pair must be at least 1')
+        self._max_per_pair = max_per_pair
+
+    def get_remaining(self):
+        return self._remaining
+
+    def get_dropped(self):
+        ''' The contacts dropped since begin_step. '''
+        return self._dropped
+
+    def get_total_dropped(self):
+        return self._total_dropped
+
+    def begin_step(self):
+        ''' Starts counting the dropped contacts of a step. '''
+        self._dropped = 0
+
+    def refill(self):
+        ''' Gives back the full budget, call it before
+            each sub-step. '''
+        self._remaining = self._max_contacts
+
+    def take(self, contacts):
+        ''' Takes what the budget allows of a list of contacts
+            between two geoms, the deepest ones if not all of
+            them. The rest are counted as dropped. '''
+
+        count = min(len(contacts), self._max_per_pair, self._remaining)
+        dropped = len(contacts) - count
+        if dropped:
+            self._dropped += dropped
+            self._total_dropped += dropped
+            if not count:
+                return []
+            contacts = sorted(contacts, key = contact_depth, reverse = True)[:count]
+        self._remaining -= count
+        return contacts
@@ -0,0 +1,111 @@
+''' Kinematic bodies: bodies that follow a path instead of being moved
+    by forces, such as the bodies of doors and moving platforms.
+
+    The path is an analytic curve with a position and a velocity at
+    any time (see Oscillation and Ease). Before each physics step the
+    body is put on the curve and given its velocity, so ODE sees how
+    the surface moves and the contacts carry the objects standing on
+    it. The geom used to be moved without a body, which teleported it
+    every step and left the objects on it behind.
+
+    ODE only has true kinematic bodies from version 0.12, and PyODE
+    doesn't wrap them. Otherwise the body gets a mass so large that
+    the contacts barely push it, and no gravity. '''
+
+from math import sin, cos, pi
+
+import ode
+
+from math_classes.vectors import Vector
+
+# The mass of kinematic bodies when ODE doesn't have kinematic bodies
+KINEMATIC_MASS = 1E6
+
+class Oscillation(object):
+    ''' Moves back and forth between two points, starting in
+        the middle and moving towards 'point_1'. Takes 'move_time'
+        seconds from one point to the other. '''
+
+    def __init__(self, point_1, point_2, move_time):
+        self._middle = (point_1 + point_2) * 0.5
+        self._amplitude = (point_1 - point_2) * 0.5
+        self._move_time = move_time
+
+    def get_period(self):
+        return self._move_time * 2
+
+    def get_pos(self, time):
+        return self._middle + self._amplitude * sin(pi * time / self._move_time)
+
+    def get_velocity(self, time):
+        return self._amplitude * (cos(pi * time / self._move_time) *
+                                  pi / self._move_time)
+
+class Ease(object):
+    ''' Moves from 'start' to 'end' in 'duration' seconds, starting
+        and stopping smoothly. Stands still outside of the move. '''
+
+    def __init__(self, start, end, duration):
+        self._start = start
+        self._end = end
+        self._duration = duration
+
+    def get_duration(self):
+        return self._duration
+
+    def get_pos(self, time):
+        fraction = min(max(time / self._duration, 0.0), 1.0)
+        return self._start + (self._end - self._start) * \
+                    ((1 - cos(pi * fraction)) * 0.5)
+
+    def get_velocity(self, time):
+        if time <= 0.0 or time >= self._duration:
+            return Vector()
+        fraction = time / self._duration
+        return (self._end - self._start) * \
+                    (sin(pi * fraction) * pi * 0.5 / self._duration)
+
+class Kinematic_body(object):
+    ''' The body of a geom that is moved along a curve. The geom
+        keeps its position and rotation. '''
+
+    def __init__(self, world, geom):
+
+        body = ode.Body(world)
+        if hasattr(body, 'setKinematic'):
+            body.setKinematic()
+        else:
+            mass = ode.Mass()
+            mass.setSphereTotal(KINEMATIC_MASS, 1.0)
+            body.setMass(mass)
+        body.setGravityMode(False)
+
+        # Always awake, the objects on it would fall asleep too
+        body.setAutoDisableFlag(False)
+
+        self._rotation = geom.getRotation()
+        body.setPosition(geom.getPosition())
+        body.setRotation(self._rotation)
+        geom.setBody(body)
+
+        self._body = body
+
+    def get_body(self):
+        return self._body
+
+    def move(self, pos, velocity):
+        ''' Puts the body at 'pos' with the velocity 'velocity'.
+            Call it before each physics step. '''
+
+        body = self._body
+        body.setPosition(pos.value)
+        body.setLinearVel(velocity.value)
+
+        # Undo what the contacts did to the rotation
+        body.setRotation(self._rotation)
+        body.setAngularVel((0.0, 0.0, 0.0))
+
+    def move_along(self, curve, time):
+        ''' Puts the body at the position of the curve at 'time',
+            with the velocity of the curve. '''
+        self.move(curve.get_pos(time), curve.get_velocity(time))
@@ -1,17 +1,16 @@
-from math import sqrt
-
 import ode
 
-from math_classes.vectors import Vector
+from math_classes.spatial import AABBs_overlap
+from math_classes.vectors import Vector3
+from physics_engine.physics_materials import get_contact
+from physics_engine.spaces import SPACE_NAMES, get_category
 
 # NOTE: Replaced all the calls to geom.__getattribute__('object')
 # with geom.object. Is it readable?
 
 def update_physics(game, iterations = 2):
 
-    sphere_space = game.get_sphere_space()
-    object_space = game.get_object_space()
-    static_space = game.get_static_space()
+    root_space = game.get_root_space()
     power_up_space = game.get_power_up_space()
     interactive_object_space = game.get_interactive_object_space()
     moving_scene_space = game.get_moving_scene_space()
@@ -21,53 +20,71 @@ def update_physics(game, iterations = 2):
     dt = game.get_dt()
     player = game.get_player()
 
+    # Times the phases below, see profiler.py. The handlers
+    # return the number of contact joints they create.
+    profiler = game.get_profiler()
+    profiler.begin_step()
+    callback = profiler.callback
+
+    # Bounds the contact joints created in each sub-step,
+    # see contacts.py
+    budget = game.get_contact_budget()
+    budget.begin_step()
+
+    # What the contact handlers need, looked up once
+    contact_data = (world, contact_group, budget)
+
+    # The spaces whose geoms collide with each other
+    spaces = dict(zip(SPACE_NAMES, (game.get_sphere_space(), game.get_object_space(),
+                                    game.get_static_space(), power_up_space,
+                                    interactive_object_space, moving_scene_space)))
+    self_collisions = [(spaces[name_1], handler)
+                        for (name_1, name_2), handler in COLLISION_HANDLERS.items()
+                            if name_1 == name_2]
+
+    # Move the moving scenes (doors, platforms) one step. This used
+    # to happen when they were drawn, which made them stop when they
+    # were culled or when there was nothing to draw them on. They
+    # have kinematic bodies (see kinematic.py), so the contacts
+    # know how fast their surfaces move.
+    for i in range(moving_scene_space.getNumGeoms()):
+        moving_scene_space.getGeom(i).object.update(dt)
+    profiler.lap('moving_scenes')
+
     #Run multiple times for smoother simulation
     for i in range(iterations):
+        budget.refill()
 
-        # Detect collisions and create contact joints
-        # sphere-static collisions
-        ode.collide2(sphere_space, static_space, game, sphere_static_callback)
-        # object-static collisions
-        ode.collide2(object_space, static_space, game, object_static_callback)
-        # sphere-moving scene collisions
-        ode.collide2(sphere_space, moving_scene_space, game, sphere_moving_scene_callback)
-        # object-moving scene collisions
-        ode.collide2(object_space, moving_scene_space, game, object_moving_scene_callback)
-        # sphere-object collisions
-        ode.collide2(sphere_space, object_space, game, sphere_object_callback)
-        # sphere-sphere collisions
-        sphere_space.collide(game, sphere_sphere_callback)
-        # object-object collisions
-        object_space.collide(game, object_object_callback)
-        # player-power up collisions
-        ode.collide2(player.get_shape().get_geom(), power_up_space, 
-                        game, player_power_up_callback)
-
-        # Manual collision detection for interactive objects
-        # (Couldn't make them "unpressed" properly any other way)
-        # TODO: Fix that
-        for i in range(interactive_object_space.getNumGeoms()):
-            obj_geom = interactive_object_space.getGeom(i)
-            obj = obj_geom.object
+        # Detect collisions and create contact joints. The pairs
+        # of different spaces are found with one pass over the
+        # root space, see dispatch_callback.
+        root_space.collide((contact_data, profiler), dispatch_callback)
+        profiler.lap('dispatch')
 
-            contacts = ode.collide(player.get_shape().get_geom(), obj_geom)
+        # Collisions within a space (e.g. sphere-sphere)
+        for space, handler in self_collisions:
+            space.collide(contact_data, callback(handler.get_pair_type(), handler))
+            profiler.lap(handler.get_pair_type())
 
-            if contacts:
-                obj.set_pressed(True)
-            else:
-                obj.set_pressed(False)
-
-            pressed = obj.get_pressed()
-            pressed_last_frame = obj.get_pressed_last_frame()
-
-            if pressed and not pressed_last_frame:
-                obj.collide_func()
+        # player-power up collisions
+        ode.collide2(player.get_shape().get_geom(), power_up_space, 
+                        game, callback('player-power_up', player_power_up_callback))
+        profiler.lap('player-power_up')
 
-            obj.set_pressed_last_frame(obj.get_pressed())
+        # player-interactive object collisions. Only the objects
+        # touching the player are found, the ones that are pressed
+        # and released are found by comparing with the last contacts.
+        touching = set()
+        ode.collide2(player.get_shape().get_geom(), interactive_object_space,
+                        touching, callback('player-interactive_object',
+                                           player_interactive_object_callback))
+        update_interactive_objects(game, touching)
+        profiler.lap('player-interactive_object')
 
 
         # Simulation step
         world.step(dt/iterations)
+        profiler.lap('step')
 
         # Check if the player is colliding
         # TODO: Move? Is there a prettier way to check this?
@@ -75,6 +92,7 @@ def update_physics(game, iterations = 2):
 
         # Remove all contact joints
         contact_group.empty()
+        profiler.lap('empty')
 
         # Call power up functions
         # NOTE: Couldn't find a better place to put this, is there any?
@@ -83,131 +101,88 @@ def update_physics(game, iterations = 2):
             power_up = power_up_geom.object
             if power_up.get_collided():
                 power_up.collide_func(game)
-
-
-def sphere_static_callback(game, sphere, static):
-    ''' Callback function for collisions between spheres
-        and the static environment. This function checks
-        if the given geoms do collide and creates contact
-        joints if they do. '''
-
-    contact_group = game.get_contact_group()
-    world = game.get_world()
-    sphere_shape = sphere.object
-    static_shape = static.object
-    sphere_body = sphere.getBody()
-    static_body = static.getBody()
-
-    # Check if the objects do collide
-    contacts = ode.collide(sphere, static)
-
-    # Create contact joints
-    for c in contacts:
-        bounce = sqrt(sphere_shape.get_bounce() * static_shape.get_bounce())
-        friction = sqrt(sphere_shape.get_friction() * static_shape.get_friction()) * 1000
-        c.setBounce(bounce)
-        c.setMu(friction)
-
-        j = ode.ContactJoint(world, contact_group, c)
-        j.attach(sphere_body, static_body)
-
-    # Rolling friction
-    if contacts:
-        ang_vel = Vector(sphere_body.getAngularVel())
-        rolling_friction = sqrt(sphere_shape.get_rolling_friction() * static_shape.get_friction())
-        sphere_body.addTorque((-ang_vel * rolling_friction).value)
-
-def object_static_callback(game, obj, static):
-    ''' Callback function for collisions between objects
-        and the static environment. This function checks
-        if the given geoms do collide and creates contact
-        joints if they do. '''
-
-    contact_group = game.get_contact_group()
-    world = game.get_world()
-    obj_shape = obj.object
-    static_shape = static.object
-
-    # Check if the objects do collide
-    contacts = ode.collide(obj, static)
-
-    # Create contact joints
-    for c in contacts:
-        bounce = sqrt(obj_shape.get_bounce() * static_shape.get_bounce())
-        friction = sqrt(obj_shape.get_friction() * static_shape.get_friction())
-        c.setBounce(bounce)
-        c.setMu(friction)
-        j = ode.ContactJoint(world, contact_group, c)
-        j.attach(obj.getBody(), static.getBody())
-
-def sphere_object_callback(game, sphere, obj):
-    ''' Callback function for collisions between spheres
-        and objects. This function checks if the given geoms
-        do collide and creates contact joints if they do. '''
-
-    # TODO: Add rolling friction
-
-    contact_group = game.get_contact_group()
-    world = game.get_world()
-    sphere_shape = sphere.object
-    obj_shape = obj.object
-
-    # Check if the objects do collide
-    contacts = ode.collide(sphere, obj)
-
-    # Create contact joints
-    for c in contacts:
-        bounce = sqrt(sphere_shape.get_bounce() * obj_shape.get_bounce())
-        friction = sqrt(sphere_shape.get_friction() * obj_shape.get_friction()) * 0.1
-        c.setBounce(bounce)
-        c.setMu(friction)
-        j = ode.ContactJoint(world, contact_group, c)
-        j.attach(sphere.getBody(), obj.getBody())
-
-def sphere_sphere_callback(game, sphere1, sphere2):
-    ''' Callback function for collisions between spheres. 
-        This function checks if the given geoms do collide
-        and creates contact joints if they do. '''
-
-    contact_group = game.get_contact_group()
-    world = game.get_world()
-    sphere1_shape = sphere1.object
-    sphere2_shape = sphere2.object
-
-    # Check if the objects do collide
-    contacts = ode.collide(sphere1, sphere2)
-
-    # Create contact joints
-    for c in contacts:
-        bounce = sqrt(sphere1_shape.get_bounce() * sphere2_shape.get_bounce())
-        friction = sqrt(sphere1_shape.get_friction() * sphere2_shape.get_friction()) * 0.1
-        c.setBounce(bounce)
-        c.setMu(friction)
-        j = ode.ContactJoint(world, contact_group, c)
-        j.attach(sphere1.getBody(), sphere2.getBody())
-
-def object_object_callback(game, obj1, obj2):
-    ''' Callback function for collisions between objects. 
-        This function checks if the given geoms do collide
-        and creates contact joints if they do. '''
-
-    contact_group = game.get_contact_group()
-    world = game.get_world()
-    obj1_shape = obj1.object
-    obj2_shape = obj2.object
-
-    # Check if the objects do collide
-    contacts = ode.collide(obj1, obj2)
-
-    # Create contact joints
-    for c in contacts:
-        bounce = sqrt(obj1_shape.get_bounce() * obj2_shape.get_bounce())
-        friction = sqrt(obj1_shape.get_friction() * obj2_shape.get_friction())
-        c.setBounce(bounce)
-        c.setMu(friction)
-
-        j = ode.ContactJoint(world, contact_group, c)
-        j.attach(obj1.getBody(), obj2.getBody())
+        profiler.lap('power_ups')
+
+    # Find the bodies that ODE has put to sleep or woken up
+    game.get_sleep_tracker().update((spaces['sphere'], spaces['object']),
+                                    (moving_scene_space,))
+    profiler.lap('sleeping')
+
+    profiler.end_step(dropped = budget.get_dropped())
+
+def dispatch_callback(data, space_1, space_2):
+    ''' Called by the root space for the pairs of spaces that
+        have a contact handler (see COLLISION_HANDLERS) and whose
+        bounding boxes overlap. The category bits of the spaces
+        tell which pair it is. '''
+
+    contact_data, profiler = data
+
+    key = (space_1.getCategoryBits(), space_2.getCategoryBits())
+    handler = _handlers_by_category.get(key)
+    if handler is None:
+        # The handler takes the geoms in the other order
+        space_1, space_2 = space_2, space_1
+        handler = _handlers_by_category[key[1], key[0]]
+
+    pair_type = handler.get_pair_type()
+    ode.collide2(space_1, space_2, contact_data,
+                 profiler.callback(pair_type, handler))
+    profiler.lap(pair_type)
+
+class Contact_handler(object):
+    ''' Creates the contact joints between two colliding geoms of
+        a pair type (e.g. 'sphere-static'). Called with the data
+        (world, contact group, contact budget) and the two geoms, and
+        returns the number of joints created. '''
+
+    def __init__(self, pair_type, rolling_friction = False):
+        ''' Input:
+                * pair_type:
+                    The pair type of the contact parameters,
+                    see physics_materials.py.
+                * rolling_friction:
+                    Whether the first geom rolls (is a sphere)
+                    and should be slowed down by rolling friction. '''
+
+        self._pair_type = pair_type
+        self._rolling_friction = rolling_friction
+
+    def get_pair_type(self):
+        return self._pair_type
+
+    def __call__(self, data, geom_1, geom_2):
+
+        # Check if the objects do collide
+        contacts = ode.collide(geom_1, geom_2)
+        if not contacts:
+            return 0
+
+        world, contact_group, budget = data
+        contacts = budget.take(contacts)
+        if not contacts:
+            return 0
+
+        shape_1 = geom_1.object
+        shape_2 = geom_2.object
+        body_1 = geom_1.getBody()
+        body_2 = geom_2.getBody()
+
+        parameters = get_contact(self._pair_type, shape_1.get_physics_material(),
+                                 shape_2.get_physics_material())
+
+        # Create contact joints
+        for c in contacts:
+            parameters.apply(c)
+            j = ode.ContactJoint(world, contact_group, c)
+            j.attach(body_1, body_2)
+
+        # Rolling friction
+        if self._rolling_friction:
+            ang_vel = Vector3(body_1.getAngularVel())
+            body_1.addTorque((-ang_vel * parameters.rolling_friction).value)
+
+        return len(contacts)
 
 def player_power_up_callback(game, player_geom, power_up_geom):
     ''' Callback function for collisions between the
@@ -227,141 +202,51 @@ def player_power_up_callback(game, player_geom, power_up_geom):
         # and call the function later.
         power_up.set_collided(True)
 
-def player_interactive_object_callback(game, player_geom, obj_geom):
-
-    obj = obj_geom.object
-
-    contacts = ode.collide(player_geom, obj_geom)
-
-    obj.set_pressed(False)
-
-    if contacts:
-        obj.set_pressed(True)
-
-# TODO: Make this work |
-#                      V
-
-def sphere_moving_scene_callback(game, sphere, scene):
-    ''' Callback function for collisions between spheres
-        and moving scene objects. This function checks
-        if the given geoms do collide and creates contact
-        joints if they do. '''
-
-    contact_group = game.get_contact_group()
-    world = game.get_world()
-    sphere_shape = sphere.object
-    scene_shape = scene.object
-    sphere_body = sphere.getBody()
-    scene_body = scene.getBody()
-
-    #scene_vel = scene_shape.get_velocity()
-    vel = scene_shape.get_velocity()
-
-    # Check if the objects do collide
-    contacts = ode.collide(sphere, scene)
-
-    # Create contact joints
-    for c in contacts:
-        # Set friction and bounce
-        bounce = sqrt(sphere_shape.get_bounce() * scene_shape.get_bounce())
-        friction = sqrt(sphere_shape.get_friction() * scene_shape.get_friction()) * 1000
-        c.setBounce(bounce)
-        c.setMu(friction)
+def player_interactive_object_callback(touching, player_geom, obj_geom):
+    ''' Callback function for collisions between the player
+        and interactive objects. Adds the object to the set
+        'touching' if they are in contact. '''
 
-        ### Hack to add friction (kind of...)
-        # Doesn't work as it should at all yet, very buggy...
-        #pos, normal, depth, geom1, geom2 = c.getContactGeomParams()
+    # The narrowphase is only needed if the AABBs overlap
+    if not AABBs_overlap(player_geom.getAABB(), obj_geom.getAABB()):
+        return
 
-        #sphere_vel = sphere_shape.get_vel()
-        #rel_vel = scene_vel - sphere_vel
+    if ode.collide(player_geom, obj_geom):
+        touching.add(obj_geom.object)
 
-        #pos = sphere_shape.get_pos() - Vector(normal) * sphere_shape.get_radius()
+def update_interactive_objects(game, touching):
+    ''' Presses the interactive objects that the player has started
+        to touch (and calls their collide_func) and releases the ones
+        that the player no longer touches. 'touching' is the set of
+        objects touched now, the set from the last call is kept in
+        the game object. '''
 
-        #print 'pos: ', pos
-        #print 'normal: ', normal
-        #print 'rel_vel: ', rel_vel
-        #print
+    last_touching = game.get_interactive_contacts()
 
-        #sphere_body.addForceAtRelPos((rel_vel * 5).value, pos.value)
-        
+    for obj in last_touching - touching:
+        obj.set_pressed(False)
 
-
-        ### Adjust the velocity of the contact
-        pos, normal, depth, geom1, geom2 = c.getContactGeomParams()
-        normal = Vector(normal)
-        dir_1 = Vector((1.0, 0.0, 0.0)).cross(normal)
-        if dir_1.norm() < 0.1:
-            dir_1 = Vector((0.0, 0.0, 1.0)).cross(normal)
-        dir_1 = dir_1.normalize()
-        dir_2 = normal.cross(dir_1)
-
-        c.setFDir1(dir_1.value)
-
-        # #print 'Number of contacts: ', len(contacts)
-
-        # print 'Normal: ', normal
-        # print 'dir_1: ', dir_1
-        # print 'dir_2: ', dir_2
-
-        vel_1 = vel.dot(dir_1)
-        vel_2 = vel.dot(dir_2)
-
-        # print 'vel: ', vel
-
-        # print 'vel_1 before: ', c.getMotion1()
-        # print 'vel_2 before: ', c.getMotion2()
-
-        # # Don't seem to do anything... What's wrong?
-        c.setMotion1(vel_1)
-        c.setMotion2(vel_2)
-
-        # print 'vel_1 after: ', c.getMotion1()
-        # print 'vel_2 after: ', c.getMotion2()
-        # print
-
-        j = ode.ContactJoint(world, contact_group, c)
-        j.attach(sphere_body, scene_body)
-
-    # Rolling friction
-    if contacts:
-        ang_vel = Vector(sphere_body.getAngularVel())
-        rolling_friction = sqrt(sphere_shape.get_rolling_friction() * scene_shape.get_friction())
-        sphere_body.addTorque((-ang_vel * rolling_friction).value)
-
-def object_moving_scene_callback(game, obj, scene):
-    ''' Callback function for collisions between objects
-        and moving scene objects. This function checks
-        if the given geoms do collide and creates contact
-        joints if they do. '''
-
-    contact_group = game.get_contact_group()
-    world = game.get_world()
-    obj_shape = obj.object
-    scene_shape = scene.object
-
-    vel = scene_shape.get_velocity()
-
-    # Check if the objects do collide
-    contacts = ode.collide(obj, scene)
-
-    # Create contact joints
-    for c in contacts:
-        bounce = sqrt(obj_shape.get_bounce() * scene_shape.get_bounce())
-        friction = sqrt(obj_shape.get_friction() * scene_shape.get_friction())
-        c.setBounce(bounce)
-        c.setMu(friction)
-
-        # Adjust the velocity of the contact
-        pos, normal, depth, geom1, geom2 = c.getContactGeomParams()
-        normal = Vector(normal)
-        dir_1 = Vector(c.getFDir1())
-        dir_2 = normal.cross(dir_1)
-
-        vel_1 = vel.dot(dir_1)
-        vel_2 = vel.dot(dir_2)
-
-        c.setMotion1(vel_1)
-        c.setMotion2(vel_2)
-        
-        j = ode.ContactJoint(world, contact_group, c)
-        j.attach(obj.getBody(), scene.getBody())
+    for obj in touching - last_touching:
+        obj.set_pressed(True)
+        obj.collide_func()
+
+    game.set_interactive_contacts(touching)
+
+# The contact handlers of the pairs of spaces (see spaces.SPACE_NAMES)
+# whose geoms collide. The first geom passed to a handler is from the
+# first space. A new kind of object only needs a space and an entry
+# here (and its pair type in physics_materials.FRICTION_SCALES).
+COLLISION_HANDLERS = {
+    ('sphere', 'static'): Contact_handler('sphere-static', rolling_friction = True),
+    ('object', 'static'): Contact_handler('object-static'),
+    ('sphere', 'moving_scene'): Contact_handler('sphere-moving_scene',
+                                                rolling_friction = True),
+    ('object', 'moving_scene'): Contact_handler('object-moving_scene'),
+    ('sphere', 'object'): Contact_handler('sphere-object'),
+    ('sphere', 'sphere'): Contact_handler('sphere-sphere'),
+    ('object', 'object'): Contact_handler('object-object'),
+}
+
+# (category bits 1, category bits 2) -> handler, for dispatch_callback
+_handlers_by_category = dict(((get_category(name_1), get_category(name_2)), handler)
+                             for (name_1, name_2), handler in COLLISION_HANDLERS.items())
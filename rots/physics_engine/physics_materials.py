@@ -0,0 +1,193 @@
+''' Physics materials: the friction, bounce etc. of the objects, and a
+    table with the contact parameters of every pair of materials.
+
+    Like the graphics materials (see graphics/materials.py) they are
+    shared: get them with get_material(), which returns the same
+    Physics_material for the same properties, and give an object
+    another material to change it, e.g. material.with_friction(0.1).
+    Every material has an integer id.
+
+    The contact parameters of two materials are computed once, when
+    the second of them is created, for every pair type (e.g. a sphere
+    touching the static environment). The collision callbacks only
+    look them up with get_contact(). How the properties combine:
+
+        * bounce:           sqrt(bounce_1 * bounce_2)
+        * mu:               sqrt(friction_1 * friction_2), times the
+                            friction scale of the pair type (see
+                            FRICTION_SCALES)
+        * rolling friction: sqrt(rolling_friction_1 * friction_2),
+                            the first object is the one that rolls
+        * softness:         softness_1 + softness_2 (the soft CFM)
+        * slip:             max(slip_1, slip_2) '''
+
+from math import sqrt
+
+import ode
+
+DEFAULT_FRICTION = 1.0
+DEFAULT_BOUNCE = 0.2
+DEFAULT_ROLLING_FRICTION = 0.5
+
+# The pair types and how much their friction is scaled. The first
+# object of a pair is the one that is passed first to the callback.
+FRICTION_SCALES = {'sphere-static': 1000.0,
+                   'sphere-moving_scene': 1000.0,
+                   'sphere-object': 0.1,
+                   'sphere-sphere': 0.1,
+                   'object-static': 1.0,
+                   'object-moving_scene': 1.0,
+                   'object-object': 1.0}
+
+# All materials: properties -> Physics_material, and by id
+_cache = {}
+_materials = []
+
+# (pair type, id 1, id 2) -> Contact_parameters
+_contacts = {}
+
+class Physics_material(object):
+    ''' The physical surface properties of an object. Use
+        get_material() to get one. '''
+
+    __slots__ = ('_id', '_friction', '_bounce', '_rolling_friction',
+                 '_softness', '_slip')
+
+    def __init__(self, material_id, friction, bounce, rolling_friction,
+                 softness, slip):
+
+        self._id = material_id
+        self._friction = friction
+        self._bounce = bounce
+        self._rolling_friction = rolling_friction
+        self._softness = softness
+        self._slip = slip
+
+    def get_id(self):
+        return self._id
+
+    def get_properties(self):
+        return self._friction, self._bounce, self._rolling_friction,\
+               self._softness, self._slip
+
+    def get_friction(self):
+        return self._friction
+
+    def get_bounce(self):
+        return self._bounce
+
+    def get_rolling_friction(self):
+        return self._rolling_friction
+
+    def get_softness(self):
+        return self._softness
+
+    def get_slip(self):
+        return self._slip
+
+    def with_friction(self, friction):
+        return get_material(friction, self._bounce, self._rolling_friction,
+                            self._softness, self._slip)
+
+    def with_bounce(self, bounce):
+        return get_material(self._friction, bounce, self._rolling_friction,
+                            self._softness, self._slip)
+
+    def with_rolling_friction(self, rolling_friction):
+        return get_material(self._friction, self._bounce, rolling_friction,
+                            self._softness, self._slip)
+
+    def with_softness(self, softness):
+        return get_material(self._friction, self._bounce, self._rolling_friction,
+                            softness, self._slip)
+
+    def with_slip(self, slip):
+        return get_material(self._friction, self._bounce, self._rolling_friction,
+                            self._softness, slip)
+
+    def __str__(self):
+        return 'Physics_material(friction=%s, bounce=%s, rolling_friction=%s, ' \
+               'softness=%s, slip=%s)' % self.get_properties()
+
+class Contact_parameters(object):
+    ''' The parameters of the contacts between two materials. '''
+
+    __slots__ = ('bounce', 'mu', 'rolling_friction', 'softness', 'slip', 'mode')
+
+    def __init__(self, pair_type, material_1, material_2):
+
+        self.bounce = sqrt(material_1.get_bounce() * material_2.get_bounce())
+        self.mu = sqrt(material_1.get_friction() * material_2.get_friction()) * \
+                    FRICTION_SCALES[pair_type]
+        self.rolling_friction = sqrt(material_1.get_rolling_friction() *
+                                     material_2.get_friction())
+        self.softness = material_1.get_softness() + material_2.get_softness()
+        self.slip = max(material_1.get_slip(), material_2.get_slip())
+
+        # Softness and slip only take effect with their mode flags
+        self.mode = 0
+        if self.softness:
+            self.mode |= ode.ContactSoftCFM
+        if self.slip:
+            self.mode |= ode.ContactSlip1 | ode.ContactSlip2
+
+    def apply(self, contact):
+        ''' Sets the parameters of an ode.Contact. '''
+
+        contact.setBounce(self.bounce)
+        contact.setMu(self.mu)
+        if self.mode:
+            contact.setMode(self.mode)
+            contact.setSoftCFM(self.softness)
+            contact.setSlip1(self.slip)
+            contact.setSlip2(self.slip)
+
+def _add_contacts(material):
+    ''' Computes the parameters of the contacts between the new
+        material and all materials (itself included). '''
+
+    for other in _materials:
+        for pair_type in FRICTION_SCALES:
+            _contacts[pair_type, material.get_id(), other.get_id()] = \
+                    Contact_parameters(pair_type, material, other)
+            _contacts[pair_type, other.get_id(), material.get_id()] = \
+                    Contact_parameters(pair_type, other, material)
+
+def get_material(friction = DEFAULT_FRICTION, bounce = DEFAULT_BOUNCE,
+                 rolling_friction = DEFAULT_ROLLING_FRICTION,
+                 softness = 0.0, slip = 0.0):
+    ''' Returns the material with the given properties, shared
+        with all other objects with the same material. '''
+
+    key = (float(friction), float(bounce), float(rolling_friction),
+           float(softness), float(slip))
+
+    material = _cache.get(key)
+    if material is None:
+        material = Physics_material(len(_materials), *key)
+        _cache[key] = material
+        _materials.append(material)
+        _add_contacts(material)
+    return material
+
+def get_material_by_id(material_id):
+    return _materials[material_id]
+
+def get_contact(pair_type, material_1, material_2):
+    ''' The Contact_parameters of a pair type (a key of
+        FRICTION_SCALES) and two materials. '''
+    return _contacts[pair_type, material_1.get_id(), material_2.get_id()]
+
+def add_pair_type(pair_type, friction_scale = 1.0):
+    ''' Adds (or changes) a pair type, and computes its
+        contact parameters for all materials. '''
+
+    FRICTION_SCALES[pair_type] = friction_scale
+    for material_1 in _materials:
+        for material_2 in _materials:
+            _contacts[pair_type, material_1.get_id(), material_2.get_id()] = \
+                    Contact_parameters(pair_type, material_1, material_2)
+
+def get_statistics():
+    ''' Returns the number of materials and of precomputed contacts. '''
+    return len(_materials), len(_contacts)
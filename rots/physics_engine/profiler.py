@@ -0,0 +1,241 @@
+''' Timing of the phases of physics.update_physics.
+
+    The profiler keeps a record of the last steps: the time spent in
+    each phase (each collision pass, the world step, emptying the
+    contact group etc.), the number of contact joints created by each
+    pair of spaces and the time spent in the Python collision callbacks
+    (which is part of the time of the collision passes). The records
+    can be shown as a histogram on the debug screen, or written to a
+    CSV or JSON file to compare builds.
+
+    When the profiler is disabled all calls return right away. '''
+
+import collections
+import csv
+import json
+import timeit
+
+class Step_profiler(object):
+
+    def __init__(self, history = 300, enabled = True, timer = timeit.default_timer):
+        ''' Input:
+                * history:
+                    The number of steps to keep records of.
+                * enabled:
+                    Whether to record anything.
+                * timer:
+                    A function returning the time in seconds. '''
+
+        self._enabled = enabled
+        self._timer = timer
+        self._records = collections.deque(maxlen = history)
+
+        # The phases and pairs in the order they were first seen
+        self._phases = []
+        self._pairs = []
+
+        self._step_count = 0
+
+        # The step being recorded
+        self._times = None
+        self._contacts = None
+        self._callback_time = 0.0
+        self._step_start = 0.0
+        self._last = 0.0
+
+    def is_enabled(self):
+        return self._enabled
+
+    def set_enabled(self, enabled):
+        self._enabled = enabled
+
+    def get_records(self):
+        ''' The records of the last steps, oldest first. Each record
+            is a dictionary with the keys 'step', 'total', 'callbacks',
+            'joints' and 'dropped' (seconds, seconds, count, count),
+            'times' (phase -> seconds) and 'contacts' (pair -> joints). '''
+        return list(self._records)
+
+    def get_phases(self):
+        return list(self._phases)
+
+    def get_pairs(self):
+        return list(self._pairs)
+
+    def clear(self):
+        self._records.clear()
+        self._step_count = 0
+
+    ### Recording
+
+    def begin_step(self):
+        ''' Starts the record of a physics step. '''
+
+        if not self._enabled:
+            return
+
+        self._times = {}
+        self._contacts = {}
+        self._callback_time = 0.0
+        self._step_start = self._last = self._timer()
+
+    def lap(self, phase):
+        ''' Adds the time since the last lap (or since begin_step)
+            to the phase. '''
+
+        if not self._enabled or self._times is None:
+            return
+
+        now = self._timer()
+        if phase not in self._times:
+            self._times[phase] = 0.0
+            if phase not in self._phases:
+                self._phases.append(phase)
+        self._times[phase] += now - self._last
+        self._last = now
+
+    def end_step(self, dropped = 0):
+        ''' Finishes the record of the step. 'dropped' is the
+            number of contacts that didn't get a joint. '''
+
+        if not self._enabled or self._times is None:
+            return
+
+        total = self._timer() - self._step_start
+        self._records.append({'step': self._step_count,
+                              'total': total,
+                              'callbacks': self._callback_time,
+                              'joints': sum(self._contacts.values()),
+                              'dropped': dropped,
+                              'times': self._times,
+                              'contacts': self._contacts})
+        self._step_count += 1
+        self._times = None
+
+    def callback(self, pair, callback):
+        ''' Wraps a collision callback so that its time and the
+            number of contact joints it creates (its return value)
+            are recorded under 'pair'. Returns the callback itself
+            when the profiler is disabled. '''
+
+        if not self._enabled:
+            return callback
+
+        if pair not in self._pairs:
+            self._pairs.append(pair)
+
+        def timed_callback(data, geom1, geom2):
+            start = self._timer()
+            joints = callback(data, geom1, geom2) or 0
+            self._callback_time += self._timer() - start
+            self._contacts[pair] = self._contacts.get(pair, 0) + joints
+
+        return timed_callback
+
+    ### Reporting
+
+    def get_summary(self):
+        ''' The mean and maximum of the recorded steps, as a
+            dictionary that can be written as JSON. Times are
+            in milliseconds. '''
+
+        records = self._records
+        count = len(records)
+        if not count:
+            return {'steps': 0}
+
+        def mean(values):
+            return sum(values) / float(count)
+
+        totals = [record['total'] * 1000.0 for record in records]
+        return {'steps': count,
+                'total_ms': {'mean': mean(totals), 'max': max(totals)},
+                'callbacks_ms': mean([r['callbacks'] * 1000.0 for r in records]),
+                'joints': mean([r['joints'] for r in records]),
+                'dropped': mean([r['dropped'] for r in records]),
+                'phases_ms': dict((phase, mean([r['times'].get(phase, 0.0) * 1000.0
+                                                for r in records]))
+                                  for phase in self._phases),
+                'contacts': dict((pair, mean([r['contacts'].get(pair, 0)
+                                              for r in records]))
+                                 for pair in self._pairs)}
+
+    def histogram(self, bins = 8):
+        ''' A histogram of the total step times.
+
+            Output: A list of (low, high, count), with the
+                    limits in milliseconds. '''
+
+        totals = [record['total'] * 1000.0 for record in self._records]
+        if not totals:
+            return []
+
+        low = min(totals)
+        width = (max(totals) - low) / bins or 1.0
+        counts = [0] * bins
+        for total in totals:
+            counts[min(int((total - low) / width), bins - 1)] += 1
+        return [(low + i * width, low + (i + 1) * width, counts[i])
+                    for i in range(bins)]
+
+    def format_histogram(self, bins = 8, width = 30):
+        ''' The histogram and the mean time of each phase, as
+            lines of text for the debug screen. '''
+
+        histogram = self.histogram(bins)
+        if not histogram:
+            return 'Physics: no steps recorded'
+
+        summary = self.get_summary()
+        lines = ['Physics step [ms], last %d steps: mean %0.2f, max %0.2f' %
+                    (summary['steps'], summary['total_ms']['mean'],
+                     summary['total_ms']['max'])]
+
+        most = max(count for low, high, count in histogram)
+        for low, high, count in histogram:
+            bar = '#' * int(round(width * count / float(most)))
+            lines.append('%6.2f-%6.2f |%s %d' % (low, high, bar, count))
+
+        lines.append('  '.join('%s %0.2f' % (phase, summary['phases_ms'][phase])
+                               for phase in self._phases))
+        lines.append('Callbacks %0.2f ms, %0.1f joints/step, %0.1f dropped/step' %
+                        (summary['callbacks_ms'], summary['joints'], summary['dropped']))
+        return '\n'.join(lines)
+
+    def dump_csv(self, file_name):
+        ''' Writes one row per recorded step: the total time, the
+            time of each phase and in the callbacks (milliseconds),
+            and the joints created by each pair of spaces. '''
+
+        with open(file_name, 'wb') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['step', 'total_ms', 'callbacks_ms', 'joints', 'dropped'] +
+                            ['%s_ms' % phase for phase in self._phases] +
+                            ['%s_contacts' % pair for pair in self._pairs])
+            for record in self._records:
+                writer.writerow([record['step'], record['total'] * 1000.0,
+                                 record['callbacks'] * 1000.0, record['joints'],
+                                 record['dropped']] +
+                                [record['times'].get(phase, 0.0) * 1000.0
+                                    for phase in self._phases] +
+                                [record['contacts'].get(pair, 0)
+                                    for pair in self._pairs])
+
+    def dump_json(self, file_name):
+        ''' Writes the summary and all recorded steps. '''
+
+        with open(file_name, 'w') as json_file:
+            json.dump({'summary': self.get_summary(),
+                       'phases': self._phases,
+                       'pairs': self._pairs,
+                       'steps': self.get_records()},
+                      json_file, indent = 2, sort_keys = True)
+
+    def dump(self, file_name):
+        ''' Writes JSON if the file name ends with .json,
+            otherwise CSV. '''
+
+        if file_name.lower().endswith('.json'):
+            self.dump_json(file_name)
+        else:
+            self.dump_csv(file_name)
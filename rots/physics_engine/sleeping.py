@@ -0,0 +1,73 @@
+''' Keeps track of the bodies that ODE has put to sleep.
+
+    The world auto-disables bodies that have come to rest, and they
+    don't move until something wakes them up. The objects of sleeping
+    bodies cache their transform (see Shape.sleep), and the stages
+    after the physics (interpolation, the spatial index) only have to
+    look at the objects that may have moved: the awake ones, the ones
+    that fell asleep in the last steps (at their final position) and
+    the kinematic ones, like the moving scenes, which have no body
+    but move anyway. '''
+
+class Sleep_tracker(object):
+
+    def __init__(self):
+        self._awake = set()
+        self._sleeping = set()
+        self._kinematic = []
+
+        # The objects that may have moved since pop_moved()
+        self._moved = set()
+
+    def update(self, dynamic_spaces, kinematic_spaces = ()):
+        ''' Checks which of the bodies of the objects in the
+            dynamic spaces are enabled, puts the objects whose
+            bodies have been disabled to sleep and wakes the ones
+            whose bodies have been enabled. Call it after each
+            physics step. '''
+
+        awake = set()
+        sleeping = set()
+        for space in dynamic_spaces:
+            for i in range(space.getNumGeoms()):
+                obj = space.getGeom(i).object
+                body = obj.get_body()
+                if body is None:
+                    continue
+
+                if body.isEnabled():
+                    if obj in self._sleeping:
+                        obj.wake()
+                    awake.add(obj)
+                else:
+                    if obj not in self._sleeping:
+                        obj.sleep()
+                        self._moved.add(obj)
+                    sleeping.add(obj)
+
+        self._awake = awake
+        self._sleeping = sleeping
+        self._kinematic = [space.getGeom(i).object for space in kinematic_spaces
+                                for i in range(space.getNumGeoms())]
+        self._moved.update(awake)
+        self._moved.update(self._kinematic)
+
+    def get_awake(self):
+        ''' The objects with bodies that are enabled. '''
+        return self._awake
+
+    def get_sleeping(self):
+        return self._sleeping
+
+    def get_moving(self):
+        ''' The objects that move in a physics step: the
+            awake and the kinematic ones. '''
+        return list(self._awake) + self._kinematic
+
+    def pop_moved(self):
+        ''' Returns the objects that may have moved since the
+            last call, and starts over. '''
+
+        moved = self._moved
+        self._moved = set()
+        return moved
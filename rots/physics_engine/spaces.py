@@ -0,0 +1,184 @@
+''' The ODE collision spaces of a scene. Every scene has six spaces
+    (see SPACE_NAMES), and declares which broadphase each of them
+    should use with a Space_config:
+
+        * simple: Tests every pair of geoms, O(n^2). Fine for a
+          handful of geoms.
+        * hash: A multi-resolution hash grid. The cell sizes are
+          2^min_level ... 2^max_level and should span the sizes of
+          the geoms in the space. This is what ode.Space(1) gives,
+          with the levels -3 and 10.
+        * quadtree: A quadtree over a fixed region (center and
+          extents), with the given depth. Suited to large, flat
+          levels with many static geoms.
+
+    The six spaces are put in a root space (see create_root_space),
+    with category and collide bits telling which of them collide with
+    each other, so that the contacts between all of them are found
+    with one pass over the root space. '''
+
+import ode
+
+SIMPLE = 'simple'
+HASH = 'hash'
+QUADTREE = 'quadtree'
+SPACE_TYPES = (SIMPLE, HASH, QUADTREE)
+
+# The spaces of a scene, in the order the Game object takes them
+SPACE_NAMES = ('sphere', 'object', 'static', 'power_up',
+               'interactive_object', 'moving_scene')
+
+class Space_config(object):
+    ''' Describes the broadphase of one collision space. Use
+        the class methods simple(), hash() and quadtree(). '''
+
+    def __init__(self, space_type = HASH, min_level = -3, max_level = 10,
+                 center = (0.0, 0.0, 0.0), extents = (100.0, 100.0, 100.0),
+                 depth = 6):
+
+        if space_type not in SPACE_TYPES:
+            raise ValueError("Unknown space type '%s', use one of %s"
+                                % (space_type, ', '.join(SPACE_TYPES)))
+        if min_level > max_level:
+            raise ValueError('min_level (%d) is larger than max_level (%d)'
+                                % (min_level, max_level))
+
+        self._space_type = space_type
+        self._min_level = min_level
+        self._max_level = max_level
+        self._center = tuple(center)
+        self._extents = tuple(extents)
+        self._depth = depth
+
+    @classmethod
+    def simple(cls):
+        return cls(SIMPLE)
+
+    @classmethod
+    def hash(cls, min_level = -3, max_level = 10):
+        return cls(HASH, min_level = min_level, max_level = max_level)
+
+    @classmethod
+    def quadtree(cls, center, extents, depth = 6):
+        return cls(QUADTREE, center = center, extents = extents, depth = depth)
+
+    @classmethod
+    def from_string(cls, description):
+        ''' Creates a config from a string like 'simple', 'hash',
+            'hash:-2:6' (min and max level) or
+            'quadtree:0,0,0:100,20,100:5' (center, extents, depth). '''
+
+        parts = description.split(':')
+        space_type = parts[0]
+        if space_type == HASH and len(parts) == 3:
+            return cls.hash(int(parts[1]), int(parts[2]))
+        elif space_type == QUADTREE and len(parts) == 4:
+            center = tuple(float(e) for e in parts[1].split(','))
+            extents = tuple(float(e) for e in parts[2].split(','))
+            return cls.quadtree(center, extents, int(parts[3]))
+        elif len(parts) == 1:
+            return cls(space_type)
+        raise ValueError("Can't parse the space description '%s'" % description)
+
+    def get_space_type(self):
+        return self._space_type
+
+    def get_levels(self):
+        return self._min_level, self._max_level
+
+    def get_center(self):
+        return self._center
+
+    def get_extents(self):
+        return self._extents
+
+    def get_depth(self):
+        return self._depth
+
+    def create(self):
+        ''' Creates an ODE space as described by the config. '''
+
+        if self._space_type == SIMPLE:
+            return ode.SimpleSpace()
+        elif self._space_type == QUADTREE:
+            return ode.QuadTreeSpace(self._center, self._extents, self._depth)
+
+        space = ode.HashSpace()
+        space.setLevels(self._min_level, self._max_level)
+        return space
+
+    def __str__(self):
+        if self._space_type == HASH:
+            return 'hash(%d, %d)' % (self._min_level, self._max_level)
+        elif self._space_type == QUADTREE:
+            return 'quadtree(%s, %s, %d)' % (self._center, self._extents,
+                                             self._depth)
+        return self._space_type
+
+def create_spaces(configs = None, default = None):
+    ''' Creates the six spaces of a scene.
+
+        Input:
+            * configs:
+                A dictionary from space name (see SPACE_NAMES)
+                to Space_config. Spaces that aren't in it get
+                'default'.
+            * default:
+                The Space_config of the rest of the spaces,
+                hash with the ODE default levels if None.
+
+        Output: A tuple with the spaces, in the order of
+                SPACE_NAMES (which is what Game takes). '''
+
+    configs = configs or {}
+    for name in configs:
+        if name not in SPACE_NAMES:
+            raise ValueError("Unknown space '%s', use one of %s"
+                                % (name, ', '.join(SPACE_NAMES)))
+
+    if default is None:
+        default = Space_config.hash()
+    return tuple(configs.get(name, default).create() for name in SPACE_NAMES)
+
+def get_category(name):
+    ''' The category bit of a space. '''
+
+    if name not in SPACE_NAMES:
+        raise ValueError("Unknown space '%s', use one of %s"
+                            % (name, ', '.join(SPACE_NAMES)))
+    return 1 << SPACE_NAMES.index(name)
+
+def create_root_space(spaces, pairs):
+    ''' Puts the spaces of a scene in a (simple) root space.
+
+        Input:
+            * spaces:
+                The spaces, in the order of SPACE_NAMES.
+            * pairs:
+                The pairs of space names, (name 1, name 2), whose
+                geoms collide with each other. Pairs of a space
+                with itself are left out, those geoms have to be
+                collided within their space.
+
+        Output: The root space. Colliding it only calls back for
+                the pairs of spaces in 'pairs' whose bounding boxes
+                overlap; the category bits of the spaces tell which
+                pair it is. '''
+
+    if len(spaces) != len(SPACE_NAMES):
+        raise ValueError('Expected %d spaces, got %d'
+                            % (len(SPACE_NAMES), len(spaces)))
+
+    collide_bits = dict((name, 0) for name in SPACE_NAMES)
+    for name_1, name_2 in pairs:
+        category_1, category_2 = get_category(name_1), get_category(name_2)
+        if name_1 != name_2:
+            collide_bits[name_1] |= category_2
+            collide_bits[name_2] |= category_1
+
+    root = ode.SimpleSpace()
+    for name, space in zip(SPACE_NAMES, spaces):
+        space.setCategoryBits(get_category(name))
+        space.setCollideBits(collide_bits[name])
+        root.add(space)
+    return root
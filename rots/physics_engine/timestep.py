@@ -0,0 +1,116 @@
+''' Runs the simulation at a fixed rate, independent of the frame rate.
+
+    Every frame the time that has passed is added to an accumulator,
+    and as many physics steps of length dt as fit in it are run
+    (possibly none). What is left in the accumulator, as a fraction
+    of dt (alpha), tells how far the game is between the last two
+    physics states, and the moving objects are drawn at that point
+    between them (see State_interpolator). '''
+
+# Guards against losing a step to rounding, e.g. when adding
+# 1/60.0 sixty times doesn't give exactly 1.0
+EPSILON = 1E-9
+
+class Fixed_timestep(object):
+    ''' The accumulator of the game loop. '''
+
+    def __init__(self, dt, max_steps = 5):
+        ''' Input:
+                * dt:
+                    The length of a physics step, in seconds.
+                * max_steps:
+                    The maximum number of steps to run in one
+                    frame. If the simulation can't keep up, the
+                    rest of the time is dropped (the game slows
+                    down instead of falling further and further
+                    behind). '''
+
+        if dt <= 0:
+            raise ValueError('dt must be positive, got %s' % dt)
+        if max_steps < 1:
+            raise ValueError('max_steps must be at least 1, got %s' % max_steps)
+
+        self._dt = dt
+        self._max_steps = max_steps
+        self._accumulator = 0.0
+        self._dropped_time = 0.0
+
+    def get_dt(self):
+        return self._dt
+
+    def set_dt(self, dt):
+        if dt <= 0:
+            raise ValueError('dt must be positive, got %s' % dt)
+        self._dt = dt
+        self._accumulator = min(self._accumulator, dt)
+
+    def get_max_steps(self):
+        return self._max_steps
+
+    def get_dropped_time(self):
+        ''' The total time, in seconds, that the simulation
+            has dropped because it couldn't keep up. '''
+        return self._dropped_time
+
+    def advance(self, frame_time):
+        ''' Adds the time of the last frame (in seconds) and
+            returns the number of physics steps to run. '''
+
+        self._accumulator += max(frame_time, 0.0)
+        steps = int(self._accumulator / self._dt + EPSILON)
+
+        if steps > self._max_steps:
+            self._dropped_time += (steps - self._max_steps) * self._dt
+            self._accumulator -= (steps - self._max_steps) * self._dt
+            steps = self._max_steps
+
+        self._accumulator = max(self._accumulator - steps * self._dt, 0.0)
+        return steps
+
+    def get_alpha(self):
+        ''' How far the game is between the last two physics
+            states, 0.0 (at the previous) to 1.0 (at the last). '''
+        return min(self._accumulator / self._dt, 1.0)
+
+class State_interpolator(object):
+    ''' Remembers the positions of the moving objects before the
+        last physics step, so that they can be drawn in between
+        that and their current position. '''
+
+    def __init__(self):
+        self._previous = {}
+
+    def save(self, objects):
+        ''' Saves the positions of the objects that may move.
+            Call it right before each physics step. '''
+
+        self._previous = dict((item, item.get_pos().value) for item in objects)
+
+    def get_offset(self, item, alpha):
+        ''' The translation from the current position of the
+            item to where it should be drawn, None if the item
+            isn't moving. '''
+
+        previous = self._previous.get(item)
+        if previous is None:
+            return None
+
+        current = item.get_pos().value
+        t = 1.0 - alpha
+        return ((previous[0] - current[0]) * t,
+                (previous[1] - current[1]) * t,
+                (previous[2] - current[2]) * t)
+
+    def get_pos(self, item, alpha):
+        ''' The position, as a tuple, where the item
+            should be drawn. '''
+
+        offset = self.get_offset(item, alpha)
+        current = item.get_pos().value
+        if offset is None:
+            return current
+        return (current[0] + offset[0], current[1] + offset[1],
+                current[2] + offset[2])
+
+    def clear(self):
+        self._previous = {}
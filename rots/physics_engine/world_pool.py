@@ -0,0 +1,246 @@
+''' A pool of processes that simulate many independent worlds, for
+    offline work such as validating replays or sweeping the parameters
+    of a level. No graphics are involved.
+
+    Each world is built in a worker process from a Scene_description
+    and stepped with physics.update_physics. The worlds are divided
+    over the processes, so with as many processes as cores the worlds
+    run in parallel. The state of the worlds (the number of ticks, the
+    time spent, the positions of the bodies) is written to shared
+    memory, which the pool reads without pickling anything.
+
+    The worlds can be stepped in lockstep (step() waits for all worlds
+    after every tick) or free-running (run() lets every world take all
+    its steps without waiting for the others).
+
+        descriptions = [Scene_description(Benchmark_scene, 100, {}, seed = i)
+                        for i in range(16)]
+        with World_pool(descriptions) as pool:
+            pool.run(600)
+            print pool.get_positions(0) '''
+
+import multiprocessing
+import timeit
+import traceback
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from physics_engine import physics
+
+# The layout of the state of a world in the shared memory: the number
+# of ticks, the seconds spent in them, the number of awake bodies, the
+# number of tracked bodies and their positions (x, y, z)
+TICKS, SECONDS, AWAKE, BODIES, POSITIONS = range(5)
+
+class Scene_description(object):
+    ''' How to build a scene in a worker: 'factory' is called with
+        the rest of the arguments and returns an object with the
+        getters that update_physics needs (a Game, or e.g. a
+        benchmarks.space_benchmark.Benchmark_scene). Everything has
+        to be picklable, so the factory has to be defined at the top
+        level of a module. '''
+
+    def __init__(self, factory, *args, **kwargs):
+        self._factory = factory
+        self._args = args
+        self._kwargs = kwargs
+
+    def build(self):
+        return self._factory(*self._args, **self._kwargs)
+
+class _World(object):
+    ''' A world in a worker, with its row of the shared memory. '''
+
+    def __init__(self, description, state):
+        self._scene = description.build()
+        self._state = state
+
+        # The bodies whose positions are written, the first
+        # ones in the sphere and object spaces
+        max_bodies = (len(state) - POSITIONS) // 3
+        self._bodies = []
+        for space in (self._scene.get_sphere_space(), self._scene.get_object_space()):
+            for i in range(space.getNumGeoms()):
+                body = space.getGeom(i).getBody()
+                if body is not None and len(self._bodies) < max_bodies:
+                    self._bodies.append(body)
+
+        state[BODIES] = len(self._bodies)
+        self.write()
+
+    def step(self):
+        start = timeit.default_timer()
+        physics.update_physics(self._scene)
+        self._state[SECONDS] += timeit.default_timer() - start
+        self._state[TICKS] += 1
+
+    def write(self):
+        ''' Writes the positions of the bodies and the number
+            of awake bodies to the shared memory. '''
+
+        state = self._state
+        for i, body in enumerate(self._bodies):
+            state[POSITIONS + 3 * i:POSITIONS + 3 * i + 3] = body.getPosition()
+        state[AWAKE] = len(self._scene.get_sleep_tracker().get_awake())
+
+def _work(connection, descriptions, indices, shared, stride):
+    ''' The main function of a worker process: builds the worlds
+        with the given indices and steps them when told to. Answers
+        every command with ('done', None) or ('error', traceback). '''
+
+    try:
+        states = np.frombuffer(shared).reshape(len(descriptions), stride)
+        worlds = [_World(descriptions[i], states[i]) for i in indices]
+        connection.send(('done', None))
+    except Exception:
+        connection.send(('error', traceback.format_exc()))
+        return
+
+    while True:
+        command, ticks = connection.recv()
+        if command == 'close':
+            break
+
+        try:
+            for i in range(ticks):
+                for world in worlds:
+                    world.step()
+            for world in worlds:
+                world.write()
+            connection.send(('done', None))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+
+class World_pool(object):
+
+    def __init__(self, descriptions, processes = None, max_bodies = 64):
+        ''' Starts the processes and builds the worlds in them.
+
+            Input:
+                * descriptions:
+                    A list of Scene_description, one per world.
+                * processes:
+                    The number of worker processes, by default
+                    the number of cores (but never more than
+                    the number of worlds).
+                * max_bodies:
+                    The number of bodies per world whose
+                    positions are written to the shared memory. '''
+
+        if not descriptions:
+            raise ValueError('A World_pool needs at least one scene description')
+
+        processes = min(processes or multiprocessing.cpu_count(), len(descriptions))
+        stride = POSITIONS + 3 * max_bodies
+
+        self._shared = RawArray('d', len(descriptions) * stride)
+        self._states = np.frombuffer(self._shared).reshape(len(descriptions), stride)
+
+        self._workers = []
+        for p in range(processes):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target = _work,
+                                              args = (worker_connection, descriptions,
+                                                      list(range(p, len(descriptions), processes)),
+                                                      self._shared, stride))
+            process.daemon = True
+            process.start()
+            self._workers.append((process, connection))
+
+        self._wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, trace):
+        self.close()
+
+    def get_size(self):
+        ''' The number of worlds. '''
+        return len(self._states)
+
+    def get_processes(self):
+        return len(self._workers)
+
+    def _send(self, command, ticks = 0):
+        for process, connection in self._workers:
+            connection.send((command, ticks))
+
+    def _wait(self):
+        ''' Waits until all workers have answered. Raises a
+            RuntimeError with the traceback if one has failed. '''
+
+        errors = []
+        for process, connection in self._workers:
+            status, message = connection.recv()
+            if status == 'error':
+                errors.append(message)
+
+        if errors:
+            self.close()
+            raise RuntimeError('A world failed in a worker process:\n' + errors[0])
+
+    def step(self, ticks = 1, callback = None):
+        ''' Steps all worlds 'ticks' times in lockstep: every world
+            takes a step before any world takes the next one. After
+            each step callback(pool) is called, if given, and can
+            read the state of the worlds. '''
+
+        for i in range(ticks):
+            self._send('step', 1)
+            self._wait()
+            if callback is not None:
+                callback(self)
+
+    def run(self, ticks):
+        ''' Lets every world take 'ticks' steps as fast as it can,
+            and returns when all of them are done. '''
+
+        self._send('step', ticks)
+        self._wait()
+
+    ### The state of the worlds, read from the shared memory
+
+    def get_ticks(self, world):
+        return int(self._states[world, TICKS])
+
+    def get_seconds(self, world):
+        ''' The time the world has spent in update_physics. '''
+        return float(self._states[world, SECONDS])
+
+    def get_awake(self, world):
+        ''' The number of awake bodies in the world. '''
+        return int(self._states[world, AWAKE])
+
+    def get_positions(self, world):
+        ''' The positions of the tracked bodies of the world,
+            an (n, 3) array (a copy). '''
+
+        count = int(self._states[world, BODIES])
+        return self._states[world, POSITIONS:POSITIONS + 3 * count].reshape(count, 3).copy()
+
+    def get_results(self):
+        ''' The state of all worlds, as a list of dictionaries. '''
+
+        return [{'ticks': self.get_ticks(world),
+                 'seconds': self.get_seconds(world),
+                 'awake': self.get_awake(world),
+                 'positions': self.get_positions(world).tolist()}
+                for world in range(self.get_size())]
+
+    def close(self):
+        ''' Stops the worker processes. '''
+
+        for process, connection in self._workers:
+            if process.is_alive():
+                try:
+                    connection.send(('close', 0))
+                except (IOError, OSError):
+                    pass
+        for process, connection in self._workers:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+            connection.close()
+        self._workers = []
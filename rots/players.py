@@ -1,7 +1,7 @@
 import numbers
 
 from objects import shapes
-from math_classes.vectors import Vector
+from math_classes.vectors import Vector3
 from sound import sound_effects
 
 # TODO: Make prettier, add more stuff
@@ -27,10 +27,10 @@ class Player:
         self._bounce_sound = sound_effects.load_sound('bounce_5.wav')
         self._jump_sound.set_volume(0.15)
         self._bounce_sound.set_volume(0.7)
-        self._up = Vector([0.0, 1.0, 0.0])
+        self._up = Vector3((0.0, 1.0, 0.0))
         self._jump_constant = 800
 
-        self.lastDir = Vector()
+        self.lastDir = Vector3()
 
     def move(self, direction, forward_vector, up_vector, jump):
         ''' Moves the player in the specified direction by applying
@@ -74,7 +74,7 @@ class Player:
         z_movement = forward_vector * direction.value[2]
         direction = x_movement + z_movement
 
-        current_vel = Vector(list(self._shape.get_body().getLinearVel()))
+        current_vel = Vector3(self._shape.get_body().getLinearVel())
         proj_vel = current_vel.dot(direction)
 
         # NOTE: The sphere can now only change direction if it touches something,
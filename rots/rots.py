@@ -5,16 +5,18 @@ from OpenGL.GLU import *
 from OpenGL.GLUT import *
 import ode
 
+import argparse
 import traceback
 import sys
+import timeit
 import warnings
 
 import scenes
 import games
 import players
-from graphics import render, init_graphics, lights, cameras, textures
+from graphics import render, init_graphics, lights, cameras, textures, texture_cache, texture_registry, meshes, views
 from math_classes.vectors import Vector
-from physics_engine import physics
+from physics_engine import physics, spaces
 from objects import shapes
 from objects.text import TextBox
 
@@ -31,12 +33,25 @@ def game_loop(game):
     clock = game.get_clock()
     fps = game.get_fps()
 
-    # Simulate
-    physics.update_physics(game)
-
-    # Move
-    forward_vector, up_vector = camera.update(player, mouse_movement, scroll_direction, camera_mode)
-    player.move(direction, forward_vector, up_vector, jump)
+    # Simulate: run as many fixed physics steps as fit in the time
+    # of the last frame, so that the game runs at the same speed
+    # whatever the frame rate. The forces from the player are
+    # cleared after each step, so they are applied before each one.
+    # On frames without a step the input waits for the next one.
+    forward_vector, up_vector = camera.get_direction(), camera.get_up()
+    game.add_input(direction, jump)
+    steps = game.get_timestep().advance(clock.get_time() / 1000.0)
+    for i in range(steps):
+        if i == 0:
+            direction, jump = game.pop_input()
+        player.move(direction, forward_vector, up_vector, jump and i == 0)
+        game.save_physics_state()
+        physics.update_physics(game)
+    game.update_spatial_index()
+
+    # Move the camera to where the player is drawn
+    camera.update(player, mouse_movement, scroll_direction, camera_mode,
+                  game.get_draw_pos(player.get_shape()))
 
     # Render
     render.render(game)
@@ -53,12 +68,119 @@ def pause_loop(game):
     toggle_pause = game_input[3]
     return run, toggle_pause
 
-def main():
+def parse_arguments(argv):
+    ''' Parses the command line arguments. '''
+
+    parser = argparse.ArgumentParser(description = 'Return of the Spheres')
+    parser.add_argument('--geometry', choices = meshes.BACKENDS,
+                        default = meshes.DISPLAY_LIST,
+                        help = 'how the geometry of the objects is stored '
+                               'on the graphics card (default: %(default)s)')
+    parser.add_argument('--space', action = 'append', default = [],
+                        metavar = 'NAME=TYPE',
+                        help = 'the broadphase of a collision space, e.g. '
+                               'static=simple, sphere=hash:-2:2 or '
+                               'static=quadtree:0,0,0:60,20,60:5 (spaces: %s)'
+                               % ', '.join(spaces.SPACE_NAMES))
+    parser.add_argument('--tick-rate', type = int, default = None,
+                        help = 'the number of physics steps per second '
+                               '(default: the frame rate)')
+    parser.add_argument('--no-texture-cache', action = 'store_true',
+                        help = 'decode the textures and build their mipmaps '
+                               'on every start instead of using the cache in '
+                               '%s' % texture_cache.CACHE_DIR)
+    parser.add_argument('--texture-budget', type = float,
+                        default = texture_registry.DEFAULT_BUDGET / (1024.0 * 1024.0),
+                        metavar = 'MB',
+                        help = 'how much memory the textures may take before '
+                               'the unused ones are deleted (default: %(default)s)')
+    parser.add_argument('--texture-streaming', action = 'store_true',
+                        help = 'upload only the small mipmaps of the scene '
+                               'textures when it is loaded, and the larger '
+                               'ones when the objects get close to the camera')
+    parser.add_argument('--headless', action = 'store_true',
+                        help = 'run the simulation without a window, '
+                               'e.g. for profiling or on a server')
+    parser.add_argument('--ticks', type = int, default = 600,
+                        help = 'the number of physics steps to run in '
+                               'headless mode (default: %(default)s)')
+    parser.add_argument('--profile', metavar = 'FILE',
+                        help = 'time the phases of the physics steps and '
+                               'write them to FILE when the game ends '
+                               '(JSON if FILE ends with .json, else CSV)')
+    options = parser.parse_args(argv)
+
+    try:
+        options.space_configs = parse_space_configs(options.space)
+    except ValueError as message:
+        parser.error('--space: %s' % message)
+    return options
+
+def parse_space_configs(descriptions):
+    ''' Turns the --space arguments into a dictionary
+        from space name to Space_config. '''
+
+    configs = {}
+    for description in descriptions:
+        name, sep, space_type = description.partition('=')
+        if not sep:
+            raise ValueError("Expected NAME=TYPE, got '%s'" % description)
+        if name not in spaces.SPACE_NAMES:
+            raise ValueError("Unknown space '%s', use one of %s"
+                                % (name, ', '.join(spaces.SPACE_NAMES)))
+        configs[name] = spaces.Space_config.from_string(space_type)
+    return configs
+
+def run_headless(ticks, space_configs, tick_rate = None, profile = None):
+    ''' Creates the scene without a window (and without any
+        render resources) and steps the simulation 'ticks'
+        times, as fast as possible. Prints the ticks per second.
+
+        Output: The number of ticks per second. '''
+
+    # The view is only used for its size, it is never set up
+    view = views.View(640, 480, 45.0)
+    game = scenes.init_scene((view, 'stars-5.jpg'), space_configs)
+    if tick_rate:
+        game.set_tick_rate(tick_rate)
+    if profile:
+        game.set_profiling(True)
+
+    def tick():
+        physics.update_physics(game)
+        game.update_spatial_index()
+
+    seconds = timeit.timeit(tick, number = ticks)
+    ticks_per_second = ticks / seconds if seconds > 0 else float('inf')
+
+    print '%d ticks in %.3f s: %.1f ticks/s (%.3f ms/tick)' % \
+            (ticks, seconds, ticks_per_second, seconds / ticks * 1000.0)
+
+    if profile:
+        game.get_profiler().dump(profile)
+    return ticks_per_second
+
+def main(argv = None):
     ''' Main routine of the game.'''
 
+    options = parse_arguments(argv)
+    meshes.set_backend(options.geometry)
+    texture_cache.set_enabled(not options.no_texture_cache)
+    textures.set_budget(int(options.texture_budget * 1024 * 1024))
+    textures.set_streaming(options.texture_streaming)
+    space_configs = options.space_configs
+
+    if options.headless:
+        run_headless(options.ticks, space_configs, options.tick_rate, options.profile)
+        return
+
     view = init_graphics.init_window('Return of the Spheres', HAVE_FULLSCREEN = True)
 
-    game = scenes.init_scene((view, 'stars-5.jpg'))
+    game = scenes.init_scene((view, 'stars-5.jpg'), space_configs)
+    if options.tick_rate:
+        game.set_tick_rate(options.tick_rate)
+    if options.profile:
+        game.set_profiling(True)
 
     player = game.get_player()
     camera = game.get_camera()
@@ -99,6 +221,9 @@ def main():
         else:
             run, toggle_pause = pause_loop(game)
     
+    if options.profile:
+        game.get_profiler().dump(options.profile)
+
     #Fade out the music after quitting the game
     pygame.mixer.music.fadeout(1000)
     pygame.time.wait(1000)
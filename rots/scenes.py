@@ -10,10 +10,25 @@ import players
 from objects import shapes, power_ups, interactive_objects, moving_scene
 from graphics import init_graphics, lights, cameras, textures, loading_screen
 from math_classes.vectors import Vector
+from physics_engine.spaces import Space_config, create_spaces
 
-def init_scene(loading_screen_data):
+# The broadphase of the collision spaces in the scenes, see
+# physics_engine/spaces.py. The hash levels should span the
+# sizes of the geoms in the space (cells of 2^min ... 2^max).
+SCENE_1_SPACES = {'sphere': Space_config.hash(-2, 2),
+                  'object': Space_config.hash(-2, 2),
+                  'static': Space_config.hash(-3, 5),
+                  'power_up': Space_config.simple(),
+                  'interactive_object': Space_config.simple(),
+                  'moving_scene': Space_config.simple()}
+
+SCENE_2_SPACES = {'static': Space_config.simple()}
+
+def init_scene(loading_screen_data, space_configs = None):
     ''' Initializes the scene (creates all objects etc)
-        and returns the game object. '''
+        and returns the game object. space_configs can
+        override the broadphase of the collision spaces
+        (space name -> Space_config), see SCENE_1_SPACES. '''
 
     # TODO: Make this function read info from another file and create
     # a the scene as described in that file, in order to make it easier
@@ -29,8 +44,9 @@ def init_scene(loading_screen_data):
     start_screen = loading_screen.Loading_screen(loading_image, width, height, aspect_angle)
 
     # TODO: Place them better
-    progress_texture_1 = textures.load_texture('number_bar.png')
-    progress_texture_2 = textures.load_texture('striped_bar.png')
+    # Regions of the same atlas texture
+    progress_texture_1 = textures.acquire_region('number_bar.png')
+    progress_texture_2 = textures.acquire_region('striped_bar.png')
 
     module_textbox = start_screen.add_textbox('test.ttf', 0.035, 0.35, 0.5, [1,0,0])
     total_textbox = start_screen.add_textbox('test.ttf', 0.035, 0.35, 0.38, [0,1,0])
@@ -41,8 +57,8 @@ def init_scene(loading_screen_data):
     
     module_textbox.set_message('Creating world', 'plain text')
     module_progress_bar.disable()
-    total_textbox.set_message('Total', 'percentage', denominator = 53)
-    total_progress_bar.set_denominator(53)
+    total_textbox.set_message('Total', 'percentage', denominator = 27)
+    total_progress_bar.set_denominator(27)
     start_screen.update()
 
     # Create a world object
@@ -55,12 +71,10 @@ def init_scene(loading_screen_data):
 
     # Create space objects, one for spheres, one for other
     # moving objects and one for the static environment
-    sphere_space = ode.Space(1)
-    object_space = ode.Space(1)
-    static_space = ode.Space(1)
-    power_up_space = ode.Space(1)
-    interactive_object_space = ode.Space(1)
-    moving_scene_space = ode.Space(1)
+    configs = dict(SCENE_1_SPACES)
+    configs.update(space_configs or {})
+    sphere_space, object_space, static_space, power_up_space, \
+            interactive_object_space, moving_scene_space = create_spaces(configs)
 
     # Load textures
     module_textbox.set_message('Loading textures', 'percentage', denominator = 6)
@@ -68,23 +82,23 @@ def init_scene(loading_screen_data):
     module_progress_bar.set_denominator(6)
     start_screen.update()
 
-    earth_tex = textures.load_texture('celestial_bodies/earth_big.jpg')
-    start_screen.update(counter_increase = 1)
-
-    moon_tex = textures.load_texture('celestial_bodies/moon-4k.png')
-    start_screen.update(counter_increase = 1)
-
-    stars_tex = textures.load_texture('stars_big.jpg')
-    start_screen.update(counter_increase = 1)
-
-    sun_tex = textures.load_texture('celestial_bodies/th_sun.png')
-    start_screen.update(counter_increase = 1)
-
-    mars_tex = textures.load_texture('celestial_bodies/Mars_2k-050104.png')
-    start_screen.update(counter_increase = 1)
-
-    puppy_tex = textures.load_texture('frida_valp.jpg')
-    start_screen.update(counter_increase = 1)
+    # The images are decoded in parallel, the progress bars
+    # move as each texture is done
+    loaded = textures.load_textures(['celestial_bodies/earth_big.jpg',
+                                     'celestial_bodies/moon-4k.png',
+                                     'stars_big.jpg',
+                                     'celestial_bodies/th_sun.png',
+                                     'celestial_bodies/Mars_2k-050104.png',
+                                     'frida_valp.jpg'],
+                                    lambda image_file, texture: \
+                                        start_screen.update(counter_increase = 1))
+
+    earth_tex = loaded['celestial_bodies/earth_big.jpg']
+    moon_tex = loaded['celestial_bodies/moon-4k.png']
+    stars_tex = loaded['stars_big.jpg']
+    sun_tex = loaded['celestial_bodies/th_sun.png']
+    mars_tex = loaded['celestial_bodies/Mars_2k-050104.png']
+    puppy_tex = loaded['frida_valp.jpg']
 
     # Create shapes
     module_textbox.set_message('Creating objects', 'percentage', denominator = 6)
@@ -222,83 +236,18 @@ def init_scene(loading_screen_data):
                             length = 12.0, width = 1.5)
     start_screen.update(counter_increase = 1)
 
-    # Set the color of the surfaces
-
-    # NOTE: It takes A LOT of time to set the colors,
-    # since we generate a new display list each time we
-    # change color. Better/faster solution?
-
-    module_textbox.set_message('Setting colours', 'percentage', denominator = 26)
-    module_textbox.reset_counter()
-    module_progress_bar.reset_counter()
-    module_progress_bar.set_denominator(26)
-    start_screen.update()
-
+    # Set the color of the surfaces. This only changes the
+    # material of the objects, the geometry is left as it is.
     slippy_floor.set_ambient([0.5, 0.5, 0.8, 1.0])
-    start_screen.update(counter_increase = 1)
     slippy_floor.set_diffuse([0.5, 0.5, 0.8, 1.0])
-    start_screen.update(counter_increase = 1)
-    
 
     slippy_roof.set_ambient([0.8, 0.5, 0.5, 1.0])
-    start_screen.update(counter_increase = 1)
     slippy_roof.set_diffuse([0.8, 0.5, 0.5, 1.0])
-    start_screen.update(counter_increase = 1)
 
-    wall1.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    wall1.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    wall2.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    wall2.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    door_wall_1.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    door_wall_1.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    door_wall_2.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    door_wall_2.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    door_wall_3.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    door_wall_3.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    floor_slope.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    floor_slope.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    roof_slope.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    roof_slope.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    fence_1.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    fence_1.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    fence_2.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    fence_2.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    fence_3.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    fence_3.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-
-    balcony.set_ambient([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
-    balcony.set_diffuse([0.0, 0.0, 0.2, 1.0])
-    start_screen.update(counter_increase = 1)
+    for item in (wall1, wall2, door_wall_1, door_wall_2, door_wall_3,
+                 floor_slope, roof_slope, fence_1, fence_2, fence_3, balcony):
+        item.set_ambient([0.0, 0.0, 0.2, 1.0])
+        item.set_diffuse([0.0, 0.0, 0.2, 1.0])
 
     # Set friction and bounce
     slippy_floor.set_friction(0.1)
@@ -310,7 +259,7 @@ def init_scene(loading_screen_data):
     sticky_roof.set_friction(10)
     sticky_roof.set_bounce(0.1)
 
-    door = moving_scene.Sliding_door(moving_scene_space, pos = Vector((0.0, 2.0, -15.0)), 
+    door = moving_scene.Sliding_door(world, moving_scene_space, pos = Vector((0.0, 2.0, -15.0)), 
                             normal = Vector((0.0, 0.0, 1.0)),
                             slide_dir = Vector((1.0, 0.0, 0.0)), slide_size = 6,
                             ort_size = 4)
@@ -329,7 +278,7 @@ def init_scene(loading_screen_data):
                             side = 1,
                             action = door.toggle)
 
-    moving_platform = moving_scene.Moving_platform(moving_scene_space, normal = Vector((0.0, 1.0, 0.0)),
+    moving_platform = moving_scene.Moving_platform(world, moving_scene_space, normal = Vector((0.0, 1.0, 0.0)),
                             forward = Vector((0.0, 0.0, 1.0)), width = 5, length = 5,
                             turning_points = (Vector((-12.5, 1.0, 12.5)), Vector((0.0, 10.0, 12.5))))
 
@@ -397,7 +346,7 @@ def init_scene(loading_screen_data):
 
     return game
 
-def init_scene_2(view):
+def init_scene_2(view, space_configs = None):
     ''' Another, simpler scene for shadow tests '''
 
     # Create a world object
@@ -410,12 +359,10 @@ def init_scene_2(view):
 
     # Create space objects, one for spheres, one for other
     # moving objects and one for the static environment
-    sphere_space = ode.Space(1)
-    object_space = ode.Space(1)
-    static_space = ode.Space(1)
-    power_up_space = ode.Space(1)
-    interactive_object_space = ode.Space(1)
-    moving_scene_space = ode.Space(1)
+    configs = dict(SCENE_2_SPACES)
+    configs.update(space_configs or {})
+    sphere_space, object_space, static_space, power_up_space, \
+            interactive_object_space, moving_scene_space = create_spaces(configs)
 
     # Create player
     earth_tex = textures.load_texture('celestial_bodies/earth_big.jpg')
@@ -7,6 +7,10 @@ def load_sound(file_name):
         print 'Warning: Unable to load module pygame.mixer'
         return None_sound()
 
+    # No mixer without a window (headless mode)
+    if not pygame.mixer.get_init():
+        return None_sound()
+
     fullname = os.path.join('sound/sound_data', file_name)
     try:
         sound = pygame.mixer.Sound(fullname)
@@ -18,4 +22,7 @@ def load_sound(file_name):
 
 class None_sound:
     def play(self):
-        pass
\ No newline at end of file
+        pass
+
+    def set_volume(self, volume):
+        pass
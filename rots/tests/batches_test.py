@@ -0,0 +1,66 @@
+import unittest
+import math
+
+import numpy as np
+
+from ..math_classes import batches
+from ..math_classes.vectors import Vector
+
+class TestBatches(unittest.TestCase):
+
+    def setUp(self):
+        self.a = np.array([[2.0, 0.0, 3.0], [0.0, 2.0, 3.0], [0.0, 0.0, 0.0]])
+        self.b = np.array([[0.0, 2.0, 3.0], [1.0, 3.0, -2.0], [1.0, 0.0, 0.0]])
+
+    def test_as_array(self):
+        array = batches.as_array([Vector([2, 0, 3]), (0, 2, 3)])
+        self.assertEqual((2, 3), array.shape)
+        self.assertEqual([0.0, 2.0, 3.0], list(array[1]))
+
+    def test_dot(self):
+        self.assertEqual([9.0, 0.0, 0.0], list(batches.dot(self.a, self.b)))
+        self.assertEqual([2.0, 0.0, 0.0], list(batches.dot(self.a, self.b[2])))
+
+    def test_cross(self):
+        self.assertEqual([-6.0, -6.0, 4.0], list(batches.cross(self.a, self.b)[0]))
+
+    def test_norms(self):
+        self.assertAlmostEqual(math.sqrt(13), batches.norms(self.a)[0])
+
+    def test_normalize(self):
+        n = batches.normalize(self.a)
+        self.assertAlmostEqual(1.0, batches.norms(n)[0])
+        self.assertAlmostEqual(1.0, batches.norms(n)[1])
+        # Zero vectors stay zero
+        self.assertEqual([0.0, 0.0, 0.0], list(n[2]))
+        # Should not mutate
+        self.assertEqual([2.0, 0.0, 3.0], list(self.a[0]))
+
+    def test_projected(self):
+        expected = Vector([2, 0, 3]).projected(Vector([0, 2, 3]),
+                                               Vector([1, 3, -2])).value
+        actual = batches.projected(self.a, [0, 2, 3], [1, 3, -2])[0]
+
+        for a, b in zip(expected, actual):
+            self.assertAlmostEqual(a, b)
+
+    def test_transform(self):
+        # Translation by (1, 2, 3) in OpenGL standard
+        matrix = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 1, 2, 3, 1]
+        self.assertEqual([3.0, 2.0, 6.0], list(batches.transform(self.a, matrix)[0]))
+
+    def test_rotate(self):
+        # 90 degrees around z, ODE form (row major)
+        rotation = [0, -1, 0, 1, 0, 0, 0, 0, 1]
+        rotated = batches.rotate(self.b[:1], [rotation])
+        self.assertEqual([-2.0, 0.0, 3.0], list(rotated[0]))
+
+    def test_ODE_to_OpenGL(self):
+        rotation = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+        out = batches.ODE_to_OpenGL([rotation], [[9, 10, 11]])
+        self.assertEqual(np.float32, out.dtype)
+        self.assertEqual([0, 3, 6, 0, 1, 4, 7, 0, 2, 5, 8, 0, 9, 10, 11, 1],
+                         list(out[0]))
+
+if __name__ == '__main__':
+    unittest.main()
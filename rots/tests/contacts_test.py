@@ -0,0 +1,50 @@
+import unittest
+
+from ..physics_engine.contacts import Contact_budget
+
+class Fake_contact(object):
+    ''' The part of an ode.Contact that the budget uses. '''
+
+    def __init__(self, depth):
+        self.depth = depth
+
+    def getContactGeomParams(self):
+        return (0.0, 0.0, 0.0), (0.0, 1.0, 0.0), self.depth, None, None
+
+def fake_contacts(*depths):
+    return [Fake_contact(depth) for depth in depths]
+
+class TestContacts(unittest.TestCase):
+
+    def test_per_pair(self):
+        budget = Contact_budget(max_contacts = 100, max_per_pair = 2)
+        budget.begin_step()
+        budget.refill()
+        taken = budget.take(fake_contacts(0.1, 0.3, 0.2))
+        self.assertEqual([0.3, 0.2], [contact.depth for contact in taken])
+        self.assertEqual(1, budget.get_dropped())
+        self.assertEqual(98, budget.get_remaining())
+
+    def test_per_step(self):
+        budget = Contact_budget(max_contacts = 3, max_per_pair = 2)
+        budget.begin_step()
+        budget.refill()
+        self.assertEqual(2, len(budget.take(fake_contacts(0.1, 0.1))))
+        self.assertEqual(1, len(budget.take(fake_contacts(0.1, 0.1))))
+        self.assertEqual([], budget.take(fake_contacts(0.1)))
+        self.assertEqual(2, budget.get_dropped())
+
+        # A new sub-step gets the full budget, a new step starts
+        # counting the dropped contacts over
+        budget.refill()
+        self.assertEqual(3, budget.get_remaining())
+        budget.begin_step()
+        self.assertEqual(0, budget.get_dropped())
+        self.assertEqual(2, budget.get_total_dropped())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Contact_budget, 0)
+        self.assertRaises(ValueError, Contact_budget, 10, 0)
+
+if __name__ == '__main__':
+    unittest.main()
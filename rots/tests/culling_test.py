@@ -0,0 +1,67 @@
+import unittest
+import math
+
+import numpy as np
+
+from ..graphics.culling import Frustum
+from ..math_classes.matrices import Matrix4
+
+class TestFrustum(unittest.TestCase):
+
+    def setUp(self):
+        # Camera in (0, 0, 10) looking towards origo
+        projection = Matrix4.perspective(45.0, 4.0 / 3.0, 0.1, 100.0)
+        look_at = Matrix4.look_at((0.0, 0.0, 10.0), (0.0, 0.0, 0.0),
+                                  (0.0, 1.0, 0.0))
+        self.frustum = Frustum.from_matrix(projection * look_at)
+
+    def test_perspective(self):
+        # gluPerspective(90, 1, 1, 3)
+        rows = Matrix4.perspective(90.0, 1.0, 1.0, 3.0).rows()
+        self.assertAlmostEqual(1.0, rows[0][0], 5)
+        self.assertAlmostEqual(-2.0, rows[2][2], 5)
+        self.assertAlmostEqual(-3.0, rows[2][3], 5)
+        self.assertAlmostEqual(-1.0, rows[3][2], 5)
+
+    def test_look_at(self):
+        look_at = Matrix4.look_at((0.0, 0.0, 10.0), (0.0, 0.0, 0.0),
+                                  (0.0, 1.0, 0.0))
+        # Origo ends up 10 units in front of the camera
+        self.assertEqual([0.0, 0.0, -10.0], list((look_at * (0, 0, 0)).value))
+
+    def test_points(self):
+        self.assertTrue(self.frustum.contains_point((0.0, 0.0, 0.0)))
+        self.assertTrue(self.frustum.contains_point((1.0, 1.0, -50.0)))
+        # Behind the camera
+        self.assertFalse(self.frustum.contains_point((0.0, 0.0, 11.0)))
+        # Beyond the far plane
+        self.assertFalse(self.frustum.contains_point((0.0, 0.0, -95.0)))
+        # Far out to the side
+        self.assertFalse(self.frustum.contains_point((20.0, 0.0, 0.0)))
+
+    def test_AABB(self):
+        minx, maxx, miny, maxy, minz, maxz = self.frustum.get_AABB()
+        # The far plane, 100 units from the camera, is the widest
+        half_height = math.tan(math.radians(22.5)) * 100.0
+        self.assertAlmostEqual(-half_height * 4.0 / 3.0, minx, 3)
+        self.assertAlmostEqual(half_height * 4.0 / 3.0, maxx, 3)
+        self.assertAlmostEqual(-half_height, miny, 3)
+        self.assertAlmostEqual(half_height, maxy, 3)
+        self.assertAlmostEqual(-90.0, minz, 3)
+        self.assertAlmostEqual(9.9, maxz, 3)
+
+    def test_AABBs(self):
+        AABBs = np.array([(-1.0, 1.0, -1.0, 1.0, -1.0, 1.0),      # In front
+                          (-1.0, 1.0, -1.0, 1.0, 11.0, 12.0),     # Behind
+                          (19.0, 21.0, -1.0, 1.0, -1.0, 1.0),     # To the side
+                          (3.0, 30.0, -1.0, 1.0, -1.0, 1.0),      # Partly inside
+                          (-50.0, 50.0, -50.0, 50.0, 20.0, 30.0)]) # Behind, but large
+        self.assertEqual([True, False, False, True, False],
+                         list(self.frustum.AABBs_visible(AABBs)))
+
+    def test_infinite_AABB(self):
+        inf = float('inf')
+        self.assertTrue(self.frustum.AABB_visible((-inf, inf, -inf, 0.0, -inf, inf)))
+
+if __name__ == '__main__':
+    unittest.main()
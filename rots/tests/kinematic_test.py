@@ -0,0 +1,38 @@
+import unittest
+
+from ..physics_engine.kinematic import Oscillation, Ease
+from ..math_classes.vectors import Vector
+
+class TestKinematic(unittest.TestCase):
+
+    def assertVectorAlmostEqual(self, expected, vector):
+        for a, b in zip(expected, vector.value):
+            self.assertAlmostEqual(a, b)
+
+    def test_oscillation(self):
+        curve = Oscillation(Vector((0.0, 2.0, 0.0)), Vector((0.0, 10.0, 0.0)), 4.0)
+        self.assertEqual(8.0, curve.get_period())
+        self.assertVectorAlmostEqual((0.0, 6.0, 0.0), curve.get_pos(0.0))
+        self.assertVectorAlmostEqual((0.0, 2.0, 0.0), curve.get_pos(2.0))
+        self.assertVectorAlmostEqual((0.0, 10.0, 0.0), curve.get_pos(6.0))
+        self.assertVectorAlmostEqual((0.0, 0.0, 0.0), curve.get_velocity(2.0))
+
+    def test_velocity_is_derivative(self):
+        curves = (Oscillation(Vector((1.0, 0.0, 0.0)), Vector((-3.0, 1.0, 0.0)), 2.0),
+                  Ease(Vector((0.0, 0.0, 0.0)), Vector((6.0, 0.0, 2.0)), 0.5))
+        h = 1E-6
+        for curve in curves:
+            for time in (0.1, 0.2, 0.4):
+                slope = (curve.get_pos(time + h) - curve.get_pos(time)) * (1 / h)
+                for a, b in zip(slope.value, curve.get_velocity(time).value):
+                    self.assertAlmostEqual(a, b, places = 4)
+
+    def test_ease_ends(self):
+        curve = Ease(Vector((0.0, 0.0, 0.0)), Vector((6.0, 0.0, 0.0)), 0.5)
+        self.assertVectorAlmostEqual((0.0, 0.0, 0.0), curve.get_pos(-1.0))
+        self.assertVectorAlmostEqual((3.0, 0.0, 0.0), curve.get_pos(0.25))
+        self.assertVectorAlmostEqual((6.0, 0.0, 0.0), curve.get_pos(2.0))
+        self.assertVectorAlmostEqual((0.0, 0.0, 0.0), curve.get_velocity(2.0))
+
+if __name__ == '__main__':
+    unittest.main()
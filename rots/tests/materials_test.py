@@ -0,0 +1,38 @@
+import unittest
+
+from ..graphics import materials
+
+class TestMaterial(unittest.TestCase):
+
+    def setUp(self):
+        materials.clear()
+
+    def test_same_properties_share_material(self):
+        m1 = materials.get_material(ambient = [0.0, 0.0, 0.2, 1.0], shininess = 20)
+        m2 = materials.get_material(ambient = (0.0, 0.0, 0.2, 1.0), shininess = 20)
+        self.assertTrue(m1 is m2)
+        self.assertEqual(materials.get_statistics(), 1)
+
+    def test_different_properties(self):
+        m1 = materials.get_material(shininess = 20)
+        m2 = materials.get_material(shininess = 42)
+        self.assertFalse(m1 is m2)
+
+    def test_with_ambient(self):
+        m1 = materials.get_material(shininess = 20)
+        m2 = m1.with_ambient([0.5, 0.5, 0.8, 1.0])
+        self.assertEqual(m2.get_ambient(), (0.5, 0.5, 0.8, 1.0))
+        self.assertEqual(m2.get_shininess(), 20)
+        # The original material is left as it is
+        self.assertEqual(m1.get_ambient(), materials.DEFAULT_AMBIENT)
+        self.assertTrue(m2.with_ambient(materials.DEFAULT_AMBIENT) is m1)
+
+    def test_properties(self):
+        m = materials.get_material(diffuse = [0.1, 0.2, 0.3, 1.0], shininess = 5)
+        ambient, diffuse, specular, shininess, emissive = m.get_properties()
+        self.assertEqual(diffuse, (0.1, 0.2, 0.3, 1.0))
+        self.assertEqual(shininess, 5)
+        self.assertEqual(emissive, materials.DEFAULT_EMISSIVE)
+
+if __name__ == '__main__':
+    unittest.main()
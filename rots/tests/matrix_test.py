@@ -0,0 +1,87 @@
+import unittest
+from math import pi
+
+from ..math_classes import matrices
+# Vector is imported through matrices so that the isinstance checks
+# in there see the same class
+from ..math_classes.matrices import Matrix4, Orientation_cache, Vector
+
+class TestMatrix4(unittest.TestCase):
+
+    def setUp(self):
+        self.rotation = Matrix4.from_rotation(Vector([0.0, 0.0, 1.0]), pi/2.0)
+        self.translation = Matrix4.from_translation((1.0, 2.0, 3.0))
+
+    def assertListAlmostEqual(self, expected, actual, places = 5):
+        self.assertEqual(len(expected), len(actual))
+        for a, b in zip(expected, actual):
+            self.assertAlmostEqual(a, b, places)
+
+    def test_identity(self):
+        self.assertEqual(matrices.identity(), Matrix4().to_list())
+
+    def test_rotation(self):
+        expected = matrices.generate_rotation_matrix(Vector([0.0, 0.0, 1.0]), pi/2.0)
+        self.assertListAlmostEqual(expected, self.rotation.to_list())
+
+    def test_mult(self):
+        expected = matrices.matrix_mult(self.translation.to_list(),
+                                        self.rotation.to_list())
+        actual = (self.translation * self.rotation).to_list()
+        self.assertListAlmostEqual(expected, actual)
+
+    def test_compose(self):
+        expected = (self.translation * self.rotation * self.translation).to_list()
+        actual = self.translation.compose(self.rotation, self.translation).to_list()
+        self.assertListAlmostEqual(expected, actual)
+
+    def test_transform_point(self):
+        point = (self.translation * self.rotation) * (1.0, 0.0, 0.0)
+        self.assertListAlmostEqual([1.0, 3.0, 3.0], point.value)
+
+    def test_inverse(self):
+        m = self.translation * self.rotation
+        actual = (m * m.inverse()).to_list()
+        self.assertListAlmostEqual(matrices.identity(), actual)
+
+    def test_transposed(self):
+        m = self.translation.transposed()
+        self.assertListAlmostEqual([1.0, 2.0, 3.0], m.to_list()[3:12:4])
+
+    def test_ODE(self):
+        ode_rotation = matrices.OpenGL_to_ODE(self.rotation.to_list())
+        m = Matrix4.from_ODE(ode_rotation, (1.0, 2.0, 3.0))
+        self.assertListAlmostEqual(ode_rotation, m.to_ODE())
+        self.assertListAlmostEqual(matrices.ODE_to_OpenGL(ode_rotation)[:12],
+                                   m.to_list()[:12])
+        self.assertListAlmostEqual([1.0, 2.0, 3.0], m.to_list()[12:15])
+
+    def test_quaternion(self):
+        q = self.rotation.to_quaternion()
+        self.assertListAlmostEqual([0.5 ** 0.5, 0.0, 0.0, 0.5 ** 0.5], q)
+        self.assertListAlmostEqual(self.rotation.to_list(),
+                                   Matrix4.from_quaternion(q).to_list())
+
+        # A rotation of pi has a zero trace
+        flip = Matrix4.from_rotation(Vector([1.0, 0.0, 0.0]), pi)
+        self.assertListAlmostEqual(flip.to_list(),
+                Matrix4.from_quaternion(flip.to_quaternion()).to_list())
+
+class TestOrientationCache(unittest.TestCase):
+
+    def test_get(self):
+        cache = Orientation_cache()
+        rotation = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0)
+
+        first = cache.get(rotation)
+        self.assertEqual(matrices.identity(), [float(e) for e in first])
+        # Same rotation, same buffer
+        self.assertTrue(first is cache.get(tuple(rotation)))
+
+        rotation = (0.0, -1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+        second = cache.get(rotation)
+        self.assertFalse(first is second)
+        self.assertEqual(matrices.ODE_to_OpenGL(rotation), [float(e) for e in second])
+
+if __name__ == '__main__':
+    unittest.main()
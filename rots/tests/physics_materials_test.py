@@ -0,0 +1,36 @@
+import unittest
+from math import sqrt
+
+from ..physics_engine import physics_materials
+
+class TestPhysicsMaterials(unittest.TestCase):
+
+    def test_shared(self):
+        material = physics_materials.get_material(friction = 0.3)
+        self.assertTrue(material is physics_materials.get_material(friction = 0.3))
+        self.assertTrue(material is physics_materials.get_material_by_id(material.get_id()))
+        self.assertTrue(material.with_bounce(0.9) is
+                        physics_materials.get_material(friction = 0.3, bounce = 0.9))
+
+    def test_contact(self):
+        floor = physics_materials.get_material(friction = 10.0, bounce = 0.1)
+        ball = physics_materials.get_material(friction = 1.0, bounce = 0.4,
+                                              rolling_friction = 0.5)
+
+        contact = physics_materials.get_contact('sphere-static', ball, floor)
+        self.assertAlmostEqual(0.2, contact.bounce)
+        self.assertAlmostEqual(sqrt(10.0) * 1000, contact.mu)
+        self.assertAlmostEqual(sqrt(5.0), contact.rolling_friction)
+        self.assertEqual(0, contact.mode)
+
+        contact = physics_materials.get_contact('sphere-sphere', ball, ball)
+        self.assertAlmostEqual(0.1, contact.mu)
+
+    def test_add_pair_type(self):
+        material = physics_materials.get_material(friction = 4.0)
+        physics_materials.add_pair_type('test-test', 0.5)
+        contact = physics_materials.get_contact('test-test', material, material)
+        self.assertAlmostEqual(2.0, contact.mu)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import json
+import os
+import tempfile
+
+from ..physics_engine.profiler import Step_profiler
+
+class Fake_timer(object):
+    ''' A clock that moves forward only when told to. '''
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def two_joints(data, geom1, geom2):
+    data.now += 0.5
+    return 2
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = Fake_timer()
+        self.profiler = Step_profiler(history = 3, timer = self.timer)
+
+    def record_step(self, step_time):
+        profiler = self.profiler
+        profiler.begin_step()
+        callback = profiler.callback('sphere-static', two_joints)
+        callback(self.timer, None, None)
+        profiler.lap('sphere-static')
+        self.timer.now += step_time
+        profiler.lap('step')
+        profiler.end_step()
+
+    def test_record(self):
+        self.record_step(1.0)
+        record = self.profiler.get_records()[0]
+        self.assertEqual(1.5, record['total'])
+        self.assertEqual(0.5, record['callbacks'])
+        self.assertEqual(2, record['joints'])
+        self.assertEqual(0, record['dropped'])
+        self.assertEqual({'sphere-static': 0.5, 'step': 1.0}, record['times'])
+        self.assertEqual({'sphere-static': 2}, record['contacts'])
+        self.assertEqual(['sphere-static', 'step'], self.profiler.get_phases())
+
+    def test_dropped(self):
+        self.profiler.begin_step()
+        self.profiler.end_step(dropped = 3)
+        self.assertEqual(3, self.profiler.get_records()[0]['dropped'])
+        self.assertEqual(3.0, self.profiler.get_summary()['dropped'])
+
+    def test_history(self):
+        for step_time in (1.0, 2.0, 3.0, 4.0):
+            self.record_step(step_time)
+        records = self.profiler.get_records()
+        self.assertEqual([1, 2, 3], [record['step'] for record in records])
+        self.assertEqual(4500.0, self.profiler.get_summary()['total_ms']['max'])
+
+    def test_histogram(self):
+        for step_time in (1.0, 1.0, 3.0):
+            self.record_step(step_time)
+        histogram = self.profiler.histogram(bins = 2)
+        self.assertEqual([2, 1], [count for low, high, count in histogram])
+        self.assertEqual(1500.0, histogram[0][0])
+        self.assertEqual(3500.0, histogram[1][1])
+
+    def test_disabled(self):
+        self.profiler.set_enabled(False)
+        self.assertTrue(self.profiler.callback('sphere-static', two_joints) is two_joints)
+        self.record_step(1.0)
+        self.assertEqual([], self.profiler.get_records())
+        self.assertEqual([], self.profiler.histogram())
+
+    def test_dump_json(self):
+        self.record_step(1.0)
+        handle, file_name = tempfile.mkstemp(suffix = '.json')
+        os.close(handle)
+        try:
+            self.profiler.dump(file_name)
+            with open(file_name) as json_file:
+                dump = json.load(json_file)
+        finally:
+            os.remove(file_name)
+        self.assertEqual(1, dump['summary']['steps'])
+        self.assertEqual(['sphere-static'], dump['pairs'])
+        self.assertEqual(2, dump['steps'][0]['contacts']['sphere-static'])
+
+if __name__ == '__main__':
+    unittest.main()
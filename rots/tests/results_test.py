@@ -0,0 +1,35 @@
+import unittest
+
+from ..benchmarks import results
+
+class TestResults(unittest.TestCase):
+
+    def test_percentile(self):
+        values = [4.0, 1.0, 3.0, 2.0, 5.0]
+        self.assertEqual(3.0, results.percentile(values, 0.5))
+        self.assertEqual(1.0, results.percentile(values, 0.0))
+        self.assertEqual(5.0, results.percentile(values, 1.0))
+        self.assertAlmostEqual(4.6, results.percentile(values, 0.9))
+        self.assertRaises(ValueError, results.percentile, [], 0.5)
+
+    def test_summarize(self):
+        summary = results.summarize(range(101))
+        self.assertEqual(101, summary['count'])
+        self.assertEqual(50.0, summary['mean'])
+        self.assertEqual(90.0, summary['p90'])
+        self.assertEqual(100, summary['max'])
+        self.assertEqual({'count': 0}, results.summarize([]))
+
+    def test_compare(self):
+        baseline = {'scenes': {'small': {'step_ms': {'p50': 1.0, 'p90': 2.0}},
+                               'large': {'step_ms': {'p50': 10.0, 'p90': 20.0}}}}
+        new = {'scenes': {'small': {'step_ms': {'p50': 1.05, 'p90': 3.0}},
+                          'large': {'step_ms': {'p50': 9.0, 'p90': 20.0}},
+                          'medium': {'step_ms': {'p50': 5.0, 'p90': 6.0}}}}
+        regressions = results.compare(baseline, new, tolerance = 0.1)
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith('small step_ms p90'))
+        self.assertEqual([], results.compare(baseline, new, tolerance = 0.6))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from ..physics_engine.sleeping import Sleep_tracker
+
+class Fake_body(object):
+    def __init__(self):
+        self.enabled = True
+
+    def isEnabled(self):
+        return self.enabled
+
+class Fake_geom(object):
+    def __init__(self, item):
+        self.object = item
+
+class Fake_space(object):
+    ''' The part of an ODE space that the tracker uses. '''
+
+    def __init__(self, items):
+        self._geoms = [Fake_geom(item) for item in items]
+
+    def getNumGeoms(self):
+        return len(self._geoms)
+
+    def getGeom(self, i):
+        return self._geoms[i]
+
+class Fake_object(object):
+    def __init__(self, body = None):
+        self._body = body
+        self.sleeping = False
+
+    def get_body(self):
+        return self._body
+
+    def sleep(self):
+        self.sleeping = True
+
+    def wake(self):
+        self.sleeping = False
+
+class TestSleeping(unittest.TestCase):
+
+    def setUp(self):
+        self.ball = Fake_object(Fake_body())
+        self.box = Fake_object(Fake_body())
+        self.static = Fake_object()
+        self.door = Fake_object()
+        self.dynamic = (Fake_space([self.ball, self.box, self.static]),)
+        self.kinematic = (Fake_space([self.door]),)
+        self.tracker = Sleep_tracker()
+
+    def test_sleep_and_wake(self):
+        tracker = self.tracker
+        tracker.update(self.dynamic, self.kinematic)
+        self.assertEqual(set([self.ball, self.box]), tracker.get_awake())
+        self.assertEqual(set([self.ball, self.box, self.door]), set(tracker.get_moving()))
+
+        self.box.get_body().enabled = False
+        tracker.update(self.dynamic, self.kinematic)
+        self.assertTrue(self.box.sleeping)
+        self.assertEqual(set([self.box]), tracker.get_sleeping())
+        self.assertEqual(set([self.ball, self.door]), set(tracker.get_moving()))
+
+        self.box.get_body().enabled = True
+        tracker.update(self.dynamic, self.kinematic)
+        self.assertFalse(self.box.sleeping)
+        self.assertEqual(set(), tracker.get_sleeping())
+
+    def test_moved(self):
+        tracker = self.tracker
+        tracker.update(self.dynamic, self.kinematic)
+        self.assertEqual(set([self.ball, self.box, self.door]), tracker.pop_moved())
+
+        # Falling asleep is the last move
+        self.box.get_body().enabled = False
+        tracker.update(self.dynamic, self.kinematic)
+        self.assertEqual(set([self.ball, self.box, self.door]), tracker.pop_moved())
+
+        tracker.update(self.dynamic, self.kinematic)
+        self.assertEqual(set([self.ball, self.door]), tracker.pop_moved())
+
+if __name__ == '__main__':
+    unittest.main()
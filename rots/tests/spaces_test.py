@@ -0,0 +1,47 @@
+import unittest
+
+from ..physics_engine import spaces
+from ..physics_engine.spaces import Space_config
+
+class TestSpaces(unittest.TestCase):
+
+    def test_from_string(self):
+        self.assertEqual(spaces.SIMPLE, Space_config.from_string('simple').get_space_type())
+        self.assertEqual((-2, 6), Space_config.from_string('hash:-2:6').get_levels())
+
+        quadtree = Space_config.from_string('quadtree:0,1,0:100,20,100:5')
+        self.assertEqual(spaces.QUADTREE, quadtree.get_space_type())
+        self.assertEqual((0.0, 1.0, 0.0), quadtree.get_center())
+        self.assertEqual((100.0, 20.0, 100.0), quadtree.get_extents())
+        self.assertEqual(5, quadtree.get_depth())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Space_config, 'octree')
+        self.assertRaises(ValueError, Space_config.hash, 4, 2)
+        self.assertRaises(ValueError, Space_config.from_string, 'hash:1')
+        self.assertRaises(ValueError, spaces.create_spaces, {'floor': Space_config.simple()})
+
+    def test_create_spaces(self):
+        created = spaces.create_spaces({'static': Space_config.simple()})
+        self.assertEqual(len(spaces.SPACE_NAMES), len(created))
+        for space in created:
+            self.assertEqual(0, space.getNumGeoms())
+
+    def test_create_root_space(self):
+        created = spaces.create_spaces()
+        root = spaces.create_root_space(created, [('sphere', 'static'),
+                                                  ('sphere', 'sphere')])
+        self.assertEqual(len(spaces.SPACE_NAMES), root.getNumGeoms())
+
+        sphere_space, object_space, static_space = created[:3]
+        self.assertEqual(spaces.get_category('sphere'), sphere_space.getCategoryBits())
+        self.assertEqual(spaces.get_category('static'), sphere_space.getCollideBits())
+        self.assertEqual(spaces.get_category('sphere'), static_space.getCollideBits())
+        self.assertEqual(0, object_space.getCollideBits())
+
+        self.assertRaises(ValueError, spaces.create_root_space, created[:3], [])
+        self.assertRaises(ValueError, spaces.create_root_space,
+                          spaces.create_spaces(), [('sphere', 'floor')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import random
+
+from ..graphics.culling import Frustum
+from ..math_classes import spatial
+from ..math_classes.matrices import Matrix4
+
+def random_AABB(rand, spread = 50.0, max_size = 3.0):
+    x, y, z = [rand.uniform(-spread, spread) for i in range(3)]
+    sx, sy, sz = [rand.uniform(0.1, max_size) for i in range(3)]
+    return (x, x + sx, y, y + sy, z, z + sz)
+
+class TestSpatial(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(1)
+        self.items = ['item %d' % i for i in range(200)]
+        self.AABBs = [random_AABB(rand) for item in self.items]
+        self.queries = [random_AABB(rand, max_size = 20.0) for i in range(30)]
+
+    def brute_force(self, query):
+        return set(item for item, aabb in zip(self.items, self.AABBs)
+                        if spatial.AABBs_overlap(aabb, query))
+
+    def test_BVH_AABB(self):
+        bvh = spatial.BVH(self.items, self.AABBs)
+        self.assertEqual(200, len(bvh))
+        for query in self.queries:
+            self.assertEqual(self.brute_force(query), set(bvh.query_AABB(query)))
+
+    def test_BVH_empty(self):
+        bvh = spatial.BVH((), ())
+        self.assertEqual([], bvh.query_AABB((0, 1, 0, 1, 0, 1)))
+
+    def test_BVH_sphere(self):
+        bvh = spatial.BVH(self.items, self.AABBs)
+        found = set(bvh.query_sphere((0.0, 0.0, 0.0), 10.0))
+        for item, aabb in zip(self.items, self.AABBs):
+            closest = [min(max(0.0, aabb[2 * i]), aabb[2 * i + 1]) for i in range(3)]
+            inside = sum(c * c for c in closest) <= 100.0
+            self.assertEqual(inside, item in found)
+
+    def test_grid_AABB(self):
+        grid = spatial.Loose_grid(cell_size = 4.0)
+        for item, aabb in zip(self.items, self.AABBs):
+            grid.update(item, aabb)
+        self.assertEqual(200, len(grid))
+        for query in self.queries:
+            self.assertEqual(self.brute_force(query), set(grid.query_AABB(query)))
+
+    def test_grid_move_and_remove(self):
+        grid = spatial.Loose_grid(cell_size = 4.0)
+        grid.update('a', (0.0, 1.0, 0.0, 1.0, 0.0, 1.0))
+        grid.update('a', (20.0, 21.0, 0.0, 1.0, 0.0, 1.0))
+        self.assertEqual([], grid.query_point((0.5, 0.5, 0.5)))
+        self.assertEqual(['a'], grid.query_point((20.5, 0.5, 0.5)))
+        grid.remove('a')
+        self.assertEqual(0, len(grid))
+        self.assertEqual([], grid.query_point((20.5, 0.5, 0.5)))
+
+    def test_frustum(self):
+        projection = Matrix4.perspective(45.0, 1.0, 0.1, 100.0)
+        look_at = Matrix4.look_at((0.0, 0.0, 60.0), (0.0, 0.0, 0.0),
+                                  (0.0, 1.0, 0.0))
+        frustum = Frustum.from_matrix(projection * look_at)
+        visible = frustum.AABBs_visible(self.AABBs)
+        expected = set(item for item, v in zip(self.items, visible) if v)
+
+        bvh = spatial.BVH(self.items, self.AABBs)
+        self.assertEqual(expected, set(bvh.query_frustum(frustum)))
+
+        grid = spatial.Loose_grid()
+        for item, aabb in zip(self.items, self.AABBs):
+            grid.update(item, aabb)
+        self.assertEqual(expected, set(grid.query_frustum(frustum)))
+
+    def test_grid_frustum_near_cells(self):
+        # Only the items in the cells around the frustum are tested
+        class Frustum_stub(object):
+            def __init__(self):
+                self.tested = 0
+            def get_AABB(self):
+                return (-1.0, 1.0, -1.0, 1.0, -1.0, 1.0)
+            def AABBs_visible(self, AABBs):
+                self.tested += len(AABBs)
+                return [True] * len(AABBs)
+
+        grid = spatial.Loose_grid(cell_size = 4.0)
+        grid.update('near', (0.0, 1.0, 0.0, 1.0, 0.0, 1.0))
+        grid.update('far', (40.0, 41.0, 0.0, 1.0, 0.0, 1.0))
+        frustum = Frustum_stub()
+        self.assertEqual(['near'], grid.query_frustum(frustum))
+        self.assertEqual(1, frustum.tested)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from ..graphics import texture_atlas
+
+def image(width, height, value):
+    return np.full((height, width, 3), value, np.uint8)
+
+class TestTextureAtlas(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.images = []
+        for name, size in (('a', (8, 4)), ('b', (4, 4)), ('c', (16, 2))):
+            path = os.path.join(self.directory, name + '.png')
+            with open(path, 'w') as image_file:
+                image_file.write(name)
+            self.images.append((name, path))
+        self.decoded = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def decode(self, path):
+        ''' Images of the sizes above, filled with the first
+            letter of the file. '''
+        self.decoded.append(path)
+        sizes = {'a': (8, 4), 'b': (4, 4), 'c': (16, 2)}
+        with open(path) as image_file:
+            name = image_file.read()
+        width, height = sizes[name]
+        return image(width, height, ord(name)).tobytes(), (width, height)
+
+    def test_max_level(self):
+        self.assertEqual(2, texture_atlas.get_max_level(4))
+        self.assertEqual(3, texture_atlas.get_max_level(8))
+        self.assertEqual(0, texture_atlas.get_max_level(1))
+        self.assertEqual(0, texture_atlas.get_max_level(0))
+
+    def test_next_power_of_two(self):
+        self.assertEqual(1, texture_atlas.next_power_of_two(1))
+        self.assertEqual(64, texture_atlas.next_power_of_two(33))
+        self.assertEqual(64, texture_atlas.next_power_of_two(64))
+
+    def test_pack_shelves(self):
+        positions, used = texture_atlas.pack([(8, 4), (4, 4), (16, 2)], 16, 16, padding = 0)
+        # The tallest first, on one shelf, the flat one on the next
+        self.assertEqual([(0, 0, 0), (0, 8, 0), (0, 0, 4)], positions)
+        self.assertEqual([(16, 6)], used)
+
+    def test_pack_pages(self):
+        positions, used = texture_atlas.pack([(8, 8), (8, 8), (8, 8)], 16, 8, padding = 0)
+        self.assertEqual([(0, 0, 0), (0, 8, 0), (1, 0, 0)], positions)
+        self.assertEqual([(16, 8), (8, 8)], used)
+
+    def test_pack_padding(self):
+        positions, used = texture_atlas.pack([(4, 4), (4, 4)], 16, 16, padding = 1)
+        self.assertEqual([(0, 1, 1), (0, 7, 1)], positions)
+        self.assertEqual([(12, 6)], used)
+
+    def test_too_large(self):
+        self.assertRaises(ValueError, texture_atlas.pack, [(32, 4)], 16, 16)
+        self.assertRaises(ValueError, texture_atlas.build_atlas,
+                          [('a', image(32, 4, 0))], max_size = 16)
+
+    def test_build_atlas(self):
+        pages = texture_atlas.build_atlas([('a', image(8, 4, 1)), ('b', image(4, 4, 2))],
+                                          padding = 2)
+        self.assertEqual(1, len(pages))
+        pixels, regions = pages[0]
+        height, width = pixels.shape[:2]
+        self.assertEqual((width, height), (texture_atlas.next_power_of_two(width),
+                                           texture_atlas.next_power_of_two(height)))
+
+        for name, value, size in (('a', 1, (8, 4)), ('b', 2, (4, 4))):
+            u0, v0, u1, v1 = regions[name]
+            x0, y0 = int(round(u0 * width)), int(round(v0 * height))
+            x1, y1 = int(round(u1 * width)), int(round(v1 * height))
+            self.assertEqual(size, (x1 - x0, y1 - y0))
+            self.assertTrue((pixels[y0:y1, x0:x1] == value).all())
+            # The edges are repeated into the padding
+            self.assertTrue((pixels[y0 - 2:y1 + 2, x0 - 2:x1 + 2] == value).all())
+
+    def test_cached(self):
+        pages = texture_atlas.get_atlas('test', self.images, self.decode,
+                                        cache_dir = self.cache_dir)
+        self.assertEqual(3, len(self.decoded))
+        cached = texture_atlas.get_atlas('test', self.images, self.decode,
+                                         cache_dir = self.cache_dir)
+        self.assertEqual(3, len(self.decoded))
+
+        self.assertEqual(len(pages), len(cached))
+        for (levels, regions), (cached_levels, cached_regions) in zip(pages, cached):
+            self.assertEqual(regions, cached_regions)
+            self.assertEqual([(w, h) for w, h, pixels in levels],
+                             [(w, h) for w, h, pixels in cached_levels])
+            self.assertEqual(np.asarray(levels[0][2]).tobytes(),
+                             np.asarray(cached_levels[0][2]).tobytes())
+
+    def test_changed_image(self):
+        texture_atlas.get_atlas('test', self.images, self.decode, cache_dir = self.cache_dir)
+        old_files = sorted(os.listdir(self.cache_dir))
+
+        path = self.images[0][1]
+        os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 10))
+        texture_atlas.get_atlas('test', self.images, self.decode, cache_dir = self.cache_dir)
+        self.assertEqual(6, len(self.decoded))
+
+        # The files of the old version are gone
+        new_files = sorted(os.listdir(self.cache_dir))
+        self.assertEqual(len(old_files), len(new_files))
+        self.assertFalse(set(old_files) & set(new_files))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from ..graphics import texture_cache
+
+class TestTextureCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.image_path = os.path.join(self.directory, 'image.png')
+        with open(self.image_path, 'w') as image_file:
+            image_file.write('not really a png')
+        self.decoded = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def decode(self, path):
+        ''' A 4x2 image with the pixel values 0-23. '''
+        self.decoded.append(path)
+        return np.arange(24, dtype = np.uint8).tobytes(), (4, 2)
+
+    def test_power_of_two(self):
+        self.assertEqual(512, texture_cache.power_of_two(500, 4096))
+        self.assertEqual(256, texture_cache.power_of_two(300, 4096))
+        self.assertEqual(1, texture_cache.power_of_two(1, 4096))
+        self.assertEqual(4096, texture_cache.power_of_two(8000, 4096))
+
+    def test_mip_chain(self):
+        levels = texture_cache.build_mip_chain(*self.decode(None))
+        self.assertEqual([(4, 2), (2, 1), (1, 1)],
+                         [(width, height) for width, height, pixels in levels])
+        # The first pixel of level 1 is the average of pixels 0, 1, 4 and 5
+        self.assertEqual([8, 9, 10], levels[1][2][0, 0].tolist())
+
+    def test_resize(self):
+        pixels = np.full((3, 5, 3), 7, np.uint8)
+        self.assertEqual((4, 4, 3), texture_cache.resize(pixels, 4, 4).shape)
+        self.assertTrue((texture_cache.resize(pixels, 4, 4) == 7).all())
+
+    def test_cache(self):
+        levels = texture_cache.get_mip_chain(self.image_path, self.decode,
+                                             cache_dir = self.cache_dir)
+        cached = texture_cache.get_mip_chain(self.image_path, self.decode,
+                                             cache_dir = self.cache_dir)
+        self.assertEqual(1, len(self.decoded))
+        self.assertEqual(len(levels), len(cached))
+        for (width, height, pixels), (cached_width, cached_height, cached_pixels) \
+                in zip(levels, cached):
+            self.assertEqual((width, height), (cached_width, cached_height))
+            self.assertEqual(pixels.tobytes(), cached_pixels.tobytes())
+
+    def test_new_version(self):
+        texture_cache.get_mip_chain(self.image_path, self.decode,
+                                    cache_dir = self.cache_dir)
+        mtime = os.path.getmtime(self.image_path)
+        os.utime(self.image_path, (mtime + 10, mtime + 10))
+        texture_cache.get_mip_chain(self.image_path, self.decode,
+                                    cache_dir = self.cache_dir)
+        self.assertEqual(2, len(self.decoded))
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+    def test_fallback_not_cached(self):
+        def broken(path):
+            self.decoded.append(path)
+            raise ValueError('broken image')
+        fallbacks = []
+        def fallback(path, message):
+            fallbacks.append(path)
+            return self.decode(path)
+
+        for i in range(2):
+            levels = texture_cache.get_mip_chain(self.image_path, broken,
+                                                 cache_dir = self.cache_dir,
+                                                 fallback = fallback)
+            self.assertEqual((4, 2), levels[0][:2])
+        # Tried again the second time, nothing written
+        self.assertEqual(2, len(fallbacks))
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_settings(self):
+        settings = dict(texture_cache.DEFAULT_SETTINGS, max_size = 2)
+        self.assertNotEqual(texture_cache.get_cache_path(self.image_path),
+                            texture_cache.get_cache_path(self.image_path, settings))
+        levels = texture_cache.build_mip_chain(*self.decode(None), settings = settings)
+        self.assertEqual((2, 2), levels[0][:2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from ..graphics import texture_registry
+
+class TestTextureRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+        self.deleted = []
+        self.registry = texture_registry.Texture_registry(self.deleted.append,
+                                                          budget = 100)
+
+    def creator(self, texture, size):
+        def create():
+            self.created.append(texture)
+            return texture, size
+        return create
+
+    def test_shared(self):
+        first = self.registry.acquire('a', self.creator(1, 10))
+        second = self.registry.acquire('a', self.creator(2, 10))
+        self.assertEqual(1, first)
+        self.assertEqual(1, second)
+        self.assertEqual([1], self.created)
+        self.assertEqual((1, 2, 0, 10), self.registry.get_statistics())
+
+    def test_unused_kept_in_budget(self):
+        texture = self.registry.acquire('a', self.creator(1, 10))
+        self.registry.release(texture)
+        self.assertEqual([], self.deleted)
+        self.assertEqual((1, 0, 1, 10), self.registry.get_statistics())
+
+        # Acquired again without being created again
+        self.assertEqual(1, self.registry.acquire('a', self.creator(2, 10)))
+        self.assertEqual([1], self.created)
+        self.assertEqual((1, 1, 0, 10), self.registry.get_statistics())
+
+    def test_least_recently_used_evicted(self):
+        for texture, key in enumerate('abc'):
+            self.registry.release(self.registry.acquire(key, self.creator(texture, 40)))
+
+        # 120 bytes with a budget of 100, 'a' was the first unused
+        self.assertEqual([0], self.deleted)
+        self.assertFalse('a' in self.registry)
+        self.assertEqual(80, self.registry.get_resident())
+        self.assertEqual(1, self.registry.get_evicted())
+
+        # Using 'b' again makes 'c' the least recently used
+        self.registry.acquire('b', self.creator(1, 40))
+        self.registry.acquire('d', self.creator(3, 40))
+        self.assertEqual([0, 2], self.deleted)
+
+    def test_used_not_evicted(self):
+        self.registry.acquire('a', self.creator(1, 80))
+        self.registry.acquire('b', self.creator(2, 80))
+        self.assertEqual([], self.deleted)
+        self.assertEqual(160, self.registry.get_resident())
+
+    def test_budget(self):
+        self.registry.release(self.registry.acquire('a', self.creator(1, 10)))
+        self.registry.set_budget(0)
+        self.assertEqual([1], self.deleted)
+        self.assertEqual(0, self.registry.get_resident())
+        self.assertRaises(ValueError, self.registry.set_budget, -1)
+
+    def test_resize(self):
+        texture = self.registry.acquire('a', self.creator(1, 40))
+        self.registry.release(self.registry.acquire('b', self.creator(2, 40)))
+        self.registry.resize(texture, 30)
+        self.assertEqual(70, self.registry.get_resident())
+        self.assertEqual([2], self.deleted)
+        self.registry.resize(texture, -50)
+        self.assertEqual(20, self.registry.get_resident())
+
+    def test_release_unknown(self):
+        self.registry.release(5)
+        self.assertEqual((0, 0, 0, 0), self.registry.get_statistics())
+
+    def test_clear(self):
+        self.registry.acquire('a', self.creator(1, 10))
+        self.registry.release(self.registry.acquire('b', self.creator(2, 10)))
+        self.registry.clear()
+        self.assertEqual([1, 2], sorted(self.deleted))
+        self.assertEqual((0, 0, 0, 0), self.registry.get_statistics())
+
+if __name__ == '__main__':
+    unittest.main()
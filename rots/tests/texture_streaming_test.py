@@ -0,0 +1,120 @@
+import unittest
+
+import numpy as np
+
+from ..graphics import texture_streaming
+
+class View(object):
+    ''' The parts of views.View that screen_size uses. '''
+
+    def get_height(self):
+        return 600
+
+    def get_aspect_angle(self):
+        return 90.0
+
+    def get_near(self):
+        return 0.1
+
+def mip_chain(size):
+    levels = []
+    while size >= 1:
+        levels.append((size, size, np.zeros(size * size * 3, np.uint8)))
+        size //= 2
+    return levels
+
+class TestTextureStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.levels = mip_chain(1024)
+        self.uploads = []
+        self.drops = []
+        self.streamer = texture_streaming.Texture_streamer(
+            lambda texture, level, width, height, pixels: \
+                self.uploads.append((texture, level, width)),
+            lambda texture, base, dropped: self.drops.append((texture, base, dropped)),
+            drop_delay = 5.0)
+
+    def tearDown(self):
+        self.streamer.close()
+
+    def update(self, pixels, now):
+        self.streamer.update({1: pixels}, now)
+        self.streamer.wait()
+
+    def test_placeholder_level(self):
+        self.assertEqual(3, texture_streaming.placeholder_level(self.levels, 128))
+        self.assertEqual(0, texture_streaming.placeholder_level(mip_chain(64), 128))
+
+    def test_wanted_level(self):
+        # 1024 texels for 512 pixels
+        self.assertEqual(0, texture_streaming.wanted_level(self.levels, 512))
+        self.assertEqual(1, texture_streaming.wanted_level(self.levels, 256))
+        self.assertEqual(0, texture_streaming.wanted_level(self.levels, 5000))
+        self.assertEqual(len(self.levels) - 1, texture_streaming.wanted_level(self.levels, 0))
+
+    def test_screen_size(self):
+        # A 2 unit object 1 unit away (from its surface) fills the
+        # screen with a 90 degree field of view
+        aabb = (-1.0, 1.0, -1.0, 1.0, -1.0, 1.0)
+        self.assertAlmostEqual(600.0, texture_streaming.screen_size(aabb, (0.0, 0.0, 2.0), View()))
+        self.assertAlmostEqual(120.0, texture_streaming.screen_size(aabb, (0.0, 0.0, 6.0), View()))
+
+    def test_stream_in(self):
+        self.streamer.add(1, self.levels, 3)
+        # The read first, then the upload of one level per update
+        for i in range(10):
+            self.update(512, 0.0)
+        self.assertEqual([(1, 2, 256), (1, 1, 512), (1, 0, 1024)], self.uploads)
+        self.assertEqual(0, self.streamer.get_base_level(1))
+        self.assertEqual((1, 3, 0), self.streamer.get_statistics())
+
+    def test_upload_budget(self):
+        streamer = texture_streaming.Texture_streamer(
+            lambda texture, level, width, height, pixels: \
+                self.uploads.append((texture, level)),
+            lambda texture, base, dropped: None, upload_budget = 1)
+        streamer.add(1, self.levels, 3)
+        streamer.add(2, self.levels, 3)
+        streamer.update({1: 512, 2: 512}, 0.0)
+        streamer.wait()
+        # Only one level per update over the budget
+        streamer.update({1: 512, 2: 512}, 0.0)
+        self.assertEqual(1, len(self.uploads))
+        streamer.close()
+
+    def test_drop_after_delay(self):
+        self.streamer.add(1, self.levels, 3)
+        for i in range(10):
+            self.update(512, 0.0)
+
+        # Far away, but not for long enough
+        self.update(10, 1.0)
+        self.update(10, 5.0)
+        self.assertEqual([], self.drops)
+
+        # Back to the placeholder, never smaller
+        self.update(10, 6.0)
+        self.assertEqual([(1, 3, [(0, 1024, 1024), (1, 512, 512), (2, 256, 256)])],
+                         self.drops)
+        self.assertEqual(3, self.streamer.get_base_level(1))
+
+    def test_close_again_resets_delay(self):
+        self.streamer.add(1, self.levels, 3)
+        for i in range(10):
+            self.update(512, 0.0)
+        self.update(10, 1.0)
+        self.update(512, 2.0)
+        self.update(10, 3.0)
+        self.update(10, 7.0)
+        self.assertEqual([], self.drops)
+
+    def test_unseen_not_streamed(self):
+        self.streamer.add(1, self.levels, 3)
+        self.streamer.update({}, 0.0)
+        self.assertEqual([], self.uploads)
+        self.streamer.remove(1)
+        self.assertFalse(1 in self.streamer)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from ..physics_engine.timestep import Fixed_timestep, State_interpolator
+from ..math_classes.vectors import Vector
+
+class Moving_item(object):
+    def __init__(self, pos):
+        self.pos = Vector(pos)
+
+    def get_pos(self):
+        return self.pos
+
+class TestTimestep(unittest.TestCase):
+
+    def test_steps(self):
+        timestep = Fixed_timestep(1 / 60.0)
+        self.assertEqual(1, timestep.advance(1 / 60.0))
+        self.assertEqual(0, timestep.advance(1 / 120.0))
+        self.assertAlmostEqual(0.5, timestep.get_alpha())
+        self.assertEqual(1, timestep.advance(1 / 120.0))
+        self.assertEqual(2, timestep.advance(1 / 30.0))
+
+    def test_same_time_same_steps(self):
+        # The number of steps only depends on the total time
+        for frame_rate in (30.0, 60.0, 144.0):
+            timestep = Fixed_timestep(1 / 60.0)
+            steps = sum(timestep.advance(1 / frame_rate) for i in range(int(frame_rate)))
+            self.assertEqual(60, steps)
+
+    def test_max_steps(self):
+        timestep = Fixed_timestep(0.1, max_steps = 3)
+        self.assertEqual(3, timestep.advance(1.05))
+        self.assertAlmostEqual(0.7, timestep.get_dropped_time())
+        self.assertAlmostEqual(0.5, timestep.get_alpha())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Fixed_timestep, 0.0)
+        self.assertRaises(ValueError, Fixed_timestep, 0.1, 0)
+
+    def test_interpolation(self):
+        item = Moving_item((0.0, 0.0, 0.0))
+        still = Moving_item((5.0, 5.0, 5.0))
+        interpolator = State_interpolator()
+        interpolator.save([item])
+        item.pos = Vector((2.0, 4.0, 0.0))
+
+        self.assertEqual((0.0, 0.0, 0.0), interpolator.get_pos(item, 0.0))
+        self.assertEqual((1.0, 2.0, 0.0), interpolator.get_pos(item, 0.5))
+        self.assertEqual((2.0, 4.0, 0.0), interpolator.get_pos(item, 1.0))
+        self.assertEqual(None, interpolator.get_offset(still, 0.5))
+
+if __name__ == '__main__':
+    unittest.main()
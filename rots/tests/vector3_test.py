@@ -0,0 +1,91 @@
+import unittest
+import math
+from ..math_classes.vectors import Vector, Vector3
+
+class TestVector3(unittest.TestCase):
+
+    def setUp(self):
+        self.v1 = Vector3([2, 0, 3])
+        self.v2 = Vector3([0, 2, 3])
+        self.v3 = Vector3([1, 3, -2])
+
+    def test_dim(self):
+        self.assertEqual(3, self.v1.dim())
+
+    def test_is_zero(self):
+        self.assertFalse(self.v1.is_zero())
+        self.assertTrue(Vector3().is_zero())
+
+    def test_is_not_zero(self):
+        self.assertTrue(self.v1.is_not_zero())
+        self.assertFalse(Vector3().is_not_zero())
+
+    def test_dot(self):
+        self.assertEqual(9, self.v1.dot(self.v2))
+
+    def test_cross(self):
+        self.assertEqual((-6, -6, 4), self.v1.cross(self.v2).value)
+
+    def test_project(self):
+        expected = [-2.0/7.0, 18.0/13.0 - 6.0/7.0, 27.0/13.0 + 4.0/7.0]
+        actual = self.v1.projected(self.v2, self.v3).value
+
+        for a, b in zip(expected, actual):
+            self.assertAlmostEqual(a, b)
+
+    def test_norm(self):
+        self.assertAlmostEqual(math.sqrt(13), self.v1.norm())
+        self.assertEqual(13, self.v1.square_norm())
+
+    def test_normalize(self):
+        v = self.v1.copy()
+        self.assertAlmostEqual(1, self.v1.normalize().norm())
+        self.assertEqual(v, self.v1) # should not mutate
+        self.assertEqual(None, Vector3().normalize())
+
+    def test_equal(self):
+        self.assertEqual(self.v1, Vector3([2, 0, 3]))
+        self.assertNotEqual(self.v1, None)
+
+    def test_not_equal(self):
+        self.assertNotEqual(self.v1, self.v2)
+
+    def test_mult_scalar(self):
+        self.assertEqual((4, 0, 6), (self.v1 * 2).value)
+        self.assertEqual((4, 0, 6), (2 * self.v1).value)
+
+    def test_unary_neg(self):
+        self.assertEqual((-2, 0, -3), (-self.v1).value)
+
+    def test_vector_addition(self):
+        self.assertEqual((2, 2, 6), (self.v1 + self.v2).value)
+
+    def test_vector_subtraction(self):
+        self.assertEqual((2, -2, 0), (self.v1 - self.v2).value)
+
+    def test_in_place(self):
+        v = self.v1
+        v += self.v2
+        self.assertTrue(v is self.v1)
+        self.assertEqual((2, 2, 6), v.value)
+        v -= self.v2
+        self.assertEqual((2, 0, 3), v.value)
+        v *= 2
+        self.assertEqual((4, 0, 6), v.value)
+
+    def test_triple_products(self):
+        expected = self.v1.cross(self.v2.cross(self.v3))
+        self.assertEqual(expected, self.v1.triple_product_1(self.v2, self.v3))
+
+        expected = self.v1.cross(self.v2).cross(self.v3)
+        self.assertEqual(expected, self.v1.triple_product_2(self.v2, self.v3))
+
+    def test_mixed_with_vector(self):
+        old = Vector([0, 2, 3])
+        self.assertEqual((2, 2, 6), (self.v1 + old).value)
+        self.assertEqual(9, self.v1.dot(old))
+        self.assertEqual(self.v2, old)
+        self.assertEqual((2, 0, 3), Vector3(Vector([2, 0, 3])).value)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from ..benchmarks.space_benchmark import Benchmark_scene
+from ..physics_engine.world_pool import Scene_description, World_pool
+
+class TestWorldPool(unittest.TestCase):
+
+    def setUp(self):
+        # Two copies of the same scene and a different one
+        self.descriptions = [Scene_description(Benchmark_scene, 10, {}, seed = seed)
+                             for seed in (0, 0, 1)]
+
+    def test_lockstep(self):
+        ticks = []
+        with World_pool(self.descriptions, processes = 2, max_bodies = 4) as pool:
+            pool.step(3, callback = lambda pool: ticks.append(pool.get_ticks(2)))
+            self.assertEqual([1, 2, 3], ticks)
+            self.assertEqual([3, 3, 3], [result['ticks'] for result in pool.get_results()])
+
+    def test_free_run(self):
+        with World_pool(self.descriptions, processes = 2, max_bodies = 4) as pool:
+            self.assertEqual(3, pool.get_size())
+            pool.run(30)
+            positions = [pool.get_positions(world) for world in range(3)]
+
+        self.assertEqual((4, 3), positions[0].shape)
+        # The same scene gives the same result in another process
+        self.assertEqual(positions[0].tolist(), positions[1].tolist())
+        self.assertNotEqual(positions[0].tolist(), positions[2].tolist())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, World_pool, [])
+
+if __name__ == '__main__':
+    unittest.main()